@@ -49,6 +49,26 @@ SECRET_KEY = env("SECRET_KEY")
 # same-day visitor-uniqueness continuity.
 LINK_TRACKING_SALT = env("LINK_TRACKING_SALT", default=SECRET_KEY)
 
+# How Link Tree clicks/scans are written (see tools/LinkTree/eventBuffer.py).
+# "sync" writes each LinkEvent inside the redirect. "buffered" queues it in a
+# bounded per-worker buffer that a background thread flushes with one
+# bulk_create per flushSize events or flushSeconds, so a burst of scans no
+# longer waits on SQLite's write lock; events beyond maxEvents are dropped and
+# counted. Production (docker-compose) runs buffered; dev and tests stay sync
+# so an event is visible the moment the redirect returns.
+LINK_EVENT_RECORDING = env("LINK_EVENT_RECORDING", default="sync")
+LINK_EVENT_BUFFER = {
+    "maxEvents": env.int("LINK_EVENT_BUFFER_MAX_EVENTS", default=5000),
+    "flushSize": env.int("LINK_EVENT_BUFFER_FLUSH_SIZE", default=200),
+    "flushSeconds": env.float("LINK_EVENT_BUFFER_FLUSH_SECONDS", default=2.0),
+}
+
+# Raw LinkEvents older than this are archived and deleted weekly (see
+# tools/LinkTree/retention.py); the dashboard counts live on in the rollup.
+# Archives are gzipped per-day CSVs under LINK_EVENT_ARCHIVE_DIR, if set.
+LINK_EVENT_RETENTION_DAYS = env.int("LINK_EVENT_RETENTION_DAYS", default=400)
+LINK_EVENT_ARCHIVE_DIR = env("LINK_EVENT_ARCHIVE_DIR", default="")
+
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = env("DEBUG")
 
@@ -74,6 +94,85 @@ HUEY = {
     "consumer": {"workers": 1},
 }
 
+# Cache. With CACHE_DIR set (docker-compose: /data/cache, shared by the web
+# workers and the Huey consumer) entries live on disk, so an invalidation in
+# one process is seen by all of them. Unset (dev, tests) it is a per-process
+# in-memory cache, which is all a single runserver needs.
+CACHE_DIR = env("CACHE_DIR", default="")
+if CACHE_DIR:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": CACHE_DIR,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Upper bound on how long a PUBLIC link tree's rendered page is cached (see
+# tools/LinkTree/pageCache.py). Edits invalidate it immediately; this only
+# bounds how long an unforeseen change could go unseen.
+LINK_TREE_PAGE_CACHE_SECONDS = env.int("LINK_TREE_PAGE_CACHE_SECONDS", default=300)
+
+# max-age sent with PUBLIC link tree pages (browsers and the nginx micro-cache
+# in nginx-conf/). Short: a cached copy can't be invalidated on edit, only
+# revalidated against its ETag once this expires.
+LINK_TREE_BROWSER_MAX_AGE = env.int("LINK_TREE_BROWSER_MAX_AGE", default=60)
+
+# How long a metrics dashboard series stays cached (tools/LinkTree/metrics.py
+# eventSeries). Keyed by the tree's event counters, so new events invalidate it
+# at once; this only bounds cache size.
+LINK_METRICS_SERIES_CACHE_SECONDS = env.int("LINK_METRICS_SERIES_CACHE_SECONDS", default=60 * 60 * 24)
+
+# How old an event must be before the JSON event feed serves it (metrics.py
+# eventFeed): long enough for buffered events, stamped at click time but
+# written a flush later, to be in the database before a cursor passes them.
+LINK_EVENT_FEED_SETTLE_SECONDS = env.int("LINK_EVENT_FEED_SETTLE_SECONDS", default=30)
+
+# Distinct browser families / referrer hosts kept per tree per day by the
+# rollup (tools/LinkTree/rollups.py); further values are counted as "(other)".
+LINK_DIMENSION_TOP_N = env.int("LINK_DIMENSION_TOP_N", default=25)
+
+# Live counts on the metrics page (tools/LinkTree/liveCounters.py): how often
+# the shared poller re-reads the counters of watched trees, and how long one
+# server-sent-event stream stays open before the browser reconnects.
+LINK_LIVE_POLL_SECONDS = env.float("LINK_LIVE_POLL_SECONDS", default=2.0)
+LINK_LIVE_STREAM_SECONDS = env.int("LINK_LIVE_STREAM_SECONDS", default=600)
+
+# How long the shared Zoom account directory stays cached (tools/EventAutomation/
+# ZoomAPI.py). The hourly refreshZoomDirectory task keeps it warm; this only
+# bounds staleness if that stops running.
+ZOOM_DIRECTORY_CACHE_SECONDS = env.int("ZOOM_DIRECTORY_CACHE_SECONDS", default=6 * 60 * 60)
+
+# How events are published to Action Network: "api" (REST API, needs the AnApiKey
+# secret), "selenium" (drive the editor in the chrome container), or "auto" -
+# the API when a key is configured, otherwise Selenium.
+AN_PUBLISH_BACKEND = env("AN_PUBLISH_BACKEND", default="auto")
+# Where the "api" backend sends events. With "auto", a publish that can't
+# connect here falls back to Selenium; one that fails after connecting doesn't,
+# since the event may already have been created.
+AN_API_BASE_URL = env("AN_API_BASE_URL", default="https://actionnetwork.org/api/v2")
+
+# Warm Action Network browser sessions kept by the publishing worker
+# (tools/EventAutomation/ActionNetworkAutomation.py): how many, how many publishes
+# each serves before it is replaced, and how long one may sit unused. Keep the
+# idle limit under the chrome container's SE_NODE_SESSION_TIMEOUT.
+AN_SESSION_POOL_SIZE = env.int("AN_SESSION_POOL_SIZE", default=1)
+AN_SESSION_MAX_USES = env.int("AN_SESSION_MAX_USES", default=20)
+AN_SESSION_MAX_IDLE_SECONDS = env.int("AN_SESSION_MAX_IDLE_SECONDS", default=30 * 60)
+
+# How long a rendered QR image stays cached (tools/LinkTree/qrImages.py). Renders
+# are content-addressed, so this only bounds cache size, never staleness.
+LINK_QR_IMAGE_CACHE_SECONDS = env.int("LINK_QR_IMAGE_CACHE_SECONDS", default=60 * 60 * 24 * 30)
+
+# Render processes for the bulk QR ZIP export (tools/LinkTree/qrExport.py);
+# 1 renders inline in the request/command process.
+LINK_QR_EXPORT_WORKERS = env.int("LINK_QR_EXPORT_WORKERS", default=2)
+
 ALLOWED_HOSTS = env("ALLOWED_HOSTS")
 CSRF_TRUSTED_ORIGINS = env("CSRF_TRUSTED_ORIGINS")
 
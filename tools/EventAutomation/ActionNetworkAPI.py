@@ -0,0 +1,198 @@
+"""Action Network event publishing over its REST API (OSDI v2).
+
+The HTTP alternative to ``ActionNetworkAutomation.ANAutomator``: same
+``EventInfo`` in, same ``EventConfirmationInfo`` out, but one POST to
+``{apiBaseUrl}/events/`` instead of driving Chrome through the editor. Which one
+a publish uses is picked by ``ANAutomatorConfig.usesApi()``.
+
+The body carries every field ``EditEventScreen`` fills: the place for in
+person and hybrid events, the virtual flag, time zone and Zoom link for virtual
+and hybrid ones, and the same sponsor the editor picks. ``start_date``/``end_date``
+carry the UTC offset of the event's own zone: without one Action Network would
+read them in the account's default zone, not the zone the event was entered in.
+
+Creates go through one keep-alive ``requests.Session`` per process. Only
+failures to connect are retried - nothing was sent, so nothing can be
+published twice - and once those are exhausted createEvent raises
+``NotSentError`` so the caller may publish another way (see
+``EventAutomationDriver._createANEvent``). Any other failure - a timeout
+waiting for the answer, a dropped connection, an error status - is raised as
+is and never retried: the POST may have reached Action Network, and a second
+one could publish the event twice.
+"""
+
+import html
+import logging
+import threading
+
+import requests
+import requests.adapters
+import urllib3.exceptions
+import urllib3.util.retry
+
+from .ActionNetworkAutomation import (
+    ANAutomatorConfig,
+    ANTypes,
+    EditEventScreen,
+    EventConfirmationInfo,
+    EventInfo,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Constants:
+    API_KEY_HEADER = "OSDI-API-Token"
+    EVENTS_PATH = "/events/"
+    ORIGIN_SYSTEM = "Austin DSA Tools"
+    MANAGE_SUFFIX = "/manage"
+    TIMEOUT_SEC = (5, 30)
+
+    class Keys:
+        TITLE = "title"
+        START = "start_date"
+        END = "end_date"
+        DESCRIPTION = "description"
+        INSTRUCTIONS = "instructions"
+        LOCATION = "location"
+        ORIGIN_SYSTEM = "origin_system"
+        BROWSER_URL = "browser_url"
+        VIRTUAL = "action_network:virtual"
+        VIRTUAL_LINK = "action_network:virtual_link"
+        TIMEZONE = "action_network:timezone"
+        SPONSOR = "action_network:sponsor"
+        SPONSOR_TITLE = "title"
+
+        class Location:
+            VENUE = "venue"
+            ADDRESS_LINES = "address_lines"
+            LOCALITY = "locality"
+            REGION = "region"
+            POSTAL_CODE = "postal_code"
+            COUNTRY = "country"
+
+
+class NotSentError(Exception):
+    """The create never reached Action Network: it could not connect."""
+
+
+# MARK: HTTP Session
+
+CONNECT_RETRY_ATTEMPTS = 2
+RETRY_BACKOFF_FACTOR = 0.5
+
+
+def _buildSession() -> requests.Session:
+    # Connection errors only: no method is allowed a read or status retry
+    retry = urllib3.util.retry.Retry(
+        total=CONNECT_RETRY_ATTEMPTS,
+        connect=CONNECT_RETRY_ATTEMPTS,
+        read=0,
+        status=0,
+        other=0,
+        allowed_methods=frozenset(),
+        backoff_factor=RETRY_BACKOFF_FACTOR,
+        raise_on_status=False,
+    )
+    adapter = requests.adapters.HTTPAdapter(max_retries=retry)
+    httpSession = requests.Session()
+    httpSession.mount("https://", adapter)
+    httpSession.mount("http://", adapter)
+    return httpSession
+
+
+_session = None
+_sessionLock = threading.Lock()
+
+
+def session() -> requests.Session:
+    global _session
+    if _session is None:
+        with _sessionLock:
+            if _session is None:
+                _session = _buildSession()
+    return _session
+
+
+def _wasNotSent(error: requests.RequestException) -> bool:
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    # A refused connection or failed lookup, after the connect retries
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(error, requests.ConnectionError) and isinstance(reason, urllib3.exceptions.NewConnectionError)
+
+
+# MARK: Event Body
+
+# Action Network renders description/instructions as HTML
+def _toHtml(text: str) -> str:
+    return "<br>".join(html.escape(line) for line in text.splitlines())
+
+
+def eventBody(eventInfo: EventInfo) -> dict:
+    body = {
+        Constants.Keys.TITLE: eventInfo.title,
+        Constants.Keys.START: eventInfo.startTime.localized().isoformat(),
+        Constants.Keys.DESCRIPTION: _toHtml(eventInfo.description),
+        Constants.Keys.INSTRUCTIONS: _toHtml(eventInfo.insturctions),
+        Constants.Keys.ORIGIN_SYSTEM: Constants.ORIGIN_SYSTEM,
+        Constants.Keys.SPONSOR: {Constants.Keys.SPONSOR_TITLE: EditEventScreen.Constants.SPONSOR},
+    }
+    if eventInfo.endTime is not None:
+        body[Constants.Keys.END] = eventInfo.endTime.localized().isoformat()
+    # Same rule as EditEventScreen: only in person and hybrid events have a place
+    if eventInfo.anEventType == ANTypes.HYBRID or eventInfo.anEventType == ANTypes.IN_PERSON:
+        body[Constants.Keys.LOCATION] = {
+            Constants.Keys.Location.VENUE: eventInfo.locationName,
+            Constants.Keys.Location.ADDRESS_LINES: [eventInfo.address],
+            Constants.Keys.Location.LOCALITY: eventInfo.city,
+            Constants.Keys.Location.REGION: eventInfo.state,
+            Constants.Keys.Location.POSTAL_CODE: eventInfo.zip,
+            Constants.Keys.Location.COUNTRY: eventInfo.country,
+        }
+    # And only virtual and hybrid events have a time zone and a link
+    isVirtual = eventInfo.anEventType == ANTypes.HYBRID or eventInfo.anEventType == ANTypes.VIRTUAL
+    body[Constants.Keys.VIRTUAL] = isVirtual
+    if isVirtual:
+        body[Constants.Keys.TIMEZONE] = eventInfo.startTime.zoneName
+        if eventInfo.zoomLink is not None:
+            body[Constants.Keys.VIRTUAL_LINK] = eventInfo.zoomLink
+    return body
+
+
+# MARK: Client
+
+class ActionNetworkAPI:
+    def __init__(self, config: ANAutomatorConfig) -> None:
+        if not config.apiKey:
+            logger.error("ActionNetworkAPI: No API key configured")
+            raise Exception("ActionNetworkAPI: No API key configured")
+        self._apiKey = config.apiKey
+        self._baseUrl = config.apiBaseUrl.rstrip("/")
+
+    def createEvent(self, eventInfo: EventInfo) -> EventConfirmationInfo:
+        logger.info("ActionNetworkAPI: Creating event %s starting at %s", eventInfo.title, str(eventInfo.startTime))
+        try:
+            req = session().post(
+                self._baseUrl + Constants.EVENTS_PATH,
+                headers={Constants.API_KEY_HEADER: self._apiKey},
+                json=eventBody(eventInfo),
+                timeout=Constants.TIMEOUT_SEC,
+            )
+        except requests.RequestException as e:
+            if _wasNotSent(e):
+                logger.error("ActionNetworkAPI: Couldn't connect to create the event: %s", str(e))
+                raise NotSentError(str(e)) from e
+            raise
+        req.raise_for_status()
+        browserUrl = req.json().get(Constants.Keys.BROWSER_URL)
+        if not browserUrl:
+            logger.error("ActionNetworkAPI: Created event has no browser_url")
+            raise Exception("ActionNetworkAPI: Created event has no browser_url")
+        browserUrl = browserUrl.rstrip("/")
+        confirmInfo = EventConfirmationInfo(
+            manageLink=browserUrl + Constants.MANAGE_SUFFIX,
+            directLink=browserUrl,
+        )
+        logger.info("ActionNetworkAPI: Created event %s", str(confirmInfo))
+        return confirmInfo
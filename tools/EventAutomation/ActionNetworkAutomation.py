@@ -4,8 +4,12 @@ import selenium.webdriver.common
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions
+import atexit
+import contextlib
 import dataclasses
 import datetime
+import threading
+import time
 import typing
 import abc
 import logging
@@ -16,6 +20,7 @@ import selenium.webdriver.support
 import selenium.webdriver.support.select
 
 from ..timezones import DateTimeWithAcceptedTimeZone, TZ_TO_AN_TZ
+from .StageTimings import Stages, StageTimings, orNew
 
 logger = logging.getLogger(__name__)
 
@@ -61,10 +66,27 @@ class EventConfirmationInfo:
     directLink: str
 
 
+class ANBackends:
+    # The REST API when an API key is configured, otherwise the browser
+    AUTO = "auto"
+    API = "api"
+    SELENIUM = "selenium"
+
+
 @dataclasses.dataclass
 class ANAutomatorConfig:
     email: str
     password: str
+    apiKey: str | None = None
+    backend: str = ANBackends.AUTO
+    apiBaseUrl: str = "https://actionnetwork.org/api/v2"
+
+    def usesApi(self) -> bool:
+        if self.backend == ANBackends.SELENIUM:
+            return False
+        if self.backend == ANBackends.API:
+            return True
+        return bool(self.apiKey)
 
 
 class Utils:
@@ -708,6 +730,145 @@ class EventConfirmationScreen(Screen):
         return self._directLinkBox().get_attribute("value")
 
 
+# MARK: Session Pool
+
+# Starting Chrome, logging in and loading the dashboard is most of a publish, so
+# the Huey worker keeps logged-in sessions warm between publishes. A session is
+# handed out sitting on a dashboard, ready for the create-event step; one that
+# raised is quit rather than trusted again, and every session is recycled after
+# AN_SESSION_MAX_USES publishes or AN_SESSION_MAX_IDLE_SECONDS unused (kept
+# below the chrome container's SE_NODE_SESSION_TIMEOUT, after which the grid
+# would drop it anyway). A session that has sat a while reloads the dashboard
+# before it is handed out, which is also how an expired login is noticed - it
+# lands on LoginScreen and logs in again.
+DEFAULT_SESSION_POOL_SIZE = 1
+DEFAULT_SESSION_MAX_USES = 20
+DEFAULT_SESSION_MAX_IDLE_SECONDS = 30 * 60
+SESSION_RELOAD_AFTER_SECONDS = 5 * 60
+
+
+@dataclasses.dataclass
+class PooledSession:
+    driver: typing.Any
+    email: str
+    dashboard: Screen | None = None
+    uses: int = 0
+    lastUsed: float = dataclasses.field(default_factory=time.monotonic)
+
+
+class SessionPool:
+    """Warm browser sessions, at most ``size`` idle at once.
+
+    ``driverFactory()`` starts a browser; ``openDashboard(driver, config,
+    reload)`` returns the dashboard screen the driver is on, logging in or
+    (with ``reload``) loading the page first as needed, and raises if it can't.
+    """
+
+    def __init__(
+        self,
+        driverFactory: typing.Callable[[], typing.Any],
+        openDashboard: typing.Callable[[typing.Any, "ANAutomatorConfig", bool], Screen],
+        size: int = DEFAULT_SESSION_POOL_SIZE,
+        maxUses: int = DEFAULT_SESSION_MAX_USES,
+        maxIdleSec: float = DEFAULT_SESSION_MAX_IDLE_SECONDS,
+    ):
+        self._driverFactory = driverFactory
+        self._openDashboard = openDashboard
+        self.size = size
+        self.maxUses = maxUses
+        self.maxIdleSec = maxIdleSec
+        self._idle: list[PooledSession] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _quit(pooled: PooledSession) -> None:
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            logger.info("SessionPool: Problem quitting session %s", str(e))
+
+    def _takeIdle(self, email: str) -> PooledSession | None:
+        now = time.monotonic()
+        found = None
+        with self._lock:
+            keep = []
+            for pooled in self._idle:
+                if now - pooled.lastUsed > self.maxIdleSec:
+                    logger.info("SessionPool: Session idle too long, recycling")
+                    self._quit(pooled)
+                elif found is None and pooled.email == email:
+                    found = pooled
+                else:
+                    keep.append(pooled)
+            self._idle = keep
+        return found
+
+    def _checkout(self, config: "ANAutomatorConfig") -> PooledSession:
+        pooled = self._takeIdle(config.email)
+        if pooled is not None:
+            reload = time.monotonic() - pooled.lastUsed > SESSION_RELOAD_AFTER_SECONDS
+            # Health check: still on a dashboard (or can get back to one)?
+            if not reload and pooled.dashboard is not None and pooled.dashboard.exists():
+                logger.info("SessionPool: Reusing warm session")
+                return pooled
+            try:
+                pooled.dashboard = self._openDashboard(pooled.driver, config, True)
+                logger.info("SessionPool: Reusing session after reloading dashboard")
+                return pooled
+            except Exception as e:
+                logger.info("SessionPool: Warm session failed its health check, starting a new one %s", str(e))
+                self._quit(pooled)
+        logger.info("SessionPool: Starting new session")
+        pooled = PooledSession(driver=self._driverFactory(), email=config.email)
+        try:
+            pooled.dashboard = self._openDashboard(pooled.driver, config, True)
+        except Exception:
+            self._quit(pooled)
+            raise
+        return pooled
+
+    def _checkin(self, pooled: PooledSession, config: "ANAutomatorConfig") -> None:
+        pooled.uses += 1
+        if pooled.uses >= self.maxUses:
+            logger.info("SessionPool: Session used %d times, recycling", pooled.uses)
+            self._quit(pooled)
+            return
+        # Head back to the dashboard now so the next publish starts from it
+        try:
+            pooled.dashboard = self._openDashboard(pooled.driver, config, True)
+        except Exception as e:
+            logger.info("SessionPool: Couldn't return session to the dashboard, recycling %s", str(e))
+            self._quit(pooled)
+            return
+        pooled.lastUsed = time.monotonic()
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(pooled)
+                return
+        self._quit(pooled)
+
+    @contextlib.contextmanager
+    def session(self, config: "ANAutomatorConfig", timings: StageTimings | None = None):
+        """A logged-in (driver, dashboard screen) for one publish. Handing it
+        back (the dashboard reload) is timed as its own stage, since it runs
+        after the caller's last one."""
+        pooled = self._checkout(config)
+        try:
+            yield pooled.driver, pooled.dashboard
+        except BaseException:
+            # Could be anywhere in the flow, or a dead browser: don't reuse it
+            self._quit(pooled)
+            raise
+        with orNew(timings).span(Stages.AN_CHECKIN):
+            self._checkin(pooled, config)
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for pooled in idle:
+            self._quit(pooled)
+
+
 class ANAutomator:
     @staticmethod
     def getDriver():
@@ -728,87 +889,107 @@ class ANAutomator:
             driver.implicitly_wait(2)
             return driver
 
+    # Bring the driver to a dashboard it can create actions from, logging in first
+    # if the session has none (or it expired)
+    @staticmethod
+    def openDashboard(driver, config: ANAutomatorConfig, reload: bool = True) -> Screen:
+        if reload:
+            # Go here cause will redirect
+            driver.get(ManageDashboardScreen.Constants.AUSTIN_DSA_DASHBOARD)
+
+        logger.info("ANAutomator: Checking if we need to login")
+        loginScreen = LoginScreen.tryToCreate(driver)
+        if loginScreen is not None:
+            logger.info("ANAutomator: LoginScreen detected, logging in")
+            loginScreen.login(email=config.email, password=config.password)
+            # Logging in may bring the user to not the dashboard if they have multiple groups
+            # Instead of creating a new screen for that instead we can leverage we have the auth token
+            # So just regetting the url should be enough
+            driver.get(ManageDashboardScreen.Constants.AUSTIN_DSA_DASHBOARD)
+
+        # See if we are already on the managing dash board
+        # This will happen if the account used is a admin
+        # If it fails try to navigate to participating dashboard
+        dashboardScreen = ManageDashboardScreen.tryToCreate(driver)
+        if dashboardScreen is None:
+            # Try the participating dash board
+            logger.info("ANAutomator: Couldn't find manage dashboard looking for participant dashboard")
+            driver.get(ParticipateDashBoardScreen.Constants.AUSTIN_DSA_DASHBOARD)
+            dashboardScreen = ParticipateDashBoardScreen.tryToCreate(driver)
+            if dashboardScreen is None:
+                logger.error("ANAutomator: Can't find dashboard screen")
+                raise Exception("Not in Dashboard")
+        return dashboardScreen
+
     @classmethod
     def createEvent(
-        self, eventInfo: EventInfo, config: ANAutomatorConfig
+        self, eventInfo: EventInfo, config: ANAutomatorConfig, timings: StageTimings | None = None
     ) -> EventConfirmationInfo:
-        
+        timings = orNew(timings)
+        with contextlib.ExitStack() as stack:
+            with timings.span(Stages.AN_LOGIN):
+                logger.info("ANAutomator: Getting a logged in session")
+                driver, dashboardScreen = stack.enter_context(sessionPool().session(config, timings))
+
+            with timings.span(Stages.AN_FILL):
+                logger.info("ANAutomator: Selecting Create Event Item")
+                dashboardScreen.selectFromCreateActionMenu(
+                    ManageDashboardScreen.ActionsInCreateActionMenu.EVENT
+                )
 
-        logger.info("ANAutomator: Starting Driver")
-        # options = selenium.webdriver.ChromeOptions()
-        # options.add_argument("--headless")
-        # options.add_argument("--no-sandbox")
-        # options.add_argument("--disable-dev-shm-usage")
-        # options.add_argument("--disable-gpu")
-        # driver = selenium.webdriver.Chrome(options)
-        # driver.implicitly_wait(2)
-        
-        driver = ANAutomator.getDriver()
-        # Go here cause will redirect
-        driver.get(ManageDashboardScreen.Constants.AUSTIN_DSA_DASHBOARD)
-        try:
+                editEventScreen = EditEventScreen.tryToCreate(driver)
+                if editEventScreen is None:
+                    logger.error("ANAutomator: Can't find edit event screen")
+                    raise Exception("Not in edit event screen")
+                logger.info("ANAutomator: Filling out event info")
+                editEventScreen.fillOutEventInfo(eventInfo)
+
+                logger.info("ANAutomator: Moving to action thank you screen")
+                editEventScreen.goToNextStep()
+
+                editEventThankYouScreen = EditEventThankYouScreen.tryToCreate(driver)
+                if editEventThankYouScreen is None:
+                    logger.error("ANAutomator: Can't find edit event thank you screen")
+                    raise Exception("Not in edit event thank you screen")
+                logger.info("ANAutomator: Filling out edit event thank you screen")
+                editEventThankYouScreen.addInstructions(eventInfo.insturctions)
+
+            with timings.span(Stages.AN_PUBLISH):
+                logger.info("ANAutomator: Publishing Event")
+                editEventThankYouScreen.publishEvent()
+
+                eventConfirmationScreen = EventConfirmationScreen.tryToCreate(driver)
+                if eventConfirmationScreen is None:
+                    logger.error("ANAutomator: Can't find event confirmation screen")
+                    raise Exception("Not in event confrimation screen")
+                logger.info("ANAutomator: Getting Event info")
+                eventConfirmInfo = EventConfirmationInfo(
+                    eventConfirmationScreen.getManagerLink(),
+                    eventConfirmationScreen.getDirectLink(),
+                )
 
-            logger.info("ANAutomator: Checking if we need to login")
-            loginScreen = LoginScreen.tryToCreate(driver)
-            if loginScreen is not None:
-                logger.info("ANAutomator: LoginScreen detected, logging in")
-                loginScreen.login(email=config.email, password=config.password)
-                # Logging in may bring the user to not the dashboard if they have multiple groups
-                # Instead of creating a new screen for that instead we can leverage we have the auth token
-                # So just regetting the url should be enough
-                driver.get(ManageDashboardScreen.Constants.AUSTIN_DSA_DASHBOARD)
-
-            # See if we are already on the managing dash board
-            # This will happen if the account used is a admin
-            # If it fails try to navigate to participating dashboard
-            dashboardScreen = ManageDashboardScreen.tryToCreate(driver)
-            if dashboardScreen is None:
-                # Try the participating dash board
-                logger.info("ANAutomator: Couldn't find manage dashboard looking for participant dashboard")
-                driver.get(ParticipateDashBoardScreen.Constants.AUSTIN_DSA_DASHBOARD)
-                dashboardScreen = ParticipateDashBoardScreen.tryToCreate(driver)
-                if dashboardScreen is None:
-                    logger.error("ANAutomator: Can't find dashboard screen")
-                    raise Exception("Not in Dashboard")
-
-            logger.info("ANAutomator: Selecting Create Event Item")
-            dashboardScreen.selectFromCreateActionMenu(
-                ManageDashboardScreen.ActionsInCreateActionMenu.EVENT
-            )
+        logger.info(
+            "ANAutomator: Done creating event, returning info %s", str(eventConfirmInfo)
+        )
+        return eventConfirmInfo
 
-            editEventScreen = EditEventScreen.tryToCreate(driver)
-            if editEventScreen is None:
-                logger.error("ANAutomator: Can't find edit event screen")
-                raise Exception("Not in edit event screen")
-            logger.info("ANAutomator: Filling out event info")
-            editEventScreen.fillOutEventInfo(eventInfo)
-
-            logger.info("ANAutomator: Moving to action thank you screen")
-            editEventScreen.goToNextStep()
-
-            editEventThankYouScreen = EditEventThankYouScreen.tryToCreate(driver)
-            if editEventThankYouScreen is None:
-                logger.error("ANAutomator: Can't find edit event thank you screen")
-                raise Exception("Not in edit event thank you screen")
-            logger.info("ANAutomator: Filling out edit event thank you screen")
-            editEventThankYouScreen.addInstructions(eventInfo.insturctions)
-
-            logger.info("ANAutomator: Publishing Event")
-            editEventThankYouScreen.publishEvent()
-
-            eventConfirmationScreen = EventConfirmationScreen.tryToCreate(driver)
-            if eventConfirmationScreen is None:
-                logger.error("ANAutomator: Can't find event confirmation screen")
-                raise Exception("Not in event confrimation screen")
-            logger.info("ANAutomator: Getting Event info")
-            eventConfirmInfo = EventConfirmationInfo(
-                eventConfirmationScreen.getManagerLink(),
-                eventConfirmationScreen.getDirectLink(),
-            )
 
-            logger.info(
-                "ANAutomator: Done creating event, returning info %s", str(eventConfirmInfo)
-            )
-            return eventConfirmInfo
-        finally:
-            driver.quit()
+_pool: SessionPool | None = None
+_poolLock = threading.Lock()
+
+
+def sessionPool() -> SessionPool:
+    """This process's pool (in practice, the Huey worker's)."""
+    global _pool
+    if _pool is None:
+        with _poolLock:
+            if _pool is None:
+                _pool = SessionPool(
+                    driverFactory=ANAutomator.getDriver,
+                    openDashboard=ANAutomator.openDashboard,
+                    size=getattr(settings, "AN_SESSION_POOL_SIZE", DEFAULT_SESSION_POOL_SIZE),
+                    maxUses=getattr(settings, "AN_SESSION_MAX_USES", DEFAULT_SESSION_MAX_USES),
+                    maxIdleSec=getattr(settings, "AN_SESSION_MAX_IDLE_SECONDS", DEFAULT_SESSION_MAX_IDLE_SECONDS),
+                )
+                atexit.register(_pool.close)
+    return _pool
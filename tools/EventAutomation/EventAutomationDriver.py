@@ -1,18 +1,26 @@
+import concurrent.futures
 import datetime
 import logging
 import pytz
+import time
 import typing
 import dataclasses
 import traceback
 
+from . import ActionNetworkAPI
 from . import ActionNetworkAutomation
 from . import GoogleCalendarAPI
 from . import ZoomAPI
+from .StageTimings import Stages, StageTimings, orNew
 
 from ..timezones import DateTimeWithAcceptedTimeZone
 
 logger = logging.getLogger(__name__)
 
+# The conflict check fans out to one thread per Zoom account plus one for Google
+# Calendar, so it takes about one round-trip rather than one per account.
+CONFLICT_CHECK_WORKERS = 8
+
 
 @dataclasses.dataclass
 class Conflict:
@@ -81,10 +89,66 @@ class Config:
     # This should be used to force a publish after showing the user the potential conflicts
     ignoreResolveableConflicts: bool = False
     onlyCheckConflicts: bool = False
+    # How long the whole conflict check may take before the publish gives up
+    conflictCheckTimeoutSec: float = 60.0
+
+
+# Through the REST API when configured for it, otherwise by driving the editor
+def _createANEvent(
+    eventInfo: ActionNetworkAutomation.EventInfo,
+    anConfig: ActionNetworkAutomation.ANAutomatorConfig,
+    timings: StageTimings | None = None,
+) -> ActionNetworkAutomation.EventConfirmationInfo:
+    timings = orNew(timings)
+    if anConfig.usesApi():
+        logger.info("EventPublisher: Creating Action Network event through the API")
+        try:
+            with timings.span(Stages.AN_PUBLISH):
+                return ActionNetworkAPI.ActionNetworkAPI(anConfig).createEvent(eventInfo)
+        except ActionNetworkAPI.NotSentError:
+            # Nothing reached Action Network, so the browser can't publish it twice.
+            # Any other API failure is raised: the event may already exist.
+            if anConfig.backend != ActionNetworkAutomation.ANBackends.AUTO:
+                raise
+            logger.warning("EventPublisher: Action Network API unreachable, falling back to the browser")
+    logger.info("EventPublisher: Creating Action Network event through the browser")
+    return ActionNetworkAutomation.ANAutomator.createEvent(eventInfo=eventInfo, config=anConfig, timings=timings)
+
+
+def _gCalConflicts(gCalConfig: GoogleCalendarAPI.GoogleCalendarConfig, eventInfo: EventInfo, timings: StageTimings):
+    with timings.span(Stages.GCAL_CONFLICTS):
+        gCalAPI = GoogleCalendarAPI.GoogleCalendarAPI(gCalConfig)
+        conflicts = gCalAPI.findConflicts(
+            eventInfo.start, eventInfo.end.utc() - eventInfo.start.utc()
+        )
+    return gCalAPI, conflicts
+
+
+# The lookups fan out to their own executor, never the one running this
+def _zoomAvailability(
+    zoomApi: ZoomAPI.ZoomAPI,
+    eventInfo: EventInfo,
+    lookups: concurrent.futures.Executor,
+    deadline: float,
+    timings: StageTimings,
+):
+    with timings.span(Stages.ZOOM_TOKEN):
+        zoomApi.ensureAccessToken()
+    with timings.span(Stages.ZOOM_ACCOUNTS):
+        zoomApi.loadAccounts()
+    with timings.span(Stages.ZOOM_CONFLICTS):
+        return zoomApi.getAccountsAndAvailablilityForTime(
+            eventInfo.start,
+            eventInfo.end.utc() - eventInfo.start.utc(),
+            executor=lookups,
+            timeoutSec=max(0, deadline - time.monotonic()),
+        )
 
 
 # Shouldn't throw an exception
-def publishEvent(eventInfo: EventInfo, config: Config) -> Result:
+# Each stage's time goes into timings (see StageTimings) when given
+def publishEvent(eventInfo: EventInfo, config: Config, timings: StageTimings | None = None) -> Result:
+    timings = orNew(timings)
     result = Result(type=-1)
     cleanUpOnError = []
     try:
@@ -95,15 +159,36 @@ def publishEvent(eventInfo: EventInfo, config: Config) -> Result:
                 "EventPublisher: eventInfo.end must be after eventInfo.start"
             )
 
+        # Check for conflicts on Zoom and Google at the same time: the Google
+        # lookup and the Zoom token, account listing and meeting lookups each
+        # start on their own worker, the meeting lookups fanned out to a pool of
+        # their own. Every request has its own timeout (ZoomAPI.REQUEST_TIMEOUT,
+        # GoogleCalendarAPI.Constants.HTTP_TIMEOUT_SEC); conflictCheckTimeoutSec
+        # bounds the whole check.
         zoomConflicts = []
-        if eventInfo.zoomRequired:
-            # Check for conflicts on Zoom
-            zoomApi = ZoomAPI.ZoomAPI(config.zoomConfig)
-            availablility = zoomApi.getAccountsAndAvailablilityForTime(
-                eventInfo.start, eventInfo.end.utc() - eventInfo.start.utc()
+        phases = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="conflict-phase")
+        lookups = concurrent.futures.ThreadPoolExecutor(
+            max_workers=CONFLICT_CHECK_WORKERS, thread_name_prefix="conflict-check"
+        )
+        try:
+            deadline = time.monotonic() + config.conflictCheckTimeoutSec
+            gCalFuture = phases.submit(_gCalConflicts, config.gCalConfig, eventInfo, timings)
+            if eventInfo.zoomRequired:
+                zoomApi = ZoomAPI.ZoomAPI(config.zoomConfig)
+                zoomFuture = phases.submit(_zoomAvailability, zoomApi, eventInfo, lookups, deadline, timings)
+                availablility = zoomFuture.result(timeout=max(0, deadline - time.monotonic()))
+            gCalAPI, gCalEvents = gCalFuture.result(timeout=max(0, deadline - time.monotonic()))
+        except concurrent.futures.TimeoutError:
+            raise Exception(
+                f"EventPublisher: Conflict check took longer than {config.conflictCheckTimeoutSec}s"
             )
+        finally:
+            # Don't wait on a lookup that timed out; it finishes on its own
+            phases.shutdown(wait=False, cancel_futures=True)
+            lookups.shutdown(wait=False, cancel_futures=True)
+
+        if eventInfo.zoomRequired:
             zoomAccount = None
-            
             for (account, conflicts) in availablility:
                 if len(conflicts) == 0:
                     logger.info(
@@ -124,11 +209,6 @@ def publishEvent(eventInfo: EventInfo, config: Config) -> Result:
                     ]
                 )
 
-        # Check for conflicts on Google
-        gCalAPI = GoogleCalendarAPI.GoogleCalendarAPI(config.gCalConfig)
-        conflicts = gCalAPI.findConflicts(
-            eventInfo.start, eventInfo.end.utc() - eventInfo.start.utc()
-        )
         gCalConflicts = [
             Conflict(
                 type=Conflict.ConflictType.GCAL,
@@ -137,7 +217,7 @@ def publishEvent(eventInfo: EventInfo, config: Config) -> Result:
                 end=c.end,
                 zoomUser=None,
             )
-            for c in conflicts
+            for c in gCalEvents
         ]
 
         # A Zoom conflict is unresolveable
@@ -162,12 +242,13 @@ def publishEvent(eventInfo: EventInfo, config: Config) -> Result:
 
         # Schedule Zoom Meeting
         if eventInfo.zoomRequired:
-            zoomLink, meetingId = zoomApi.createMeeting(
-                title=eventInfo.title,
-                start=eventInfo.start,
-                duration=eventInfo.end.utc() - eventInfo.start.utc(),
-                user=zoomAccount,
-            )
+            with timings.span(Stages.ZOOM_CREATE):
+                zoomLink, meetingId = zoomApi.createMeeting(
+                    title=eventInfo.title,
+                    start=eventInfo.start,
+                    duration=eventInfo.end.utc() - eventInfo.start.utc(),
+                    user=zoomAccount,
+                )
             result.zoomLink = zoomLink
             result.zoomAccount = zoomAccount.email
             def zoomCleanup(zoomApi, id):
@@ -177,7 +258,7 @@ def publishEvent(eventInfo: EventInfo, config: Config) -> Result:
                 return f
             cleanUpOnError.append(zoomCleanup(zoomApi=zoomApi, id=meetingId))
         # Schedule Action Network
-        anEventConfirmInfo = ActionNetworkAutomation.ANAutomator.createEvent(
+        anEventConfirmInfo = _createANEvent(
             eventInfo=ActionNetworkAutomation.EventInfo(
                 title=eventInfo.title,
                 startTime=eventInfo.start,
@@ -193,20 +274,22 @@ def publishEvent(eventInfo: EventInfo, config: Config) -> Result:
                 zoomLink= result.zoomLink if eventInfo.zoomRequired else None,
                 anEventType=eventInfo.eventType
             ),
-            config=config.anConfig,
+            anConfig=config.anConfig,
+            timings=timings,
         )
         result.anManageLink = anEventConfirmInfo.manageLink
         result.anShareLink = anEventConfirmInfo.directLink
         # Schedule Google Calendar
-        gCalLink = gCalAPI.createEvent(
-            GoogleCalendarAPI.Event(
-                title=eventInfo.title,
-                start=eventInfo.start,
-                end=eventInfo.end,
-                description=f'RSVP: <a href="{anEventConfirmInfo.directLink}">{anEventConfirmInfo.directLink}</a> \n\n {eventInfo.description}',
-                location=f"{eventInfo.streetAddress}, {eventInfo.city}, {eventInfo.state} {eventInfo.zip}",
+        with timings.span(Stages.GCAL_CREATE):
+            gCalLink = gCalAPI.createEvent(
+                GoogleCalendarAPI.Event(
+                    title=eventInfo.title,
+                    start=eventInfo.start,
+                    end=eventInfo.end,
+                    description=f'RSVP: <a href="{anEventConfirmInfo.directLink}">{anEventConfirmInfo.directLink}</a> \n\n {eventInfo.description}',
+                    location=f"{eventInfo.streetAddress}, {eventInfo.city}, {eventInfo.state} {eventInfo.zip}",
+                )
             )
-        )
         result.gCalLink = gCalLink
         result.type = Result.ResultType.PUBLISHED
         return result
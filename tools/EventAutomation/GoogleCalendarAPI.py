@@ -3,9 +3,13 @@ import google.auth
 import google.auth.transport
 import google.auth.transport.requests
 import google.oauth2.service_account
+import google_auth_httplib2
 import googleapiclient.discovery
+import googleapiclient.discovery_cache
+import httplib2
 import logging
 import dataclasses
+import threading
 import typing
 import pytz
 import os
@@ -19,6 +23,13 @@ class Constants:
     SCOPES = ["https://www.googleapis.com/auth/calendar"]
     CALENDAR_SEVRVICE = "calendar"
     CALENDAR_SERVICE_VERSION = "v3"
+    HTTP_TIMEOUT_SEC = 30
+    # Idle keep-alive Https kept between requests. More can be out at once (the
+    # conflict check and a publish overlapping); extras are dropped on check-in.
+    HTTP_POOL_SIZE = 4
+    # Refresh the delegated token this long before it expires, so it never
+    # lapses partway through a publish
+    CREDENTIAL_REFRESH_MARGIN = datetime.timedelta(minutes=5)
 
     class EventKeys:
         DESCRIPTION = "description"
@@ -96,6 +107,93 @@ class GoogleCalendarConfig:
     delegateAccount: str
 
 
+# MARK: Client Factory
+
+
+# Everything a GoogleCalendarAPI needs that is worth keeping between publishes:
+# the delegated credentials (refreshed only near expiry, under a lock so
+# concurrent publishes refresh once) and the Calendar service, built once from
+# the discovery document bundled with googleapiclient rather than re-parsed per
+# call. httplib2 connections are not thread-safe, so each request checks a
+# keep-alive Http out of a pool for its duration. The pool belongs to the client,
+# not to a thread: each publish runs its calls on fresh executor threads, and a
+# per-thread Http would die - connection and all - with them.
+class _AuthRequest(google.auth.transport.requests.Request):
+    # google-auth waits up to 120s on a token request unless told otherwise;
+    # give it the same per-request limit as the Calendar calls
+    def __call__(self, *args, timeout=Constants.HTTP_TIMEOUT_SEC, **kwargs):
+        return super().__call__(*args, timeout=timeout, **kwargs)
+
+
+class CalendarClient:
+    def __init__(self, config: GoogleCalendarConfig):
+        self.credentials = google.oauth2.service_account.Credentials.from_service_account_file(
+            config.serviceKeyPath, scopes=Constants.SCOPES
+        ).with_subject(config.delegateAccount)
+        self.service = googleapiclient.discovery.build_from_document(
+            googleapiclient.discovery_cache.get_static_doc(
+                Constants.CALENDAR_SEVRVICE, Constants.CALENDAR_SERVICE_VERSION
+            ),
+            credentials=self.credentials,
+        )
+        self._refreshLock = threading.Lock()
+        self._authRequest = _AuthRequest()
+        self._httpLock = threading.Lock()
+        self._idleHttps: list[google_auth_httplib2.AuthorizedHttp] = []
+
+    def _needsRefresh(self) -> bool:
+        # google-auth keeps expiry as naive UTC
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        expiry = self.credentials.expiry
+        return not self.credentials.token or expiry is None or now >= expiry - Constants.CREDENTIAL_REFRESH_MARGIN
+
+    def _ensureFreshCredentials(self) -> None:
+        with self._refreshLock:
+            if self._needsRefresh():
+                logger.info("GoogleCalendarAPI: Refreshing delegated credentials")
+                self.credentials.refresh(self._authRequest)
+
+    def _checkoutHttp(self) -> google_auth_httplib2.AuthorizedHttp:
+        self._ensureFreshCredentials()
+        with self._httpLock:
+            if self._idleHttps:
+                # Most recently used first: its connection is the likeliest to still be open
+                return self._idleHttps.pop()
+        return google_auth_httplib2.AuthorizedHttp(
+            self.credentials, http=httplib2.Http(timeout=Constants.HTTP_TIMEOUT_SEC)
+        )
+
+    def _checkinHttp(self, http: google_auth_httplib2.AuthorizedHttp) -> None:
+        with self._httpLock:
+            if len(self._idleHttps) < Constants.HTTP_POOL_SIZE:
+                self._idleHttps.append(http)
+
+    # Run a googleapiclient request on a pooled, authorized Http
+    def execute(self, request) -> dict:
+        http = self._checkoutHttp()
+        # A failed request may leave its connection mid-response, so only a
+        # successful one goes back in the pool
+        response = request.execute(http=http)
+        self._checkinHttp(http)
+        return response
+
+
+_clients: dict[tuple, CalendarClient] = {}
+_clientsLock = threading.Lock()
+
+
+def getClient(config: GoogleCalendarConfig) -> CalendarClient:
+    """This process's client for ``config``. A replaced key file (new mtime)
+    gets a new client."""
+    key = (config.serviceKeyPath, os.path.getmtime(config.serviceKeyPath), config.delegateAccount)
+    with _clientsLock:
+        client = _clients.get(key)
+        if client is None:
+            logger.info("GoogleCalendarAPI: Logging in with provided credential file %s", config.serviceKeyPath)
+            client = _clients[key] = CalendarClient(config)
+    return client
+
+
 # https://github.com/googleapis/google-api-python-client/blob/main/docs/start.md
 # https://googleapis.github.io/google-api-python-client/docs/dyn/calendar_v3.html
 # Delegation Auth- https://developers.google.com/identity/protocols/oauth2/service-account#delegatingauthority
@@ -107,7 +205,6 @@ class GoogleCalendarConfig:
 # 5. Choose an account it can delegate that has access to calendar
 class GoogleCalendarAPI:
     def __init__(self, config: GoogleCalendarConfig):
-        logger.info("GoogleCalendarAPI: Logging in with provided credential file %s", config.serviceKeyPath)
         if not os.path.exists(config.serviceKeyPath):
             logger.error(
                 "GoogleCalendarAPI: Service Key path does not exist %s",
@@ -117,19 +214,7 @@ class GoogleCalendarAPI:
                 f"GoogleCalendarAPI: Service Key path does not exist {config.serviceKeyPath}"
             )
         self.config = config
-        self.serviceAccountCreds = (
-            google.oauth2.service_account.Credentials.from_service_account_file(
-                self.config.serviceKeyPath, scopes=Constants.SCOPES
-            )
-        )
-        self.delegatedCreds = self.serviceAccountCreds.with_subject(
-            self.config.delegateAccount
-        )
-        self.delegatedCreds.refresh(google.auth.transport.requests.Request())
-        # Unclear from docs if we need to refresh these
-        # if not self.delegatedCreds or not self.delegatedCreds.valid:
-        #     logger.error("GoogleCalendarAPI: Could not create credentials")
-        #     raise Exception("GoogleCalendarAPI: Could not create credentials")
+        self._client = getClient(config)
 
     # https://googleapis.github.io/google-api-python-client/docs/dyn/calendar_v3.events.html#list
     def findConflicts(
@@ -146,37 +231,32 @@ class GoogleCalendarAPI:
             str(start),
             str(end),
         )
-        with googleapiclient.discovery.build(
-            Constants.CALENDAR_SEVRVICE,
-            Constants.CALENDAR_SERVICE_VERSION,
-            credentials=self.delegatedCreds,
-        ) as service:
-            result = []
-            pageToken = None
-            while True:
-                # It isn't clear from the docs how the timezones work here
-                # It says the timeMin and timeMax need timezone offsets in their strings
-                # It thens says the timezone argument is used for the response
-                # I'm reading this as the timezones don't matter for what we send in as long as it is defined
-                # Then it will return localized times
-                # So I'm going to send in UTC since isoformat for localized times is janky, but request the return time to be whatever timezone was passed in
-                response = (
-                    service.events()
-                    .list(
-                        calendarId=self.config.calendarId,
-                        timeMin=start.utc().isoformat(),
-                        timeMax=end.utc().isoformat(),
-                        timeZone=start.zoneName,
-                        pageToken=pageToken,
-                    )
-                    .execute()
+        service = self._client.service
+        result = []
+        pageToken = None
+        while True:
+            # It isn't clear from the docs how the timezones work here
+            # It says the timeMin and timeMax need timezone offsets in their strings
+            # It thens says the timezone argument is used for the response
+            # I'm reading this as the timezones don't matter for what we send in as long as it is defined
+            # Then it will return localized times
+            # So I'm going to send in UTC since isoformat for localized times is janky, but request the return time to be whatever timezone was passed in
+            response = self._client.execute(
+                service.events()
+                .list(
+                    calendarId=self.config.calendarId,
+                    timeMin=start.utc().isoformat(),
+                    timeMax=end.utc().isoformat(),
+                    timeZone=start.zoneName,
+                    pageToken=pageToken,
                 )
-                for event in response["items"]:
-                    result.append(Event.fromApiDict(event))
-                pageToken = response.get("nextPageToken")
-                if not pageToken:
-                    break
-            return result
+            )
+            for event in response["items"]:
+                result.append(Event.fromApiDict(event))
+            pageToken = response.get("nextPageToken")
+            if not pageToken:
+                break
+        return result
 
     # https://googleapis.github.io/google-api-python-client/docs/dyn/calendar_v3.events.html#insert
     def createEvent(self, event: Event) -> str:
@@ -185,18 +265,12 @@ class GoogleCalendarAPI:
             event.title,
             str(event.start),
         )
-        with googleapiclient.discovery.build(
-            Constants.CALENDAR_SEVRVICE,
-            Constants.CALENDAR_SERVICE_VERSION,
-            credentials=self.delegatedCreds,
-        ) as service:
-            body = event.toApiDict()
-            response = (
-                service.events()
-                .insert(calendarId=self.config.calendarId, body=body)
-                .execute()
-            )
-            return Event.fromApiDict(response).link
+        body = event.toApiDict()
+        response = self._client.execute(
+            self._client.service.events()
+            .insert(calendarId=self.config.calendarId, body=body)
+        )
+        return Event.fromApiDict(response).link
 
     # def getCalendars(self):
     #     with googleapiclient.discovery.build(Constants.CALENDAR_SEVRVICE, Constants.CALENDAR_SERVICE_VERSION, credentials=self.delegatedCreds) as service:
@@ -0,0 +1,115 @@
+"""Per-stage timings for one publish, stored on its PublishJob.
+
+A ``StageTimings`` is handed down the publish (tasks.publishEventJob ->
+EventAutomationDriver.publishEvent -> ANAutomator.createEvent) and each stage
+runs inside ``timings.span(name)``, or between ``start``/``stop``. Spans may
+come from several threads at once - the Google Calendar check runs beside the
+Zoom one - so recording takes a lock.
+
+Each span is ``{"stage", "startMs", "durationMs", "ok"}``, ``startMs`` counted
+from when the recorder was made. A stage that raised is kept with
+``"ok": false`` so a slow failure still shows where the time went.
+"""
+
+import contextlib
+import threading
+import time
+
+from ..utils import percentile
+
+
+class Stages:
+    ZOOM_TOKEN = "zoom_token"
+    ZOOM_ACCOUNTS = "zoom_accounts"
+    ZOOM_CONFLICTS = "zoom_conflicts"
+    GCAL_CONFLICTS = "gcal_conflicts"
+    ZOOM_CREATE = "zoom_create"
+    AN_LOGIN = "an_login"
+    AN_FILL = "an_fill"
+    AN_PUBLISH = "an_publish"
+    AN_CHECKIN = "an_checkin"
+    GCAL_CREATE = "gcal_create"
+    PERSIST = "persist"
+    EMAIL = "email"
+
+    # Pipeline order, for display
+    ORDER = (
+        ZOOM_TOKEN, ZOOM_ACCOUNTS, ZOOM_CONFLICTS, GCAL_CONFLICTS, ZOOM_CREATE,
+        AN_LOGIN, AN_FILL, AN_PUBLISH, AN_CHECKIN, GCAL_CREATE, PERSIST, EMAIL,
+    )
+
+
+class StageTimings:
+    def __init__(self):
+        self._origin = time.monotonic()
+        self._spans: list[dict] = []
+        self._open: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, stage: str):
+        start = time.monotonic()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self._record(stage, start, time.monotonic(), ok)
+
+    # start/stop time a stage where a ``with`` would mean re-indenting the code
+    # being timed. A stage never stopped - its code raised - is kept as not ok,
+    # ending when the spans are read.
+    def start(self, stage: str) -> None:
+        with self._lock:
+            self._open[stage] = time.monotonic()
+
+    def stop(self, stage: str) -> None:
+        with self._lock:
+            start = self._open.pop(stage)
+        self._record(stage, start, time.monotonic(), True)
+
+    def _record(self, stage: str, start: float, end: float, ok: bool) -> None:
+        with self._lock:
+            self._spans.append({
+                "stage": stage,
+                "startMs": round((start - self._origin) * 1000),
+                "durationMs": round((end - start) * 1000),
+                "ok": ok,
+            })
+
+    def asList(self) -> list[dict]:
+        with self._lock:
+            unfinished = list(self._open.items())
+            self._open.clear()
+        for stage, start in unfinished:
+            self._record(stage, start, time.monotonic(), False)
+        with self._lock:
+            return sorted(self._spans, key=lambda span: span["startMs"])
+
+
+# For callers that didn't ask for timings, so stages can time unconditionally
+def orNew(timings: StageTimings | None) -> StageTimings:
+    return timings if timings is not None else StageTimings()
+
+
+def summarize(jobTimings: list[list[dict]]) -> list[dict]:
+    """Per-stage count and p50/p90/p99/max duration (ms) over many jobs'
+    spans, in pipeline order. A stage timed twice in one job counts twice."""
+    durations: dict[str, list[int]] = {}
+    for spans in jobTimings:
+        for span in spans:
+            durations.setdefault(span["stage"], []).append(span["durationMs"])
+    ranked = sorted(durations, key=lambda stage: (
+        Stages.ORDER.index(stage) if stage in Stages.ORDER else len(Stages.ORDER), stage,
+    ))
+    return [
+        {
+            "stage": stage,
+            "count": len(durations[stage]),
+            "p50": percentile(durations[stage], 50),
+            "p90": percentile(durations[stage], 90),
+            "p99": percentile(durations[stage], 99),
+            "max": max(durations[stage]),
+        }
+        for stage in ranked
+    ]
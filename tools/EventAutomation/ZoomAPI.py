@@ -1,12 +1,23 @@
+import concurrent.futures
+import contextlib
+import fcntl
+import hashlib
+import os
+import tempfile
 import requests
 import typing
 import dataclasses
-import time
+import time as clock
 import datetime
 import logging
 import base64
 import pytz
+import requests.adapters
 import requests.auth
+import threading
+import urllib3.util.retry
+from django.conf import settings
+from django.core.cache import cache
 
 from ..timezones import DateTimeWithAcceptedTimeZone, TZ_TO_ZOOM_TZ
 
@@ -87,6 +98,123 @@ class Constants:
         CREATE_TOPIC = "topic"
 
 
+# MARK: HTTP Session
+
+# Every call goes through one keep-alive Session per process, so a paged
+# directory listing and a fan-out of meeting lookups reuse a few TLS
+# connections to api.zoom.us instead of opening one per request. The pool is
+# sized for the conflict check's fan-out (EventAutomationDriver.CONFLICT_CHECK_WORKERS).
+#
+# Throttling (429) and server errors are retried with backoff, honoring
+# Retry-After up to a cap - but only for GET and DELETE, which are safe to
+# repeat. A POST is never resent once it may have reached Zoom: a createMeeting
+# that timed out may still have created the meeting, so it surfaces as an
+# error instead of risking a duplicate. (Connection failures, where nothing
+# was sent, are retried for every method.)
+CONNECT_TIMEOUT_SEC = 5
+READ_TIMEOUT_SEC = 30
+REQUEST_TIMEOUT = (CONNECT_TIMEOUT_SEC, READ_TIMEOUT_SEC)
+POOL_SIZE = 10
+RETRY_ATTEMPTS = 3
+RETRY_BACKOFF_FACTOR = 0.5
+RETRY_AFTER_MAX_SEC = 30
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_METHODS = frozenset({"GET", "DELETE"})
+
+
+class _Retry(urllib3.util.retry.Retry):
+    # Zoom answers an exhausted daily quota with a Retry-After of hours; don't
+    # hold a publish job hostage to it
+    def get_retry_after(self, response):
+        retryAfter = super().get_retry_after(response)
+        return None if retryAfter is None else min(retryAfter, RETRY_AFTER_MAX_SEC)
+
+
+def _buildSession() -> requests.Session:
+    retry = _Retry(
+        total=RETRY_ATTEMPTS,
+        connect=RETRY_ATTEMPTS,
+        read=RETRY_ATTEMPTS,
+        status=RETRY_ATTEMPTS,
+        backoff_factor=RETRY_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=RETRY_METHODS,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = requests.adapters.HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+    httpSession = requests.Session()
+    httpSession.mount("https://", adapter)
+    httpSession.mount("http://", adapter)
+    return httpSession
+
+
+_session = None
+_sessionLock = threading.Lock()
+
+
+def session() -> requests.Session:
+    global _session
+    if _session is None:
+        with _sessionLock:
+            if _session is None:
+                _session = _buildSession()
+    return _session
+
+
+# MARK: Directory Cache
+
+# The account directory (active users and their meeting capacity) changes
+# rarely but costs a paged user list plus one settings call per user, so it is
+# shared through the Django cache - every gunicorn worker and the Huey consumer
+# see the same copy (CACHE_DIR) - and kept warm by the refreshZoomDirectory
+# periodic task. The TTL only bounds how stale it can get if that stops.
+DEFAULT_DIRECTORY_CACHE_SECONDS = 6 * 60 * 60
+
+
+def directoryCacheSeconds() -> int:
+    return int(getattr(settings, "ZOOM_DIRECTORY_CACHE_SECONDS", DEFAULT_DIRECTORY_CACHE_SECONDS))
+
+
+def _directoryCacheKey(accountId: str) -> str:
+    return f"zoom-directory:{accountId}"
+
+
+# MARK: Token Store
+
+# An account-credentials token is good for an hour and any number of clients,
+# so it is kept in the database (ZoomAccessToken) for every process to use
+# instead of every new ZoomAPI minting its own. Whoever finds it missing or near
+# expiry takes an exclusive flock on a per-app lock file and refreshes it;
+# anyone else needing it blocks on that lock, then finds the new token already
+# stored. The kernel drops the lock if its holder dies, and a holder is never
+# stuck for long since the token request itself has a timeout. The lock file
+# lives in CACHE_DIR when set - the one directory every process shares - and in
+# the temp directory otherwise (a single dev process).
+TOKEN_EXPIRY_MARGIN = datetime.timedelta(minutes=2)
+
+
+def _tokenKey(accountId: str, clientId: str) -> str:
+    return f"{accountId}:{clientId}"
+
+
+def _tokenLockPath(accountId: str, clientId: str) -> str:
+    lockDir = getattr(settings, "CACHE_DIR", "") or tempfile.gettempdir()
+    os.makedirs(lockDir, exist_ok=True)
+    digest = hashlib.sha256(_tokenKey(accountId, clientId).encode()).hexdigest()[:16]
+    return os.path.join(lockDir, f"zoom-token-{digest}.lock")
+
+
+@contextlib.contextmanager
+def _tokenRefreshLock(accountId: str, clientId: str):
+    with open(_tokenLockPath(accountId, clientId), "a") as lockFile:
+        fcntl.flock(lockFile, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lockFile, fcntl.LOCK_UN)
+
+
 # Mark: Data Classes
 
 
@@ -109,6 +237,17 @@ class AccessToken:
             seconds=expiresInSec
         )
 
+    # Valid if within its lifetime, counting being close to expiry as invalid to
+    # reduce the chance of it expiring during a critical section
+    def isValid(self) -> bool:
+        return datetime.datetime.now() < self.expireTime - TOKEN_EXPIRY_MARGIN
+
+    @classmethod
+    def fromStored(cls, stored) -> "AccessToken":
+        token = cls(stored.token, stored.tokenType, 0, stored.scope, stored.apiUrl)
+        token.expireTime = stored.expireTime.astimezone().replace(tzinfo=None)
+        return token
+
 
 @dataclasses.dataclass
 class ZoomUser:
@@ -167,8 +306,8 @@ class ZoomAPI:
             Constants.AccessToken.GRANT_TYPE_KEY: Constants.AccessToken.GRANT_TYPE,
             Constants.AccessToken.ACCOUNT_ID_KEY: self._accountId,
         }
-        req = requests.post(
-            url=Constants.AccessToken.OAUTH_ENDPOINT, data=body, auth=auth
+        req = session().post(
+            url=Constants.AccessToken.OAUTH_ENDPOINT, data=body, auth=auth, timeout=REQUEST_TIMEOUT
         )
         req.raise_for_status()
         responseDict = req.json()
@@ -186,19 +325,64 @@ class ZoomAPI:
             str(self._accessToken.expireTime),
         )
 
-    # If the token exists and is within its lifetime it is valid
-    # Count being close to the access time as invalid to reduce chance of expiring happening during a critical section
-    def _isAccessTokenValid(self) -> None:
-        return self._accessToken is not None and datetime.datetime.now() < (
-            self._accessToken.expireTime - datetime.timedelta(minutes=2)
+    def _isAccessTokenValid(self) -> bool:
+        return self._accessToken is not None and self._accessToken.isValid()
+
+    # Adopt the stored token if it is still good
+    def _useStoredAccessToken(self) -> bool:
+        # Imported here: tools.models imports this module through the driver
+        from ..models import ZoomAccessToken
+
+        stored = ZoomAccessToken.objects.filter(
+            key=_tokenKey(self._accountId, self._clientId)
+        ).first()
+        if stored is not None:
+            token = AccessToken.fromStored(stored)
+            if token.isValid():
+                self._accessToken = token
+                return True
+        return False
+
+    def _storeAccessToken(self) -> None:
+        from ..models import ZoomAccessToken
+
+        ZoomAccessToken.objects.update_or_create(
+            key=_tokenKey(self._accountId, self._clientId),
+            defaults={
+                "token": self._accessToken.token,
+                "tokenType": self._accessToken.tokenType,
+                "scope": self._accessToken.scope,
+                "apiUrl": self._accessToken.apiUrl,
+                # expireTime is naive local time; the column wants it aware
+                "expireTime": self._accessToken.expireTime.astimezone(datetime.timezone.utc),
+            },
         )
 
+    # Use the stored token, or refresh it - at most one refresh at a time across
+    # every process sharing the lock directory
+    def _ensureAccessToken(self) -> None:
+        if self._useStoredAccessToken():
+            logger.info("ZoomAPI: Using stored access token")
+            return
+        with _tokenRefreshLock(self._accountId, self._clientId):
+            # Whoever held the lock before us has likely just refreshed it
+            if self._useStoredAccessToken():
+                logger.info("ZoomAPI: Using access token refreshed by another client")
+                return
+            self._refreshAccessToken()
+            self._storeAccessToken()
+
+    # Get a usable token up front instead of on the first call that needs one
+    def ensureAccessToken(self) -> None:
+        if not self._isAccessTokenValid():
+            self._ensureAccessToken()
+
     @staticmethod
     def _accessTokenRequired(func):
         def inner(self, *args, **kwargs):
             if not self._isAccessTokenValid():
                 logger.info("ZoomAPI: Access token invalid")
-                self._refreshAccessToken()
+                self._ensureAccessToken()
             return func(self, *args, **kwargs)
 
         return inner
@@ -230,9 +414,10 @@ class ZoomAPI:
                     continue
 
                 logger.info("ZoomAPI: Found user %s, getting features", newUser.email)
-                req = requests.get(
+                req = session().get(
                     Constants.Users.Features.SETTINGS_ENDPOINT(newUser.id),
                     headers=self._headersForRequest(),
+                    timeout=REQUEST_TIMEOUT,
                 )
                 req.raise_for_status()
                 responseDict = req.json()
@@ -247,8 +432,10 @@ class ZoomAPI:
 
         logger.info("ZoomAPI: Fetching accounts")
         accounts = []
-        req = requests.get(
-            Constants.Users.LIST_USERS_ENDPOINT, headers=self._headersForRequest()
+        req = session().get(
+            Constants.Users.LIST_USERS_ENDPOINT,
+            headers=self._headersForRequest(),
+            timeout=REQUEST_TIMEOUT,
         )
         req.raise_for_status()
         responseDict = req.json()
@@ -264,10 +451,11 @@ class ZoomAPI:
                     Constants.NEXT_PAGE_TOKEN_KEY
                 ]
             }
-            req = requests.get(
+            req = session().get(
                 Constants.Users.LIST_USERS_ENDPOINT,
                 headers=self._headersForRequest(),
                 params=params,
+                timeout=REQUEST_TIMEOUT,
             )
             req.raise_for_status()
             responseDict = req.json()
@@ -278,12 +466,43 @@ class ZoomAPI:
 
     def _accounts(self) -> list[ZoomUser]:
         if self._cachedAccounts is None:
-            logger.info("ZoomAPI: No accounts in cache")
-            self._cachedAccounts = self._fetchAccounts()
+            cached = cache.get(_directoryCacheKey(self._accountId))
+            if cached is None:
+                logger.info("ZoomAPI: No accounts in cache")
+                self.refreshDirectory()
+            else:
+                logger.info("ZoomAPI: Using shared account directory")
+                self._cachedAccounts = [
+                    ZoomUser(
+                        email=user["email"],
+                        id=user["id"],
+                        status=user["status"],
+                        features=ZoomUser.Features(**user["features"]) if user["features"] else None,
+                    )
+                    for user in cached
+                ]
         else:
             logger.info("ZoomAPI: Returning Cached ids")
         return self._cachedAccounts
 
+    def loadAccounts(self) -> list[ZoomUser]:
+        return self._accounts()
+
+    # Fetch the directory from Zoom and share it with every process
+    def refreshDirectory(self) -> list[ZoomUser]:
+        self._cachedAccounts = self._fetchAccounts()
+        cache.set(
+            _directoryCacheKey(self._accountId),
+            [dataclasses.asdict(user) for user in self._cachedAccounts],
+            timeout=directoryCacheSeconds(),
+        )
+        return self._cachedAccounts
+
+    # Drop the shared directory, e.g. when it named a user Zoom no longer knows
+    def forgetDirectory(self) -> None:
+        self._cachedAccounts = None
+        cache.delete(_directoryCacheKey(self._accountId))
+
     # MARK: Meetings
     @_accessTokenRequired
     def _fetchMeetingsForAccountAndTime(
@@ -356,10 +575,11 @@ class ZoomAPI:
             Constants.Meetings.QUERY_PARAM_TIMEZONE: TZ_TO_ZOOM_TZ[fromDate.zoneName],
             Constants.Meetings.QUERY_PARAM_TYPE: Constants.Meetings.QUERY_PARAM_TYPE_UPCOMING,
         }
-        req = requests.get(
+        req = session().get(
             Constants.Meetings.MEETING_ENDPOINT(account.id),
             headers=self._headersForRequest(),
             params=params,
+            timeout=REQUEST_TIMEOUT,
         )
         req.raise_for_status()
         responseDict = req.json()
@@ -373,10 +593,11 @@ class ZoomAPI:
             params[Constants.NEXT_PAGE_TOKEN_KEY] = responseDict[
                 Constants.NEXT_PAGE_TOKEN_KEY
             ]
-            req = requests.get(
+            req = session().get(
                 Constants.Meetings.MEETING_ENDPOINT(account.id),
                 headers=self._headersForRequest(),
                 params=params,
+                timeout=REQUEST_TIMEOUT,
             )
             req.raise_for_status()
             responseDict = req.json()
@@ -385,13 +606,53 @@ class ZoomAPI:
         logger.info("ZoomAPI: No next page, finishing fetching meetings")
         return meetings
 
+    # One meeting list per account, in the same order. With an executor they are
+    # all fetched at once on it, waiting at most timeoutSec in total. The token is
+    # refreshed (if needed) by the caller's decorator before any fan-out, so the
+    # per-account fetches never race to refresh it.
+    def _fetchMeetingsForAccounts(
+        self,
+        accounts: list[ZoomUser],
+        fromDate: DateTimeWithAcceptedTimeZone,
+        toDate: DateTimeWithAcceptedTimeZone,
+        executor: concurrent.futures.Executor | None,
+        timeoutSec: float | None,
+    ) -> list[list[ZoomMeeting]]:
+        if executor is None:
+            return [
+                self._fetchMeetingsForAccountAndTime(account=account, fromDate=fromDate, toDate=toDate)
+                for account in accounts
+            ]
+        futures = [
+            executor.submit(
+                self._fetchMeetingsForAccountAndTime,
+                account=account, fromDate=fromDate, toDate=toDate,
+            )
+            for account in accounts
+        ]
+        deadline = None if timeoutSec is None else clock.monotonic() + timeoutSec
+        return [
+            future.result(
+                timeout=None if deadline is None else max(0, deadline - clock.monotonic())
+            )
+            for future in futures
+        ]
+
     # MARK: Public APIs
 
     # Returns the list of tuples
     # 0 - The account this record is for
     # 1 - List of conflicting meetings, if empty then account is available
+    # Accounts come back in directory order whatever order their meetings arrive in.
+    # With an executor every account's meetings are fetched at once on it, within
+    # timeoutSec in total - the caller must not be one of its workers.
+    @_accessTokenRequired
     def getAccountsAndAvailablilityForTime(
-        self, time: DateTimeWithAcceptedTimeZone, duration: datetime.timedelta
+        self,
+        time: DateTimeWithAcceptedTimeZone,
+        duration: datetime.timedelta,
+        executor: concurrent.futures.Executor | None = None,
+        timeoutSec: float | None = None,
     ) -> list[tuple[ZoomUser, list[ZoomMeeting]]]:
         # Can't check for conflicts in the past
         # Return false as if there is a conflict
@@ -409,12 +670,20 @@ class ZoomAPI:
         fromDate = DateTimeWithAcceptedTimeZone(wallTime=time.wallTime-datetime.timedelta(hours=3),zoneName=time.zoneName)
         toDate = DateTimeWithAcceptedTimeZone(wallTime=time.wallTime+datetime.timedelta(hours=3)+duration, zoneName=time.zoneName)
 
-        results = []
-        for account in self._accounts():
-            # Get potential conflicts
-            potentialConflicts = self._fetchMeetingsForAccountAndTime(
-                account=account, fromDate=fromDate, toDate=toDate
+        accounts = self._accounts()
+        try:
+            meetingsByAccount = self._fetchMeetingsForAccounts(
+                accounts, fromDate, toDate, executor, timeoutSec
             )
+        except requests.HTTPError:
+            # A cached directory can outlive a deleted or deactivated user; make
+            # the next attempt list the accounts again rather than fail the same way
+            logger.warning("ZoomAPI: Meeting lookup failed, dropping the cached account directory")
+            self.forgetDirectory()
+            raise
+
+        results = []
+        for account, potentialConflicts in zip(accounts, meetingsByAccount):
             confirmedConflicts = []
             # Check for conflicts
             logger.info("ZoomAPI: Checking conflicts for account %s", account.email)
@@ -440,7 +709,7 @@ class ZoomAPI:
     @_accessTokenRequired
     def deleteMeeting(self, id: int) :
         logger.info("ZoomAPI: Deleteing meeting %d", id)
-        req = requests.delete(Constants.Meetings.MEETING_DELETE_ENDPOINT(id), headers=self._headersForRequest())
+        req = session().delete(Constants.Meetings.MEETING_DELETE_ENDPOINT(id), headers=self._headersForRequest(), timeout=REQUEST_TIMEOUT)
         req.raise_for_status()
 
     @_accessTokenRequired
@@ -454,13 +723,13 @@ class ZoomAPI:
         logger.info(
             "ZoomAPI: Creating meeting %s at %s that lasts %s for user %s",
             title,
-            str(time),
+            str(start),
             str(duration),
             user.email,
         )
         # headers = self._headersForRequest()
         # headers[Content-Type: application/json]
-        req = requests.post(
+        req = session().post(
             Constants.Meetings.MEETING_ENDPOINT(user.id),
             headers=self._headersForRequest(),
             json={
@@ -470,6 +739,7 @@ class ZoomAPI:
                 Constants.Meetings.CREATE_DURATION: duration.seconds // 60,
                 Constants.Meetings.CREATE_TYPE: Constants.Meetings.TYPE_SCHEDULED,
             },
+            timeout=REQUEST_TIMEOUT,
         )
         req.raise_for_status()
         logger.info("ZoomAPI: Created meeting")
@@ -0,0 +1,119 @@
+"""Denormalized lifetime counters (``LinkCounter``) per tree, item, and QR code.
+
+``applyEvents`` runs inside ``eventBuffer.writeEvents``'s transaction - the
+one write path both recording modes share - and folds a batch of new events
+into the counters with ``F()`` increments: one UPDATE per target touched, never
+a read-modify-write, so concurrent writers can't lose counts. A buffered flush
+of 200 clicks on one tree is still a single UPDATE for that tree.
+
+The counters are a cache of the metrics, not the record. ``reconcile``
+rebuilds every counter from the rollup plus the unrolled tail (the same
+source ``metrics.py`` reads, which outlives pruned raw events) - run it once
+after deploying the counters, and any time they are suspect:
+
+    python manage.py reconcile_link_counters
+"""
+
+import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max
+from django.db.models.functions import Coalesce, Greatest
+
+from ..models import LinkCounter, LinkEvent, LinkEventDaily
+from . import metrics
+
+# (counter FK field, LinkEvent / rollup column holding that target's id)
+TARGETS = (
+    ("tree", "tree_id"),
+    ("item", "item_id"),
+    ("qr", "qr_id"),
+)
+
+
+def _deltas(rows: list[dict]) -> dict[tuple, list]:
+    """{(field, id): [web, qr, lastEventAt]} for a batch of LinkEvent rows."""
+    deltas: dict[tuple, list] = {}
+    for row in rows:
+        isQr = row["source"] == LinkEvent.Source.QR
+        for field, column in TARGETS:
+            targetId = row.get(column)
+            if targetId is None:
+                continue
+            delta = deltas.setdefault((field, targetId), [0, 0, row["occurredAt"]])
+            delta[1 if isQr else 0] += 1
+            delta[2] = max(delta[2], row["occurredAt"])
+    return deltas
+
+
+def applyEvents(rows: list[dict]) -> None:
+    """Add a batch of just-written events to their targets' counters."""
+    for (field, targetId), (web, qr, lastAt) in _deltas(rows).items():
+        counter = LinkCounter.objects.filter(**{f"{field}_id": targetId})
+        updated = counter.update(
+            webCount=F("webCount") + web,
+            qrCount=F("qrCount") + qr,
+            lastEventAt=Greatest(Coalesce(F("lastEventAt"), lastAt), lastAt),
+        )
+        if updated:
+            continue
+        try:
+            # Savepoint: losing a create race must not abort the caller's
+            # transaction - the winner's row then takes the increment.
+            with transaction.atomic():
+                LinkCounter.objects.create(
+                    **{f"{field}_id": targetId}, webCount=web, qrCount=qr, lastEventAt=lastAt,
+                )
+        except IntegrityError:
+            counter.update(
+                webCount=F("webCount") + web,
+                qrCount=F("qrCount") + qr,
+                lastEventAt=Greatest(Coalesce(F("lastEventAt"), lastAt), lastAt),
+            )
+
+
+def _lastEventTimes(column: str) -> dict[int, datetime.datetime]:
+    """Latest event time per target: the later of its newest raw event and the
+    start of its last rolled-up day (pruned history only has day resolution)."""
+    latest = {
+        row[column]: datetime.datetime.combine(
+            row["day"], datetime.time.min, tzinfo=datetime.UTC
+        )
+        for row in LinkEventDaily.objects.filter(**{f"{column}__isnull": False})
+        .values(column).annotate(day=Max("day")).order_by()
+    }
+    for row in (
+        LinkEvent.objects.filter(**{f"{column}__isnull": False})
+        .values(column).annotate(last=Max("occurredAt")).order_by()
+    ):
+        targetId = row[column]
+        latest[targetId] = max(latest.get(targetId, row["last"]), row["last"])
+    return latest
+
+
+@transaction.atomic
+def reconcile() -> int:
+    """Rebuild every counter from the rollup and the unrolled tail. Returns
+    how many counters were written.
+
+    The delete comes first so the transaction holds SQLite's write lock while
+    it counts: no event can be recorded between the read and the rewrite.
+    """
+    LinkCounter.objects.all().delete()
+    counters: dict[tuple, LinkCounter] = {}
+    for field, column in TARGETS:
+        lastTimes = _lastEventTimes(column)
+        for (targetId, source), total in metrics._countsBy((column, "source")).items():
+            if targetId is None:
+                continue
+            counter = counters.setdefault(
+                (field, targetId),
+                LinkCounter(**{f"{field}_id": targetId}, lastEventAt=lastTimes.get(targetId)),
+            )
+            if source == LinkEvent.Source.QR:
+                counter.qrCount += total
+            else:
+                counter.webCount += total
+    LinkCounter.objects.bulk_create(counters.values())
+    return len(counters)
+
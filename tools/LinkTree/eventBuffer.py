@@ -0,0 +1,277 @@
+"""Write-behind LinkEvent recording for the /go and /qr redirect hot path.
+
+In the default "sync" mode ``tracking.recordEvent`` writes each LinkEvent
+inside the redirect, so a burst of QR scans (a flyer at a rally) queues every
+redirect behind SQLite's single write lock - shared with the rest of the site.
+With ``settings.LINK_EVENT_RECORDING = "buffered"`` the redirect only appends
+the event's fields to an in-process, bounded buffer; a daemon flusher thread
+writes them with one ``bulk_create`` when the buffer reaches ``flushSize`` or
+``flushSeconds`` have passed, whichever comes first.
+
+Trade-offs, deliberately accepted for analytics data:
+
+* The buffer is bounded (``maxEvents``). When the database can't keep up the
+  newest events are dropped and counted rather than growing memory without
+  limit - a dropped click must never cost a redirect.
+* Events sit in memory for up to ``flushSeconds``. The buffer is flushed on
+  interpreter exit (gunicorn's graceful worker shutdown), but a hard kill
+  loses whatever is pending.
+* The buffer is per process. The Huey consumer is a separate process and
+  can't see the web workers' memory, so flushing is owned by each worker's own
+  flusher thread rather than by a Huey task.
+
+``occurredAt`` is captured when the event is recorded, not when it is flushed,
+so buffering never skews the metrics' time series.
+"""
+
+import atexit
+import dataclasses
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+RECORDING_SYNC = "sync"
+RECORDING_BUFFERED = "buffered"
+
+DEFAULT_POLICY = {
+    "maxEvents": 5000,
+    "flushSize": 200,
+    "flushSeconds": 2.0,
+}
+
+
+def writeEvents(rows: list[dict], detachDeleted: bool = False) -> int:
+    """Persist LinkEvent field dicts in one INSERT, and bump the lifetime
+    counters (counters.py) in the same transaction. Shared by both modes.
+
+    With ``detachDeleted`` a row's tree, item, or QR code deleted since it was
+    recorded is nulled out first - what ``on_delete=SET_NULL`` did to the
+    events already written - so one missing target can't fail a whole buffered
+    batch and the event still counts for the targets that remain. The sync
+    redirect writes a single row and skips the lookup. Returns the number of
+    rows that had a target nulled.
+    """
+    from django.db import transaction
+
+    from ..models import LinkEvent
+    from . import counters
+
+    with transaction.atomic():
+        detached = _detachDeleted(rows) if detachDeleted else 0
+        LinkEvent.objects.bulk_create([LinkEvent(**row) for row in rows])
+        counters.applyEvents(rows)
+    if detached:
+        logger.info("Detached %s LinkEvent(s) from a deleted tree, item, or QR code", detached)
+    return detached
+
+
+def _detachDeleted(rows: list[dict]) -> int:
+    """Null every tree/item/QR id in ``rows`` that no longer exists (one
+    query per kind of target the batch references). Returns how many rows
+    changed."""
+    from ..models import LinkEvent
+    from . import counters
+
+    detached = set()
+    for field, column in counters.TARGETS:
+        ids = {row[column] for row in rows if row.get(column) is not None}
+        if not ids:
+            continue
+        model = LinkEvent._meta.get_field(field).related_model
+        missing = ids - set(model.objects.filter(pk__in=ids).values_list("pk", flat=True))
+        for index, row in enumerate(rows):
+            if row.get(column) in missing:
+                row[column] = None
+                detached.add(index)
+    return len(detached)
+
+
+@dataclasses.dataclass
+class BufferStats:
+    enqueued: int = 0
+    flushed: int = 0
+    # Rejected because the buffer was full (the overflow counter).
+    dropped: int = 0
+    # Accepted, but lost because their flush raised.
+    failed: int = 0
+    # Written with a tree, item, or QR code nulled out because it was deleted
+    # before the flush (as SET_NULL does to events already written).
+    detached: int = 0
+    flushes: int = 0
+
+
+class EventBuffer:
+    """A bounded, thread-safe queue of LinkEvent field dicts.
+
+    ``add`` never blocks on the database. ``flush`` drains the queue in
+    batches of at most ``flushSize``; it is serialized so the flusher thread
+    and the exit hook never write the same batch twice.
+    """
+
+    def __init__(self, maxEvents: int, flushSize: int, flushSeconds: float):
+        self.maxEvents = maxEvents
+        self.flushSize = max(1, flushSize)
+        self.flushSeconds = flushSeconds
+        self.stats = BufferStats()
+        self._pending: list[dict] = []
+        self._lock = threading.Lock()
+        self._flushLock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def add(self, row: dict) -> bool:
+        """Queue one event. Returns False (and counts it) if the buffer is full."""
+        with self._lock:
+            if len(self._pending) >= self.maxEvents:
+                self.stats.dropped += 1
+                dropped = self.stats.dropped
+                accepted = False
+            else:
+                self._pending.append(row)
+                self.stats.enqueued += 1
+                accepted = True
+                full = len(self._pending) >= self.flushSize
+        if not accepted:
+            # Log the first drop and then every hundredth, not every one - an
+            # overflow is by definition a burst.
+            if dropped == 1 or dropped % 100 == 0:
+                logger.warning(
+                    "LinkEvent buffer full (%s events); %s event(s) dropped so far",
+                    self.maxEvents, dropped,
+                )
+            return False
+        if full:
+            self._wakeup.set()
+        return True
+
+    def flush(self) -> int:
+        """Write everything pending. Returns the number of events written."""
+        written = 0
+        with self._flushLock:
+            while True:
+                with self._lock:
+                    batch = self._pending[:self.flushSize]
+                    del self._pending[:self.flushSize]
+                if not batch:
+                    return written
+                try:
+                    detached = writeEvents(batch, detachDeleted=True)
+                    flushed, failed = len(batch), 0
+                    succeeded = True
+                except Exception:
+                    logger.exception(
+                        "Failed to flush %s buffered LinkEvent(s); retrying one at a time", len(batch)
+                    )
+                    flushed, failed, detached = self._writeEach(batch)
+                    succeeded = False
+                with self._lock:
+                    self.stats.flushed += flushed
+                    self.stats.failed += failed
+                    self.stats.detached += detached
+                    if succeeded:
+                        self.stats.flushes += 1
+                written += flushed
+
+    def _writeEach(self, batch: list[dict]) -> tuple[int, int, int]:
+        """Write a batch that failed as a whole row by row, so one bad event
+        (say, a target deleted between the lookup and the INSERT) only loses
+        itself. Returns (written, failed, detached)."""
+        written = failed = detached = 0
+        for row in batch:
+            try:
+                detached += writeEvents([row], detachDeleted=True)
+                written += 1
+            except Exception:
+                failed += 1
+        if failed:
+            logger.error("Lost %s buffered LinkEvent(s) that failed to write on their own", failed)
+        return written, failed, detached
+
+    def start(self) -> None:
+        """Start the daemon flusher thread (idempotent)."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="link-event-flusher", daemon=True
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        """Stop the flusher thread and write whatever is still pending."""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=max(self.flushSeconds, 1.0) * 2)
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        from django.db import connection
+
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flushSeconds)
+            self._wakeup.clear()
+            if self._stopping.is_set():
+                break
+            self.flush()
+            # The flusher owns a connection of its own; drop it between flushes
+            # so an idle worker doesn't pin a SQLite handle.
+            connection.close()
+
+
+_buffer: EventBuffer | None = None
+_bufferPid: int | None = None
+_bufferLock = threading.Lock()
+
+
+def _policy() -> dict:
+    from django.conf import settings
+
+    policy = dict(DEFAULT_POLICY)
+    policy.update(getattr(settings, "LINK_EVENT_BUFFER", {}) or {})
+    return policy
+
+
+def getBuffer() -> EventBuffer:
+    """The process's buffer, created (and its flusher started) on first use.
+
+    Keyed on the pid so a buffer inherited across a fork is never shared with
+    the parent - each gunicorn worker gets its own.
+    """
+    global _buffer, _bufferPid
+    pid = os.getpid()
+    if _buffer is not None and _bufferPid == pid:
+        return _buffer
+    with _bufferLock:
+        if _buffer is None or _bufferPid != pid:
+            policy = _policy()
+            _buffer = EventBuffer(
+                maxEvents=int(policy["maxEvents"]),
+                flushSize=int(policy["flushSize"]),
+                flushSeconds=float(policy["flushSeconds"]),
+            )
+            _bufferPid = pid
+            _buffer.start()
+            atexit.register(_buffer.close)
+    return _buffer
+
+
+def isBuffered() -> bool:
+    from django.conf import settings
+
+    return getattr(settings, "LINK_EVENT_RECORDING", RECORDING_SYNC) == RECORDING_BUFFERED
+
+
+def stats() -> BufferStats | None:
+    """This process's buffer counters, or None when nothing has been buffered."""
+    if _buffer is None or _bufferPid != os.getpid():
+        return None
+    with _buffer._lock:
+        return dataclasses.replace(_buffer.stats)
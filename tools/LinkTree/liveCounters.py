@@ -0,0 +1,191 @@
+"""Live click/scan counts for the metrics page, as server-sent events.
+
+The recording path already bumps ``LinkCounter`` rows (counters.py) in the
+same transaction that writes each batch of events, so "what changed" is just
+the difference between two reads of a tree's counters. A ``CounterHub`` does
+that read once per ``LINK_LIVE_POLL_SECONDS`` for every tree anyone is
+watching - one query, whatever the number of watchers - and fans the
+changes out to each watcher's queue. Nobody re-runs ``treeSummary``.
+
+There is one hub per event loop, i.e. per ASGI process, and it only polls
+while someone is subscribed. A watcher that falls behind (its queue fills)
+is sent a fresh snapshot once it catches up rather than a backlog of deltas.
+
+Events on the wire (``stream``):
+
+- ``snapshot``: every counter, ``{"tree": {...}, "qrCodes": {code: {...}}}``,
+  each entry ``{"web", "qr", "total"}``. Sent first, and after falling behind.
+- ``delta``: only what changed since the last message, same shape, with each
+  entry also carrying ``"new": {"web", "qr"}`` - the increments.
+
+Streams end after ``LINK_LIVE_STREAM_SECONDS``. The browser's EventSource
+then reconnects on its own, so a stream never holds a connection open
+indefinitely.
+"""
+
+import asyncio
+import json
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Q
+
+from ..models import LinkCounter
+
+DEFAULT_POLL_SECONDS = 2.0
+DEFAULT_STREAM_SECONDS = 600
+KEEPALIVE_SECONDS = 15
+RETRY_MILLISECONDS = 3000
+QUEUE_SIZE = 32
+
+
+def pollSeconds() -> float:
+    return float(getattr(settings, "LINK_LIVE_POLL_SECONDS", DEFAULT_POLL_SECONDS))
+
+
+def streamSeconds() -> float:
+    return float(getattr(settings, "LINK_LIVE_STREAM_SECONDS", DEFAULT_STREAM_SECONDS))
+
+
+def _entry(web: int, qr: int) -> dict:
+    return {"web": web, "qr": qr, "total": web + qr}
+
+
+def readCounters(treeIds) -> dict[int, dict]:
+    """{treeId: snapshot} for ``treeIds`` in one query: each tree's own
+    counter and those of the QR codes that target it or one of its items."""
+    treeIds = set(treeIds)
+    snapshots = {treeId: {"tree": _entry(0, 0), "qrCodes": {}} for treeId in treeIds}
+    rows = LinkCounter.objects.filter(
+        Q(tree_id__in=treeIds) | Q(qr__tree_id__in=treeIds) | Q(qr__item__tree_id__in=treeIds)
+    ).values_list("tree_id", "qr__code", "qr__tree_id", "qr__item__tree_id", "webCount", "qrCount")
+    for treeId, code, qrTreeId, qrItemTreeId, web, qr in rows:
+        if treeId is not None:
+            snapshots[treeId]["tree"] = _entry(web, qr)
+        else:
+            snapshots[qrTreeId or qrItemTreeId]["qrCodes"][code] = _entry(web, qr)
+    return snapshots
+
+
+async def currentSnapshot(treeId: int) -> dict:
+    """One tree's snapshot, read straight from the database."""
+    return (await sync_to_async(readCounters)([treeId]))[treeId]
+
+
+def diff(before: dict, after: dict) -> dict | None:
+    """The ``delta`` payload between two snapshots of one tree; None if
+    nothing moved. Counters only grow, so every change is an increment."""
+    delta = {}
+    old = before["tree"]
+    new = after["tree"]
+    if new != old:
+        delta["tree"] = {**new, "new": {"web": new["web"] - old["web"], "qr": new["qr"] - old["qr"]}}
+    codes = {}
+    for code, new in after["qrCodes"].items():
+        old = before["qrCodes"].get(code, _entry(0, 0))
+        if new != old:
+            codes[code] = {**new, "new": {"web": new["web"] - old["web"], "qr": new["qr"] - old["qr"]}}
+    if codes:
+        delta["qrCodes"] = codes
+    return delta or None
+
+
+class _Watcher:
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.behind = False
+
+
+class CounterHub:
+    """One shared counter-polling loop for every watcher in this process."""
+
+    def __init__(self):
+        self._watchers: dict[int, set[_Watcher]] = {}
+        self._snapshots: dict[int, dict] = {}
+        self._task: asyncio.Task | None = None
+
+    async def subscribe(self, treeId: int) -> tuple[_Watcher, dict]:
+        """Start watching ``treeId``; returns the watcher and the current snapshot."""
+        if treeId not in self._snapshots:
+            self._snapshots.update(await sync_to_async(readCounters)([treeId]))
+        watcher = _Watcher()
+        self._watchers.setdefault(treeId, set()).add(watcher)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return watcher, self._snapshots[treeId]
+
+    def unsubscribe(self, treeId: int, watcher: _Watcher) -> None:
+        watchers = self._watchers.get(treeId, set())
+        watchers.discard(watcher)
+        if not watchers:
+            self._watchers.pop(treeId, None)
+            self._snapshots.pop(treeId, None)
+
+    def publish(self, snapshots: dict[int, dict]) -> None:
+        """Fan fresh snapshots out to the watchers as deltas."""
+        for treeId, snapshot in snapshots.items():
+            previous = self._snapshots.get(treeId)
+            if previous is None:
+                continue
+            self._snapshots[treeId] = snapshot
+            delta = diff(previous, snapshot)
+            for watcher in self._watchers.get(treeId, ()):
+                if watcher.behind:
+                    message = ("snapshot", snapshot)
+                elif delta is not None:
+                    message = ("delta", delta)
+                else:
+                    continue
+                try:
+                    watcher.queue.put_nowait(message)
+                    watcher.behind = False
+                except asyncio.QueueFull:
+                    watcher.behind = True
+
+    async def _run(self) -> None:
+        while self._watchers:
+            await asyncio.sleep(pollSeconds())
+            if not self._watchers:
+                break
+            self.publish(await sync_to_async(readCounters)(list(self._watchers)))
+
+
+_hubs: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, CounterHub]" = weakref.WeakKeyDictionary()
+
+
+def getHub() -> CounterHub:
+    """This event loop's hub (one per ASGI process in practice)."""
+    loop = asyncio.get_running_loop()
+    hub = _hubs.get(loop)
+    if hub is None:
+        hub = _hubs[loop] = CounterHub()
+    return hub
+
+
+def formatEvent(kind: str, data: dict) -> str:
+    return f"event: {kind}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+async def stream(treeId: int, lifetime: float | None = None):
+    """The SSE body for one watcher of ``treeId``: a snapshot, then deltas as
+    they come, with keepalive comments in between, for ``lifetime`` seconds."""
+    if lifetime is None:
+        lifetime = streamSeconds()
+    hub = getHub()
+    watcher, snapshot = await hub.subscribe(treeId)
+    try:
+        yield f"retry: {RETRY_MILLISECONDS}\n" + formatEvent("snapshot", snapshot)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + lifetime
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                kind, data = await asyncio.wait_for(
+                    watcher.queue.get(), timeout=min(KEEPALIVE_SECONDS, remaining),
+                )
+            except TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield formatEvent(kind, data)
+    finally:
+        hub.unsubscribe(treeId, watcher)
@@ -0,0 +1,238 @@
+"""A small open-loop load driver for the public Link Tree endpoints.
+
+Replays a weighted mix of tree page views (``public_tree``), link clicks
+(``go``) and QR scans (``qr_redirect``) against a running instance at a fixed
+request rate, and reports latency percentiles and errors per kind. Open loop:
+request *n* is due at ``n / rate`` seconds whatever happened to earlier ones,
+and its latency is measured from when it was due, so a stalled server shows
+up as latency instead of quietly slowing the driver down (no coordinated
+omission).
+
+Two server-side signals come from the database the instance writes to, when
+the driver can see it (same host, SQLite):
+
+- the number of **events recorded** during the run against the clicks and
+  scans that got a redirect (after a settle wait for buffered flushes);
+- optionally, a **lock probe** thread that repeatedly takes and drops
+  SQLite's write lock (``BEGIN IMMEDIATE``) and records how long it waited -
+  the queue every event write and page-cache miss stands in. The probe is a
+  writer too: each of its transactions holds the lock the server's writes
+  wait on, so it adds to the waits it reports. It is off unless asked for.
+
+Driven by the ``load_test_link_tree`` management command; targets usually
+come from ``seed_link_traffic``.
+"""
+
+import collections
+import dataclasses
+import http.client
+import random
+import sqlite3
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from django.urls import reverse
+
+from ..models import LinkTree, LinkTreeItem, QRCode
+from . import synthetic
+
+KINDS = ("view", "click", "scan")
+DEFAULT_MIX = {"view": 6, "click": 3, "scan": 1}
+
+
+def parseMix(spec: str) -> dict[str, int]:
+    """``"view=6,click=3,scan=1"`` -> {kind: weight}. Unnamed kinds get 0."""
+    mix = dict.fromkeys(KINDS, 0)
+    for part in spec.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in mix or not weight.strip().isdigit():
+            raise ValueError(f"bad mix entry {part!r}; expected e.g. view=6,click=3,scan=1")
+        mix[kind] = int(weight)
+    if not any(mix.values()):
+        raise ValueError("the mix has no non-zero weights")
+    return mix
+
+
+@dataclasses.dataclass
+class Targets:
+    """URL paths per kind."""
+    view: list[str]
+    click: list[str]
+    scan: list[str]
+
+    @classmethod
+    def fromDatabase(cls, slugPrefix: str = synthetic.SLUG_PREFIX) -> "Targets":
+        """Every active tree, manual item and active QR code whose tree slug
+        starts with ``slugPrefix`` (the synthetic ones by default)."""
+        trees = LinkTree.objects.filter(slug__startswith=slugPrefix, isActive=True)
+        items = LinkTreeItem.objects.filter(
+            tree__in=trees, isActive=True, kind=LinkTreeItem.Kind.MANUAL,
+        ).exclude(url="")
+        codes = QRCode.objects.filter(isActive=True, item__in=items)
+        return cls(
+            view=[reverse("link-tree", kwargs={"slug": slug})
+                  for slug in trees.values_list("slug", flat=True)],
+            click=[reverse("link-go", kwargs={"item_id": itemId})
+                   for itemId in items.values_list("id", flat=True)],
+            scan=[reverse("qr-redirect", kwargs={"code": code})
+                  for code in codes.values_list("code", flat=True)],
+        )
+
+
+class HttpSender:
+    """GETs a path on ``baseUrl`` over one keep-alive connection per thread,
+    without following redirects. Returns the status code."""
+
+    def __init__(self, baseUrl: str, timeout: float = 10.0):
+        parsed = urllib.parse.urlsplit(baseUrl)
+        self._connectionClass = (
+            http.client.HTTPSConnection if parsed.scheme == "https" else http.client.HTTPConnection
+        )
+        self._netloc = parsed.netloc
+        self._prefix = parsed.path.rstrip("/")
+        self._timeout = timeout
+        self._local = threading.local()
+
+    def __call__(self, path: str) -> int:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._connectionClass(self._netloc, timeout=self._timeout)
+            self._local.connection = connection
+        try:
+            connection.request("GET", self._prefix + path, headers={"User-Agent": "link-load-test"})
+            response = connection.getresponse()
+            response.read()
+            return response.status
+        except Exception:
+            # Start the next request on a fresh connection.
+            connection.close()
+            self._local.connection = None
+            raise
+
+
+class LockProbe(threading.Thread):
+    """Measures SQLite write-lock waits on ``path`` until stopped. Every probe
+    holds the write lock briefly itself, so the server's writes queue behind it."""
+
+    def __init__(self, path: str, interval: float = 0.05, timeout: float = 5.0):
+        super().__init__(name="link-load-lock-probe", daemon=True)
+        self.path = path
+        self.interval = interval
+        self.timeout = timeout
+        self.waits: list[float] = []
+        self.timeouts = 0
+        self._stopping = threading.Event()
+
+    def run(self):
+        db = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        try:
+            while not self._stopping.wait(self.interval):
+                started = time.perf_counter()
+                try:
+                    db.execute("BEGIN IMMEDIATE")
+                except sqlite3.OperationalError:
+                    self.timeouts += 1
+                    continue
+                self.waits.append((time.perf_counter() - started) * 1000)
+                db.execute("ROLLBACK")
+        finally:
+            db.close()
+
+    def stop(self):
+        self._stopping.set()
+        self.join()
+
+
+@dataclasses.dataclass
+class Report:
+    duration: float
+    latencies: dict[str, list[float]]
+    statuses: dict[str, collections.Counter]
+    errors: dict[str, int]
+    lockWaits: list[float] | None = None
+    lockTimeouts: int = 0
+
+    def sent(self, kind: str | None = None) -> int:
+        kinds = [kind] if kind else KINDS
+        return sum(sum(self.statuses[k].values()) + self.errors[k] for k in kinds)
+
+    def failed(self, kind: str | None = None) -> int:
+        """Requests that raised or got a 5xx (a 4xx is a bad target, not load)."""
+        kinds = [kind] if kind else KINDS
+        return sum(
+            self.errors[k] + sum(n for status, n in self.statuses[k].items() if status >= 500)
+            for k in kinds
+        )
+
+    def redirects(self) -> int:
+        """Clicks and scans answered with a redirect - each should be one event."""
+        return sum(
+            n for kind in ("click", "scan")
+            for status, n in self.statuses[kind].items() if 300 <= status < 400
+        )
+
+
+def run(
+    targets: Targets,
+    send,
+    rate: float,
+    duration: float,
+    mix: dict[str, int] | None = None,
+    concurrency: int = 32,
+    seed: int = 0,
+    probe: LockProbe | None = None,
+) -> Report:
+    """Send ``rate`` requests/s for ``duration`` seconds through ``send(path)
+    -> status`` and collect the results."""
+    mix = mix or DEFAULT_MIX
+    kinds = [kind for kind in KINDS if mix.get(kind) and getattr(targets, kind)]
+    if not kinds:
+        raise ValueError("no targets for any kind in the mix")
+    weights = [mix[kind] for kind in kinds]
+    rng = random.Random(seed)
+
+    lock = threading.Lock()
+    latencies = {kind: [] for kind in KINDS}
+    statuses = {kind: collections.Counter() for kind in KINDS}
+    errors = dict.fromkeys(KINDS, 0)
+
+    def fire(kind: str, path: str, due: float):
+        try:
+            status = send(path)
+        except Exception:
+            status = None
+        elapsed = (time.perf_counter() - due) * 1000
+        with lock:
+            if status is None:
+                errors[kind] += 1
+            else:
+                statuses[kind][status] += 1
+                latencies[kind].append(elapsed)
+
+    if probe is not None:
+        probe.start()
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="link-load") as pool:
+            for n in range(int(rate * duration)):
+                due = started + n / rate
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                kind = rng.choices(kinds, weights)[0]
+                pool.submit(fire, kind, rng.choice(getattr(targets, kind)), due)
+    finally:
+        if probe is not None:
+            probe.stop()
+
+    return Report(
+        duration=time.perf_counter() - started,
+        latencies=latencies,
+        statuses=statuses,
+        errors=errors,
+        lockWaits=probe.waits if probe is not None else None,
+        lockTimeouts=probe.timeouts if probe is not None else 0,
+    )
@@ -3,112 +3,627 @@
 Pure query/aggregation logic, kept out of the HTTP layer so it can be unit-tested
 without the request cycle and reused by both the dashboard view and the CSV
 export. The view just calls these and renders.
+
+Counts come from the daily rollup (``LinkEventDaily``, maintained by
+``rollups.py``) topped up with the raw events past its high-water mark, so a
+query's cost tracks the number of rollup rows and the unrolled tail rather than
+lifetime traffic. Unique visitors work the same way with per-day HyperLogLog
+sketches (``VisitorSketch``) in place of counts - or, for all time, the one
+running sketch per tree or QR code (``LifetimeVisitorSketch``). Days are UTC days. The
+browser / referrer breakdowns read only their own rollup
+(``LinkEventDimensionDaily``).
 """
 
+import base64
+import binascii
 import datetime
 
-from django.db.models import Count, Q
-from django.db.models.functions import TruncDate
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncHour, TruncMonth, TruncWeek
 
-from ..models import LinkEvent, LinkTree
+from ..models import (
+    LifetimeVisitorSketch, LinkCounter, LinkEvent, LinkEventDaily, LinkEventDimensionDaily, LinkTree,
+    VisitorSketch,
+)
+from . import rollups
+from .hll import HyperLogLog
 
 METRICS_WINDOW_DAYS = 30
 
 
-def _windowStart(windowDays: int) -> datetime.datetime:
-    return datetime.datetime.now(datetime.UTC) - datetime.timedelta(days=windowDays)
+def _windowStartDay(windowDays: int) -> datetime.date:
+    return (datetime.datetime.now(datetime.UTC) - datetime.timedelta(days=windowDays)).date()
 
 
-def overviewRows() -> list[dict]:
-    """Every tree with its lifetime web-click / QR-scan totals (for the index)."""
-    counts = {
-        row["tree"]: row
-        for row in LinkEvent.objects.filter(tree__isnull=False)
-        .values("tree")
-        .annotate(
-            web=Count("id", filter=Q(source=LinkEvent.Source.WEB)),
-            qr=Count("id", filter=Q(source=LinkEvent.Source.QR)),
+def _dayStart(day: datetime.date) -> datetime.datetime:
+    return datetime.datetime.combine(day, datetime.time.min, tzinfo=datetime.UTC)
+
+
+def _consistentRead():
+    """One read snapshot for a high-water mark and the rollup rows and tail it
+    splits. Read separately, a rollup committing in between would count the
+    events it just folded in twice - in the rollup and in the tail. SQLite
+    reads a transaction from the snapshot its first SELECT saw."""
+    return transaction.atomic()
+
+
+def _countsBy(fields, sinceDay: datetime.date | None = None, **filters) -> dict[tuple, int]:
+    """Event counts grouped by ``fields`` (rollup + unrolled tail), as
+    {tuple of field values: count}. ``filters`` must be valid on both
+    LinkEventDaily and LinkEvent (tree, item, qr, source and their lookups)."""
+    counts: dict[tuple, int] = {}
+    with _consistentRead():
+        rolled = LinkEventDaily.objects.filter(**filters)
+        tail = rollups.unrolledEvents().filter(**filters)
+        if sinceDay is not None:
+            rolled = rolled.filter(day__gte=sinceDay)
+            tail = tail.filter(occurredAt__gte=_dayStart(sinceDay))
+        if "day" in fields:
+            tail = tail.annotate(day=rollups.utcDay())
+
+        for row in rolled.values(*fields).annotate(total=Sum("count")).order_by():
+            key = tuple(row[field] for field in fields)
+            counts[key] = counts.get(key, 0) + row["total"]
+        for row in tail.values(*fields).annotate(total=Count("id")).order_by():
+            key = tuple(row[field] for field in fields)
+            counts[key] = counts.get(key, 0) + row["total"]
+    return counts
+
+
+def _sourceTotalsBy(
+    fields, mark: int, sinceDay: datetime.date | None = None, **filters
+) -> dict[tuple, list[int]]:
+    """Like ``_countsBy`` but split by source in the same pass, as {tuple of
+    field values: [web, qr]} - conditional aggregates rather than a source
+    column in the group-by, so half the rows. ``mark`` is the rollup's
+    high-water mark, read by the caller inside the same ``_consistentRead``."""
+    rolled = LinkEventDaily.objects.filter(**filters)
+    tail = rollups.unrolledEvents(mark=mark).filter(**filters)
+    if sinceDay is not None:
+        rolled = rolled.filter(day__gte=sinceDay)
+        tail = tail.filter(occurredAt__gte=_dayStart(sinceDay))
+    if "day" in fields:
+        tail = tail.annotate(day=rollups.utcDay())
+
+    isWeb = Q(source=LinkEvent.Source.WEB)
+    isQr = Q(source=LinkEvent.Source.QR)
+    totals: dict[tuple, list[int]] = {}
+    for rows in (
+        rolled.values(*fields).annotate(
+            web=Sum("count", filter=isWeb, default=0), qr=Sum("count", filter=isQr, default=0),
+        ),
+        tail.values(*fields).annotate(
+            web=Count("id", filter=isWeb), qr=Count("id", filter=isQr),
+        ),
+    ):
+        for row in rows.order_by():
+            total = totals.setdefault(tuple(row[field] for field in fields), [0, 0])
+            total[0] += row["web"]
+            total[1] += row["qr"]
+    return totals
+
+
+def _dayWindow(rows, tail, sinceDay, untilDay, dayField="day"):
+    """Narrow a sketch queryset and an event queryset to [sinceDay, untilDay]."""
+    if sinceDay is not None:
+        rows = rows.filter(**{f"{dayField}__gte": sinceDay})
+        tail = tail.filter(occurredAt__gte=_dayStart(sinceDay))
+    if untilDay is not None:
+        rows = rows.filter(**{f"{dayField}__lte": untilDay})
+        tail = tail.filter(occurredAt__lt=_dayStart(untilDay + datetime.timedelta(days=1)))
+    return rows, tail
+
+
+def _sketchWindow(daily, lifetime, tail, sinceDay, untilDay):
+    """The sketch rows and tail covering [sinceDay, untilDay]: the lifetime
+    sketches when the window is open at both ends, else the daily ones."""
+    if sinceDay is None and untilDay is None:
+        return lifetime, tail
+    return _dayWindow(daily, tail, sinceDay, untilDay)
+
+
+def _mergedSketches(sketchRows, tailRows) -> dict:
+    """{key: HyperLogLog} from (key, registers) sketch rows plus (key,
+    visitorHash) rows of events the sketches don't cover yet."""
+    merged: dict = {}
+    for key, registers in sketchRows:
+        merged.setdefault(key, HyperLogLog()).mergeBytes(registers)
+    for key, visitorHash in tailRows:
+        merged.setdefault(key, HyperLogLog()).add(visitorHash)
+    return merged
+
+
+def uniqueVisitors(
+    tree: LinkTree,
+    sinceDay: datetime.date | None = None,
+    untilDay: datetime.date | None = None,
+) -> int:
+    """Approximate distinct visitors to a tree over [sinceDay, untilDay]
+    (inclusive UTC days; open-ended when None)."""
+    with _consistentRead():
+        rows, tail = _sketchWindow(
+            VisitorSketch.objects.filter(tree=tree, qr__isnull=True),
+            LifetimeVisitorSketch.objects.filter(tree=tree),
+            rollups.unrolledEvents(rollups.SKETCH_CHECKPOINT_NAME)
+            .filter(tree=tree).exclude(visitorHash=""),
+            sinceDay, untilDay,
         )
-    }
-    return [
-        {
+        merged = _mergedSketches(
+            ((None, registers) for registers in rows.values_list("registers", flat=True)),
+            ((None, visitorHash) for visitorHash in tail.values_list("visitorHash", flat=True)),
+        )
+    return merged[None].count() if merged else 0
+
+
+def qrUniqueVisitors(
+    codes,
+    sinceDay: datetime.date | None = None,
+    untilDay: datetime.date | None = None,
+) -> dict[str, int]:
+    """Approximate distinct scanners per QR code, as {code: count}."""
+    with _consistentRead():
+        rows, tail = _sketchWindow(
+            VisitorSketch.objects.filter(qr__code__in=codes),
+            LifetimeVisitorSketch.objects.filter(qr__code__in=codes),
+            rollups.unrolledEvents(rollups.SKETCH_CHECKPOINT_NAME)
+            .filter(qr__code__in=codes).exclude(visitorHash=""),
+            sinceDay, untilDay,
+        )
+        merged = _mergedSketches(
+            rows.values_list("qr__code", "registers"),
+            tail.values_list("qr__code", "visitorHash"),
+        )
+    return {code: sketch.count() for code, sketch in merged.items()}
+
+
+def counterOf(target) -> LinkCounter:
+    """A tree / item / QR code's LinkCounter - an unsaved all-zero one before
+    its first event. Pair with select_related("counter") when listing."""
+    try:
+        return target.counter
+    except LinkCounter.DoesNotExist:
+        return LinkCounter()
+
+
+def overviewRows() -> list[dict]:
+    """Every tree with its lifetime web-click / QR-scan totals (for the index).
+
+    Read from the denormalized counters (counters.py) - one row per tree.
+    """
+    rows = []
+    for tree in LinkTree.objects.select_related("counter").order_by("title"):
+        counter = counterOf(tree)
+        rows.append({
             "tree": tree,
-            "web": counts.get(tree.id, {}).get("web", 0),
-            "qr": counts.get(tree.id, {}).get("qr", 0),
-        }
-        for tree in LinkTree.objects.all().order_by("title")
-    ]
+            "web": counter.webCount,
+            "qr": counter.qrCount,
+            "lastEventAt": counter.lastEventAt,
+        })
+    return rows
 
 
-def treeSummary(tree: LinkTree) -> dict:
-    """Scalar totals, top links, and per-QR scan counts for one tree."""
-    events = LinkEvent.objects.filter(tree=tree)
+# The summary's one grouping: every (item, QR code) pair the tree's events
+# touched, with the labels the dashboard shows for each.
+_SUMMARY_FIELDS = (
+    "item_id", "item__label", "item__resolvedLabel", "qr_id", "qr__code", "qr__label", "qr__campaign",
+)
 
-    webTotal = events.filter(source=LinkEvent.Source.WEB).count()
-    qrTotal = events.filter(source=LinkEvent.Source.QR).count()
-    uniqueVisitors = events.exclude(visitorHash="").values("visitorHash").distinct().count()
 
-    topItems = list(
-        events.filter(item__isnull=False)
-        .values("item__id", "item__label", "item__resolvedLabel")
-        .annotate(total=Count("id"))
-        .order_by("-total")[:25]
+def _summaryVisitors(tree: LinkTree, qrIds, mark: int) -> tuple[int, dict[int, int]]:
+    """Unique visitors to ``tree`` and per QR code in ``qrIds``, from one read
+    of their lifetime sketches and one of the unsketched tail."""
+    qrIds = set(qrIds)
+    sketchRows = (
+        LifetimeVisitorSketch.objects.filter(Q(tree=tree) | Q(qr_id__in=qrIds))
+        .values_list("qr_id", "registers")
+    )
+    tail = (
+        rollups.unrolledEvents(mark=mark)
+        .filter(Q(tree=tree) | Q(qr_id__in=qrIds))
+        .exclude(visitorHash="")
+        .values_list("tree_id", "qr_id", "visitorHash")
     )
-    for row in topItems:
-        row["label"] = (
-            row["item__label"] or row["item__resolvedLabel"] or f"Item {row['item__id']}"
-        )
 
-    qrRows = list(
-        events.filter(source=LinkEvent.Source.QR, qr__isnull=False)
-        .values("qr__code", "qr__label", "qr__campaign")
-        .annotate(scans=Count("id"))
-        .order_by("-scans")
+    def tailRows():
+        for treeId, qrId, visitorHash in tail:
+            if treeId == tree.id:
+                yield None, visitorHash
+            if qrId in qrIds:
+                yield qrId, visitorHash
+
+    merged = _mergedSketches(sketchRows, tailRows())
+    treeSketch = merged.pop(None, None)
+    return (
+        treeSketch.count() if treeSketch else 0,
+        {qrId: sketch.count() for qrId, sketch in merged.items()},
     )
 
+
+def treeSummary(tree: LinkTree) -> dict:
+    """Scalar totals, top links, and per-QR scan / visitor counts for one tree.
+
+    Five queries however much traffic the tree has: both high-water marks, one
+    (item, QR code) grouping each over the rollup and the tail - totals, top
+    links and QR rows all fold out of it - and the sketches plus their tail.
+    """
+    with _consistentRead():
+        marks = rollups.highWaterMarks(rollups.CHECKPOINT_NAME, rollups.SKETCH_CHECKPOINT_NAME)
+        totals = _sourceTotalsBy(_SUMMARY_FIELDS, marks[rollups.CHECKPOINT_NAME], tree=tree)
+
+        webTotal = qrTotal = 0
+        items: dict[int, dict] = {}
+        codes: dict[int, dict] = {}
+        for key, (web, qr) in totals.items():
+            row = dict(zip(_SUMMARY_FIELDS, key))
+            webTotal += web
+            qrTotal += qr
+            if row["item_id"] is not None:
+                item = items.setdefault(row["item_id"], {
+                    "item__id": row["item_id"],
+                    "item__label": row["item__label"],
+                    "item__resolvedLabel": row["item__resolvedLabel"],
+                    "total": 0,
+                })
+                item["total"] += web + qr
+            if row["qr_id"] is not None and qr:
+                code = codes.setdefault(row["qr_id"], {
+                    "qr__code": row["qr__code"],
+                    "qr__label": row["qr__label"],
+                    "qr__campaign": row["qr__campaign"],
+                    "scans": 0,
+                })
+                code["scans"] += qr
+
+        topItems = sorted(items.values(), key=lambda row: -row["total"])[:25]
+        for row in topItems:
+            row["label"] = (
+                row["item__label"] or row["item__resolvedLabel"] or f"Item {row['item__id']}"
+            )
+
+        visitors, qrVisitors = _summaryVisitors(tree, codes, marks[rollups.SKETCH_CHECKPOINT_NAME])
+    for qrId, row in codes.items():
+        row["uniqueVisitors"] = qrVisitors.get(qrId, 0)
+    qrRows = sorted(codes.values(), key=lambda row: -row["scans"])
+
     return {
         "webTotal": webTotal,
         "qrTotal": qrTotal,
         "grandTotal": webTotal + qrTotal,
-        "uniqueVisitors": uniqueVisitors,
+        "uniqueVisitors": visitors,
         "topItems": topItems,
         "qrRows": qrRows,
     }
 
 
-def dailyEventTotals(events):
-    """Per-day, per-source counts as queryset rows ({day, source, total}).
+def dailyEventTotals(tree: LinkTree, sinceDay: datetime.date | None = None) -> list[dict]:
+    """Per-day, per-source counts for a tree as rows ({day, source, total}).
 
     Shared by the dashboard series and the CSV export so the group-by lives in
     one place.
     """
-    return (
-        events.annotate(day=TruncDate("occurredAt"))
-        .values("day", "source")
-        .annotate(total=Count("id"))
-        .order_by("day", "source")
+    counts = _countsBy(("day", "source"), sinceDay=sinceDay, tree=tree)
+    return [
+        {"day": day, "source": source, "total": total}
+        for (day, source), total in sorted(counts.items())
+    ]
+
+
+# Columns of the raw event export, in order. Deliberately no visitorHash or
+# destination: the export is for slicing traffic, not following visitors.
+EVENT_EXPORT_FIELDS = (
+    "occurredAt", "source", "item_id", "item__label", "qr__code", "qr__campaign",
+    "uaFamily", "referrerHost",
+)
+
+
+def eventRows(
+    tree: LinkTree,
+    startDay: datetime.date | None = None,
+    endDay: datetime.date | None = None,
+    campaign: str | None = None,
+    itemId: int | None = None,
+):
+    """One tree's privacy-safe raw events as ``EVENT_EXPORT_FIELDS`` tuples,
+    oldest first. ``startDay`` / ``endDay`` are inclusive UTC days.
+
+    Returns a lazy queryset; stream it with ``.iterator()`` - a busy tree's
+    full history is far too big to materialize.
+    """
+    events = LinkEvent.objects.filter(tree=tree)
+    if startDay is not None:
+        events = events.filter(occurredAt__gte=_dayStart(startDay))
+    if endDay is not None:
+        events = events.filter(occurredAt__lt=_dayStart(endDay + datetime.timedelta(days=1)))
+    if campaign:
+        events = events.filter(qr__campaign=campaign)
+    if itemId is not None:
+        events = events.filter(item_id=itemId)
+    # (tree, occurredAt) is indexed, so this walks the index in order.
+    return events.order_by("occurredAt", "id").values_list(*EVENT_EXPORT_FIELDS)
+
+
+# The event feed: keyset pages over (occurredAt, id). A cursor is the last
+# row a client has seen, so polling with it returns only newer events, and a
+# page costs the same at the end of the log as at the start - no OFFSET, no
+# COUNT. Only events older than the settle horizon are served: a buffered
+# event is stamped at click time but written seconds later, and must not land
+# behind a cursor a client has already moved past.
+FEED_PAGE_SIZE = 500
+MAX_FEED_PAGE_SIZE = 5000
+DEFAULT_FEED_SETTLE_SECONDS = 30
+
+
+def feedSettleSeconds() -> int:
+    return int(getattr(settings, "LINK_EVENT_FEED_SETTLE_SECONDS", DEFAULT_FEED_SETTLE_SECONDS))
+
+
+def encodeCursor(occurredAt: datetime.datetime, eventId: int) -> str:
+    raw = f"{occurredAt.astimezone(datetime.UTC).isoformat()}|{eventId}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decodeCursor(cursor: str) -> tuple[datetime.datetime, int]:
+    """Raises ValueError on anything ``encodeCursor`` didn't produce."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        occurredAt, eventId = raw.split("|")
+        occurredAt = datetime.datetime.fromisoformat(occurredAt)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("not a valid event cursor")
+    if occurredAt.tzinfo is None:
+        raise ValueError("not a valid event cursor")
+    return occurredAt, int(eventId)
+
+
+def eventFeed(
+    tree: LinkTree,
+    after: str | None = None,
+    startDay: datetime.date | None = None,
+    limit: int = FEED_PAGE_SIZE,
+    now: datetime.datetime | None = None,
+) -> dict:
+    """One page of a tree's raw events after cursor ``after`` (or from
+    ``startDay``, or the beginning), oldest first, as {"events": [(id,
+    *EVENT_EXPORT_FIELDS)], "next": cursor, "hasMore": bool}.
+
+    ``next`` is always set - to ``after`` when nothing new has settled - so a
+    poller can keep passing back whatever it was last given.
+    """
+    if now is None:
+        now = datetime.datetime.now(datetime.UTC)
+    limit = max(1, min(limit, MAX_FEED_PAGE_SIZE))
+    events = LinkEvent.objects.filter(
+        tree=tree, occurredAt__lte=now - datetime.timedelta(seconds=feedSettleSeconds()),
     )
+    if after:
+        afterAt, afterId = decodeCursor(after)
+        events = events.filter(Q(occurredAt__gt=afterAt) | Q(occurredAt=afterAt, id__gt=afterId))
+    elif startDay is not None:
+        events = events.filter(occurredAt__gte=_dayStart(startDay))
+    # (tree, occurredAt) is indexed, and SQLite keeps the rowid in the index,
+    # so this is a range scan in order.
+    rows = list(events.order_by("occurredAt", "id").values_list("id", *EVENT_EXPORT_FIELDS)[:limit + 1])
+    hasMore = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "events": rows,
+        "next": encodeCursor(rows[-1][1], rows[-1][0]) if rows else after,
+        "hasMore": hasMore,
+    }
+
+
+GRANULARITIES = ("hour", "day", "week", "month")
+# Hourly buckets come from raw events (the rollup is daily), so they are
+# limited to short ranges - and to events retention hasn't pruned yet.
+MAX_HOURLY_DAYS = 14
+DEFAULT_SERIES_CACHE_SECONDS = 60 * 60 * 24
+
+
+def seriesCacheSeconds() -> int:
+    return int(getattr(settings, "LINK_METRICS_SERIES_CACHE_SECONDS", DEFAULT_SERIES_CACHE_SECONDS))
+
+
+def defaultSeriesRange(windowDays: int = METRICS_WINDOW_DAYS) -> tuple[datetime.date, datetime.date]:
+    """The dashboard's default (startDay, endDay): the last ``windowDays``
+    through today, UTC."""
+    return _windowStartDay(windowDays), datetime.datetime.now(datetime.UTC).date()
+
+
+def bucketStart(value, granularity: str):
+    """The bucket a UTC day (or, for "hour", a UTC datetime) falls in: the
+    hour, the day, the Monday of its week, or the 1st of its month."""
+    if granularity == "hour":
+        return value.astimezone(datetime.UTC).replace(minute=0, second=0, microsecond=0)
+    if granularity == "week":
+        return value - datetime.timedelta(days=value.weekday())
+    if granularity == "month":
+        return value.replace(day=1)
+    return value
+
 
+def _nextBucket(start, granularity: str):
+    if granularity == "hour":
+        return start + datetime.timedelta(hours=1)
+    if granularity == "week":
+        return start + datetime.timedelta(days=7)
+    if granularity == "month":
+        return (start + datetime.timedelta(days=31)).replace(day=1)
+    return start + datetime.timedelta(days=1)
 
-def dailySeries(events, windowDays: int = METRICS_WINDOW_DAYS) -> list[dict]:
-    """Daily web/qr/total rows for the last ``windowDays``, with a bar-width pct."""
-    recent = events.filter(occurredAt__gte=_windowStart(windowDays))
-    byDay: dict[datetime.date, dict[str, int]] = {}
-    for row in dailyEventTotals(recent):
-        bucket = byDay.setdefault(row["day"], {"web": 0, "qr": 0})
-        if row["source"] == LinkEvent.Source.WEB:
-            bucket["web"] += row["total"]
+
+_ROLLUP_BUCKETS = {
+    "day": F("day"),
+    "week": TruncWeek("day"),
+    "month": TruncMonth("day"),
+}
+
+
+def _bucketTotals(
+    tree: LinkTree, startDay: datetime.date, endDay: datetime.date, granularity: str,
+) -> dict:
+    """{bucket start: [web, qr]} over [startDay, endDay], bucketed in SQL."""
+    isWeb = Q(source=LinkEvent.Source.WEB)
+    isQr = Q(source=LinkEvent.Source.QR)
+    window = Q(occurredAt__gte=_dayStart(startDay),
+               occurredAt__lt=_dayStart(endDay + datetime.timedelta(days=1)))
+    totals: dict = {}
+
+    with _consistentRead():
+        if granularity == "hour":
+            grouped = [(
+                LinkEvent.objects.filter(window, tree=tree)
+                .annotate(bucket=TruncHour("occurredAt", tzinfo=datetime.UTC))
+                .values("bucket")
+                .annotate(web=Count("id", filter=isWeb), qr=Count("id", filter=isQr))
+            )]
         else:
-            bucket["qr"] += row["total"]
+            grouped = [
+                LinkEventDaily.objects.filter(tree=tree, day__gte=startDay, day__lte=endDay)
+                .annotate(bucket=_ROLLUP_BUCKETS[granularity])
+                .values("bucket")
+                .annotate(
+                    web=Sum("count", filter=isWeb, default=0),
+                    qr=Sum("count", filter=isQr, default=0),
+                ),
+                # The tail is small: group it by day and fold the days in below.
+                rollups.unrolledEvents().filter(window, tree=tree)
+                .annotate(bucket=rollups.utcDay())
+                .values("bucket")
+                .annotate(web=Count("id", filter=isWeb), qr=Count("id", filter=isQr)),
+            ]
+        for rows in grouped:
+            for row in rows.order_by():
+                total = totals.setdefault(bucketStart(row["bucket"], granularity), [0, 0])
+                total[0] += row["web"]
+                total[1] += row["qr"]
+    return totals
 
-    maxDay = max((b["web"] + b["qr"] for b in byDay.values()), default=0)
-    return [
-        {
-            "day": day,
-            "web": byDay[day]["web"],
-            "qr": byDay[day]["qr"],
-            "total": byDay[day]["web"] + byDay[day]["qr"],
-            "pct": round(100 * (byDay[day]["web"] + byDay[day]["qr"]) / maxDay) if maxDay else 0,
-        }
-        for day in sorted(byDay)
-    ]
+
+def _seriesVersion(tree: LinkTree) -> str:
+    """Changes whenever an event is recorded for ``tree``: its lifetime
+    counter, which every write bumps in the same transaction."""
+    counts = LinkCounter.objects.filter(tree=tree).values_list("webCount", "qrCount").first()
+    return "{}-{}".format(*counts) if counts else "0-0"
+
+
+def eventSeries(
+    tree: LinkTree,
+    startDay: datetime.date,
+    endDay: datetime.date,
+    granularity: str = "day",
+) -> list[dict]:
+    """Web/qr/total rows per ``granularity`` bucket over [startDay, endDay]
+    (inclusive UTC days), oldest first, with empty buckets zero-filled and a
+    bar-width pct. A week or month only partly inside the range counts just
+    the days inside it. Hour buckets are UTC hours.
+
+    Cached per (tree, range, granularity) under the tree's counter values, so
+    a new event moves every series of that tree to a fresh key and a quiet
+    tree's long-range view is a cache read.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+    if endDay < startDay:
+        raise ValueError("the range ends before it starts")
+    if granularity == "hour" and (endDay - startDay).days >= MAX_HOURLY_DAYS:
+        raise ValueError(f"hourly buckets are limited to {MAX_HOURLY_DAYS} days")
+
+    key = f"link-series:{tree.pk}:{startDay}:{endDay}:{granularity}:{_seriesVersion(tree)}"
+    series = cache.get(key)
+    if series is not None:
+        return series
+
+    totals = _bucketTotals(tree, startDay, endDay, granularity)
+    if granularity == "hour":
+        bucket, last = _dayStart(startDay), _dayStart(endDay) + datetime.timedelta(hours=23)
+    else:
+        bucket, last = bucketStart(startDay, granularity), bucketStart(endDay, granularity)
+    series = []
+    while bucket <= last:
+        web, qr = totals.get(bucket, (0, 0))
+        series.append({"start": bucket, "web": web, "qr": qr, "total": web + qr})
+        bucket = _nextBucket(bucket, granularity)
+
+    maxTotal = max((row["total"] for row in series), default=0)
+    for row in series:
+        row["pct"] = round(100 * row["total"] / maxTotal) if maxTotal else 0
+    cache.set(key, series, timeout=seriesCacheSeconds())
+    return series
+
+
+# Rows shown per breakdown on the dashboard; the rest are summed into OTHER.
+DIMENSION_ROWS = 10
+_DIMENSION_BLANK_LABELS = {
+    LinkEventDimensionDaily.Dimension.UA_FAMILY: "(unknown)",
+    LinkEventDimensionDaily.Dimension.REFERRER_HOST: "(direct)",
+}
+
+
+def dimensionBreakdowns(
+    tree: LinkTree,
+    startDay: datetime.date,
+    endDay: datetime.date,
+    limit: int | None = DIMENSION_ROWS,
+) -> dict[str, list[dict]]:
+    """Event counts by browser family and by referrer host over [startDay,
+    endDay] (inclusive UTC days), as {dimension: [{value, label, total,
+    pct}]}, busiest first, capped at ``limit`` rows plus one for the rest
+    (``limit=None`` for every row).
+
+    One query over ``LinkEventDimensionDaily`` and no raw events: unlike the
+    counts these are as of the last rollup run, not topped up from the tail.
+    """
+    rows = (
+        LinkEventDimensionDaily.objects
+        .filter(tree=tree, day__gte=startDay, day__lte=endDay)
+        .values_list("dimension", "value")
+        .annotate(total=Sum("count"))
+        .order_by()
+    )
+    totals: dict[str, dict[str, int]] = {
+        dimension: {} for dimension, _ in LinkEventDimensionDaily.DIMENSION_CHOICES
+    }
+    for dimension, value, total in rows:
+        totals[dimension][value] = total
+
+    breakdowns = {}
+    for dimension, counts in totals.items():
+        other = counts.pop(LinkEventDimensionDaily.OTHER, 0)
+        ranked = sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))
+        if limit is not None:
+            other += sum(total for _, total in ranked[limit:])
+            ranked = ranked[:limit]
+        if other:
+            ranked.append((LinkEventDimensionDaily.OTHER, other))
+        maxTotal = max((total for _, total in ranked), default=0)
+        breakdowns[dimension] = [
+            {
+                "value": value,
+                "label": value or _DIMENSION_BLANK_LABELS[dimension],
+                "total": total,
+                "pct": round(100 * total / maxTotal) if maxTotal else 0,
+            }
+            for value, total in ranked
+        ]
+    return breakdowns
+
+
+def dimensionDailyRows(
+    tree: LinkTree,
+    startDay: datetime.date | None = None,
+    endDay: datetime.date | None = None,
+):
+    """The stored per-day browser / referrer counts for a tree, as (day,
+    dimension, value, count) tuples by day, dimension, busiest first - for
+    the CSV export. Inclusive UTC days; open-ended when None."""
+    rows = LinkEventDimensionDaily.objects.filter(tree=tree)
+    if startDay is not None:
+        rows = rows.filter(day__gte=startDay)
+    if endDay is not None:
+        rows = rows.filter(day__lte=endDay)
+    return rows.order_by("day", "dimension", "-count", "value").values_list(
+        "day", "dimension", "value", "count",
+    )
@@ -0,0 +1,175 @@
+"""Rendered-page cache for PUBLIC link trees.
+
+A public tree page only changes when the tree or one of its items is edited,
+when ``sync_link_tree_wiki`` rewrites an item's resolved url/title, or when an
+item's ``visibleFrom`` / ``visibleUntil`` boundary passes. So the rendered HTML
+is cached under the tree's slug plus a per-tree *version*:
+
+* The version is a random token kept in the cache. Any save/delete of the tree
+  or one of its items replaces it (``signals.py``), which orphans every page
+  rendered under the old one - no key scanning, no explicit deletes.
+* A page's TTL is capped at the next visibility-window boundary of any of the
+  tree's items, so a link scheduled to appear at 18:00 is never hidden behind
+  a page cached at 17:59.
+
+The version is read *before* the tree is loaded, so a page stored under a
+version is never older than the data that version stands for; an edit racing a
+render at worst stores a page under a version nobody will ask for again.
+
+MEMBERS trees are never cached here - their gate depends on the session.
+
+Every page (public or members) also carries HTTP validators - an ETag and a
+Last-Modified computed from the tree, the items it shows, and the template
+(``validators``) - so a revisit is a 304, and ``Cache-Control`` lets browsers
+and the nginx micro-cache keep public pages briefly (``browserMaxAge``). The
+validators are stored with a cached page, so a warm conditional GET is
+answered without touching the database.
+"""
+
+import dataclasses
+import datetime
+import functools
+import hashlib
+import math
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.template.loader import get_template
+
+DEFAULT_TTL_SECONDS = 300
+DEFAULT_BROWSER_MAX_AGE = 60
+TEMPLATE_NAME = "linktree/tree.html"
+
+_VERSION_KEY = "linktree:page-version:{slug}"
+_PAGE_KEY = "linktree:page:{slug}:{version}:{variant}"
+
+
+def _newVersion() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def treeVersion(slug: str) -> str:
+    """The tree's current page version, minting one if none is cached yet."""
+    key = _VERSION_KEY.format(slug=slug)
+    version = cache.get(key)
+    if version is None:
+        version = _newVersion()
+        # add() so two first requests racing don't each mint a version.
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key) or version
+    return version
+
+
+def _bump(slugs) -> None:
+    for slug in slugs:
+        if slug:
+            cache.set(_VERSION_KEY.format(slug=slug), _newVersion(), timeout=None)
+
+
+def bumpTreeVersion(*slugs: str) -> None:
+    """Invalidate every cached page of these trees.
+
+    Bumps immediately and again once the surrounding transaction commits: a
+    request that read the first bump could still have rendered the
+    not-yet-committed (old) rows, and the second bump orphans that page.
+    Outside a transaction on_commit runs at once, which is harmless.
+    """
+    _bump(slugs)
+    transaction.on_commit(lambda: _bump(slugs))
+
+
+def pageUrl(request) -> str:
+    """The page's canonical URL: scheme, host, and path, no query string.
+
+    The page embeds absolute og:url / og:image URLs built from the request, so
+    these are part of what was rendered. The query string is not - the
+    template's og:url is this URL too - so share links tagged ``?utm_source``
+    or ``?fbclid`` all hit one cached page and one ETag.
+    """
+    return request.build_absolute_uri(request.path)
+
+
+def _variant(request) -> str:
+    return hashlib.sha256(pageUrl(request).encode("utf-8")).hexdigest()[:16]
+
+
+def pageKey(request, slug: str, version: str) -> str:
+    return _PAGE_KEY.format(slug=slug, version=version, variant=_variant(request))
+
+
+def maxTtl() -> int:
+    return int(getattr(settings, "LINK_TREE_PAGE_CACHE_SECONDS", DEFAULT_TTL_SECONDS))
+
+
+def pageTtl(items, now: datetime.datetime | None = None) -> int:
+    """Seconds a render of these items stays correct, at most ``maxTtl()``.
+
+    ``items`` is every item on the tree (active or not - only the window
+    matters); a boundary already in the past can't change the page again.
+    """
+    if now is None:
+        now = datetime.datetime.now(datetime.UTC)
+    ttl = maxTtl()
+    for item in items:
+        for boundary in (item.visibleFrom, item.visibleUntil):
+            if boundary is not None and boundary > now:
+                ttl = min(ttl, math.ceil((boundary - now).total_seconds()))
+    return ttl
+
+
+def get(key: str):
+    return cache.get(key)
+
+
+def store(key: str, entry, ttl: int) -> None:
+    if ttl > 0:
+        cache.set(key, entry, timeout=ttl)
+
+
+def browserMaxAge() -> int:
+    return int(getattr(settings, "LINK_TREE_BROWSER_MAX_AGE", DEFAULT_BROWSER_MAX_AGE))
+
+
+@functools.cache
+def _templateDigest() -> str:
+    # The page's markup is part of what a validator vouches for: a deploy that
+    # changes the template must not keep answering 304 with the old page.
+    return hashlib.sha256(get_template(TEMPLATE_NAME).template.source.encode("utf-8")).hexdigest()
+
+
+@dataclasses.dataclass(frozen=True)
+class Validators:
+    etag: str
+    lastModified: int  # epoch seconds, as get_conditional_response expects
+
+
+def validators(request, tree, shownItems, allItems, now: datetime.datetime | None = None) -> Validators:
+    """ETag and Last-Modified for a tree page.
+
+    The ETag covers exactly what the page renders from: the template, the
+    page URL (the page embeds it), the tree, and each *shown* item's id,
+    order, last edit and last wiki resolution - so a visibility window
+    opening or closing changes the set and hence the tag. Last-Modified is the
+    latest of those edits and of any window boundary already passed (over
+    ``allItems``); deletes and reorders touch the tree's dateModified
+    (``signals.py`` / the reorder view) so they move it too.
+    """
+    if now is None:
+        now = datetime.datetime.now(datetime.UTC)
+    material = [_templateDigest(), pageUrl(request), str(tree.id), tree.dateModified.isoformat()]
+    for item in shownItems:
+        material.append(":".join((
+            str(item.id), str(item.order), item.dateModified.isoformat(),
+            item.resolvedAt.isoformat() if item.resolvedAt else "",
+        )))
+    etag = '"' + hashlib.sha256("\n".join(material).encode("utf-8")).hexdigest()[:32] + '"'
+
+    stamps = [tree.dateModified]
+    for item in allItems:
+        stamps.append(item.dateModified)
+        for stamp in (item.resolvedAt, item.visibleFrom, item.visibleUntil):
+            if stamp is not None and stamp <= now:
+                stamps.append(stamp)
+    return Validators(etag=etag, lastModified=int(max(stamps).timestamp()))
@@ -0,0 +1,154 @@
+"""Bulk QR export: every selected code's graphics in one streamed ZIP.
+
+Shared by the ``manage-qr-codes/export.zip`` view and the ``export_qr_codes``
+management command. Codes are rendered in batches: each batch's variants are
+looked up in the ``qrImages`` render cache in one read, the misses are drawn by
+a process pool (segno is pure Python, so threads would serialize on the GIL),
+and the results are written into the archive as the next chunk of output. The
+archive is written to a forward-only sink, never a seekable buffer, so memory
+is bounded by one batch of images no matter how many codes are exported.
+
+The pool uses the *spawn* start method: the web workers run background threads
+(the event buffer's flusher), and forking a threaded process can hand a child
+a lock that no thread will ever release.
+"""
+
+import concurrent.futures
+import csv
+import io
+import multiprocessing
+import os
+import zipfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from ..models import QRCode
+from . import qrImages
+
+# (format, ZIP compression): PNG is already deflated, SVG compresses well.
+FORMATS = (
+    ("svg", zipfile.ZIP_DEFLATED),
+    ("png", zipfile.ZIP_STORED),
+)
+BATCH_SIZE = 64
+
+
+def defaultWorkers() -> int:
+    return int(getattr(settings, "LINK_QR_EXPORT_WORKERS", min(4, os.cpu_count() or 1)))
+
+
+def selectCodes(campaign: str | None = None, tree=None, active: bool | None = None):
+    """The QR codes an export covers, in a stable order.
+
+    ``tree`` matches codes targeting the tree itself or one of its items.
+    """
+    codes = QRCode.objects.all()
+    if campaign is not None:
+        codes = codes.filter(campaign=campaign)
+    if tree is not None:
+        codes = codes.filter(Q(tree=tree) | Q(item__tree=tree))
+    if active is not None:
+        codes = codes.filter(isActive=active)
+    return codes.select_related("tree", "item", "item__tree").order_by("code")
+
+
+class _StreamSink(io.RawIOBase):
+    """A write-only, non-seekable file that hands back whatever was written
+    since the last ``drain()``. ZipFile notices it can't seek and writes data
+    descriptors after each member instead of patching local headers."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _renderBatch(specs: list, pool) -> dict:
+    """{spec: bytes} for ``specs``, from the render cache or freshly drawn."""
+    keys = {qrImages.cacheKey(spec): spec for spec in specs}
+    rendered = {keys[key]: content for key, content in cache.get_many(keys).items()}
+    missing = [spec for spec in specs if spec not in rendered]
+    if missing:
+        if pool is None:
+            drawn = map(qrImages.render, missing)
+        else:
+            drawn = pool.map(qrImages.render, missing)
+        fresh = dict(zip(missing, drawn))
+        cache.set_many(
+            {qrImages.cacheKey(spec): content for spec, content in fresh.items()},
+            timeout=qrImages.cacheSeconds(),
+        )
+        rendered.update(fresh)
+    return rendered
+
+
+def _batches(iterable, size: int):
+    batch = []
+    for value in iterable:
+        batch.append(value)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def streamZip(codes, baseUrl: str, workers: int | None = None, batchSize: int = BATCH_SIZE):
+    """Yield the export ZIP for ``codes`` as a sequence of byte chunks.
+
+    ``baseUrl`` (scheme + host) is prefixed to each code's scan path, since the
+    image must encode an absolute URL. Layout: ``svg/<code>.svg``,
+    ``png/<code>.png``, and a ``manifest.csv`` listing each code's label,
+    campaign, scan URL and current target.
+    """
+    if workers is None:
+        workers = defaultWorkers()
+    baseUrl = baseUrl.rstrip("/")
+    manifest = io.StringIO()
+    manifestWriter = csv.writer(manifest)
+    manifestWriter.writerow(["code", "label", "campaign", "active", "scan_url", "target_url"])
+
+    pool = None
+    if workers > 1:
+        pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+        )
+    sink = _StreamSink()
+    try:
+        with zipfile.ZipFile(sink, mode="w") as archive:
+            for batch in _batches(codes.iterator(chunk_size=batchSize), batchSize):
+                specs = {
+                    (qr.code, fmt): qrImages.QrRender(scanUrl=baseUrl + qr.scanUrl(), fmt=fmt)
+                    for qr in batch
+                    for fmt, _ in FORMATS
+                }
+                rendered = _renderBatch(list(specs.values()), pool)
+                for qr in batch:
+                    for fmt, compression in FORMATS:
+                        archive.writestr(
+                            f"{fmt}/{qr.code}.{fmt}",
+                            rendered[specs[(qr.code, fmt)]],
+                            compress_type=compression,
+                        )
+                    manifestWriter.writerow([
+                        qr.code, qr.label, qr.campaign, "yes" if qr.isActive else "no",
+                        baseUrl + qr.scanUrl(), qr.targetUrl() or "",
+                    ])
+                yield sink.drain()
+            archive.writestr("manifest.csv", manifest.getvalue())
+        yield sink.drain()
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
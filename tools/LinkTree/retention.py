@@ -0,0 +1,189 @@
+"""Retention for raw LinkEvents: archive, delete, reclaim space.
+
+Raw events are only needed for as long as someone might want them row by row;
+the metrics read the daily rollup and visitor sketches (``rollups.py``) and
+never go back to old raw rows. So events older than the retention age are:
+
+1. **Rolled up first.** Only events both rollup passes have already folded in
+   are eligible, so pruning never changes a count on the dashboard.
+2. **Archived** (when an archive directory is configured) as gzipped CSV
+   parts partitioned by UTC day - ``YYYY/MM/DD/events-<firstId>.csv.gz`` -
+   for any later one-off analysis. No visitorHash: it is only meaningful
+   within its day, and the sketches already hold what it was for.
+3. **Deleted** in id-ordered batches, each batch's delete and the
+   ``RollupCheckpoint`` advance committed together, so an interrupted run
+   resumes exactly where it stopped.
+
+What is pruned is always a contiguous id *prefix* of the log - everything
+before the first event that is still too young or not yet rolled up - so the
+checkpoint alone says what is gone, and later lookups never skip a straggler.
+
+Afterwards ``reclaimSpace`` returns the freed pages to the filesystem on
+SQLite (incremental vacuum, or a one-off full VACUUM that switches the file
+into incremental mode).
+
+Driven by the ``prune_link_events`` management command, which Huey schedules
+weekly (tools/tasks.py pruneLinkEvents).
+"""
+
+import csv
+import datetime
+import gzip
+import logging
+import os
+import pathlib
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Min
+
+from ..models import LinkEvent, RollupCheckpoint
+from . import rollups
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = rollups.PRUNE_CHECKPOINT_NAME
+DEFAULT_RETENTION_DAYS = 400
+DEFAULT_BATCH_SIZE = 10_000
+
+ARCHIVE_FIELDS = (
+    "id", "occurredAt", "source", "tree_id", "item_id", "qr_id",
+    "destinationUrl", "uaFamily", "referrerHost",
+)
+
+
+def retentionDays() -> int:
+    return int(getattr(settings, "LINK_EVENT_RETENTION_DAYS", DEFAULT_RETENTION_DAYS))
+
+
+def archiveDir() -> str:
+    return getattr(settings, "LINK_EVENT_ARCHIVE_DIR", "")
+
+
+def cutoffFor(days: int, now: datetime.datetime | None = None) -> datetime.datetime:
+    if now is None:
+        now = datetime.datetime.now(datetime.UTC)
+    return now - datetime.timedelta(days=days)
+
+
+def prunableThrough(cutoff: datetime.datetime) -> int:
+    """The last event id that may be pruned: below the first event at or after
+    ``cutoff`` and within every rollup pass's high-water mark."""
+    limit = min(rollups.highWaterMarks(
+        rollups.CHECKPOINT_NAME, rollups.SKETCH_CHECKPOINT_NAME, rollups.DIMENSION_CHECKPOINT_NAME,
+    ).values())
+    firstYoung = LinkEvent.objects.filter(occurredAt__gte=cutoff).aggregate(first=Min("id"))["first"]
+    if firstYoung is not None:
+        limit = min(limit, firstYoung - 1)
+    return limit
+
+
+def _archivePath(root: pathlib.Path, day: datetime.date, firstId: int) -> pathlib.Path:
+    return root / f"{day:%Y}" / f"{day:%m}" / f"{day:%d}" / f"events-{firstId}.csv.gz"
+
+
+def _partFirstId(path: pathlib.Path) -> int | None:
+    try:
+        return int(path.name.removeprefix("events-").removesuffix(".csv.gz"))
+    except ValueError:
+        return None
+
+
+def _discardStaleParts(root: pathlib.Path, resumeFrom: int) -> None:
+    """Remove parts a previous, interrupted run wrote for events it never got
+    to delete - they are about to be written again."""
+    for path in root.glob("*/*/*/events-*.csv.gz"):
+        firstId = _partFirstId(path)
+        if firstId is not None and firstId > resumeFrom:
+            path.unlink()
+
+
+def _writeArchive(root: pathlib.Path, rows: list[tuple]) -> int:
+    """Write one batch's rows as per-day parts. Returns the number of parts."""
+    byDay: dict[datetime.date, list[tuple]] = {}
+    occurredAtIndex = ARCHIVE_FIELDS.index("occurredAt")
+    for row in rows:
+        byDay.setdefault(row[occurredAtIndex].astimezone(datetime.UTC).date(), []).append(row)
+    for day, dayRows in byDay.items():
+        path = _archivePath(root, day, dayRows[0][0])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename, so a crash never leaves a truncated part behind.
+        partial = path.with_suffix(".partial")
+        with gzip.open(partial, "wt", newline="", encoding="utf-8") as out:
+            writer = csv.writer(out)
+            writer.writerow(ARCHIVE_FIELDS)
+            for row in dayRows:
+                writer.writerow(
+                    value.astimezone(datetime.UTC).isoformat() if i == occurredAtIndex else value
+                    for i, value in enumerate(row)
+                )
+        os.replace(partial, path)
+    return len(byDay)
+
+
+def pruneEvents(
+    cutoff: datetime.datetime,
+    archiveTo: str = "",
+    batchSize: int = DEFAULT_BATCH_SIZE,
+) -> dict:
+    """Archive (if ``archiveTo``) and delete the prunable events before
+    ``cutoff``. Returns {"deleted", "archiveParts", "throughId"}."""
+    # Bring the rollup up to date first so everything old is eligible.
+    rollups.rollupNewEvents()
+    through = prunableThrough(cutoff)
+    root = pathlib.Path(archiveTo) if archiveTo else None
+    if root is not None:
+        _discardStaleParts(root, rollups.highWaterMark(CHECKPOINT_NAME))
+
+    deleted = 0
+    parts = 0
+    while True:
+        with transaction.atomic():
+            checkpoint, _ = RollupCheckpoint.objects.get_or_create(name=CHECKPOINT_NAME)
+            if checkpoint.lastEventId >= through:
+                break
+            endAt = min(checkpoint.lastEventId + batchSize, through)
+            batch = LinkEvent.objects.filter(id__gt=checkpoint.lastEventId, id__lte=endAt)
+            if root is not None:
+                rows = list(batch.order_by("id").values_list(*ARCHIVE_FIELDS))
+                if rows:
+                    parts += _writeArchive(root, rows)
+            deleted += batch.delete()[0]
+            checkpoint.lastEventId = endAt
+            checkpoint.save()
+
+    if deleted:
+        logger.info(
+            "Pruned %s LinkEvent(s) older than %s through id %s (%s archive part(s))",
+            deleted, cutoff.isoformat(), through, parts,
+        )
+    return {"deleted": deleted, "archiveParts": parts, "throughId": through}
+
+
+def reclaimSpace(full: bool = False) -> int:
+    """Return freed database pages to the filesystem; returns how many.
+
+    SQLite only (a no-op elsewhere). Incremental vacuum only works on a file
+    in ``auto_vacuum=INCREMENTAL`` mode; ``full`` switches the file into it and
+    rewrites it with a full VACUUM - run that once, at a quiet time, since it
+    locks the database while it copies every page. Never runs inside a
+    transaction, where SQLite refuses to VACUUM.
+    """
+    if connection.vendor != "sqlite" or connection.in_atomic_block:
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA freelist_count")
+        before = cursor.fetchone()[0]
+        if full:
+            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            cursor.execute("VACUUM")
+        else:
+            cursor.execute("PRAGMA auto_vacuum")
+            if cursor.fetchone()[0] != 2:  # 2 = INCREMENTAL
+                return 0
+            # execute() steps the pragma once, freeing a single page;
+            # executescript runs it to completion.
+            cursor.executescript("PRAGMA incremental_vacuum;")
+        cursor.execute("PRAGMA freelist_count")
+        after = cursor.fetchone()[0]
+    return max(before - after, 0)
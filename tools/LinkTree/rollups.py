@@ -0,0 +1,317 @@
+"""Incremental daily rollup of LinkEvent into LinkEventDaily.
+
+``LinkEvent`` is append-only, so its history never changes once written: the
+rollup walks it forward by id from a high-water mark (a ``RollupCheckpoint``),
+folds each batch into per-(tree, item, qr, day, source) counts, and advances
+the mark in the same transaction - a crash mid-run never double counts, and
+the next run simply resumes. The metrics (``metrics.py``) read the rollup plus
+the *tail* of raw events past the mark, so their answers are exact whether or
+not the rollup is current; the rollup only decides how much raw data they scan.
+
+Ids are a safe watermark because SQLite serializes writers: an event with a
+lower id than one already visible has already been committed. (Postgres can
+commit ids out of order; revisit this before moving off SQLite.)
+
+The same run folds each event's ``visitorHash`` into per-day HyperLogLog
+sketches (``VisitorSketch``, one per tree and one per QR code) and into a
+running all-time sketch of each (``LifetimeVisitorSketch``) under a
+checkpoint of their own, so a sketch pass added after the counts simply
+backfills itself from the start of the log. A third pass, likewise
+checkpointed, counts each tree's events per day by browser family and
+referrer host (``LinkEventDimensionDaily``), keeping only the first
+``LINK_DIMENSION_TOP_N`` values of a tree-day and folding later ones into
+``OTHER``.
+
+Driven by the ``rollup_link_events`` management command, which Huey schedules
+(tools/tasks.py rollupLinkEvents); ``--rebuild`` backfills from scratch.
+"""
+
+import datetime
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.db.models.functions import TruncDate
+
+from ..models import (
+    LifetimeVisitorSketch, LinkEvent, LinkEventDaily, LinkEventDimensionDaily, RollupCheckpoint,
+    VisitorSketch,
+)
+from .hll import HyperLogLog
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = "linkEventDaily"
+SKETCH_CHECKPOINT_NAME = "visitorSketch"
+DIMENSION_CHECKPOINT_NAME = "linkEventDimension"
+# Owned by retention.py: the last event id deleted from the raw log.
+PRUNE_CHECKPOINT_NAME = "linkEventRetention"
+DEFAULT_BATCH_SIZE = 50_000
+DEFAULT_DIMENSION_TOP_N = 25
+
+# Fields that identify a rollup row, shared by the raw-event grouping below.
+KEY_FIELDS = ("tree", "item", "qr", "day", "source")
+
+
+def utcDay(field: str = "occurredAt") -> TruncDate:
+    """The UTC calendar day of a datetime field.
+
+    Explicitly UTC: TimezoneMiddleware activates the viewer's zone for the
+    request, and rollup days must not depend on who is looking.
+    """
+    return TruncDate(field, tzinfo=datetime.UTC)
+
+
+def dimensionTopN() -> int:
+    return int(getattr(settings, "LINK_DIMENSION_TOP_N", DEFAULT_DIMENSION_TOP_N))
+
+
+def highWaterMark(name: str = CHECKPOINT_NAME) -> int:
+    """The id of the last LinkEvent folded into LinkEventDaily (or, by
+    ``name``, another pass's output) - 0 if none."""
+    return (
+        RollupCheckpoint.objects.filter(name=name)
+        .values_list("lastEventId", flat=True)
+        .first()
+    ) or 0
+
+
+def highWaterMarks(*names: str) -> dict[str, int]:
+    """``highWaterMark`` for several passes in one query, as {name: id}."""
+    marks = dict.fromkeys(names, 0)
+    marks.update(
+        RollupCheckpoint.objects.filter(name__in=names).values_list("name", "lastEventId")
+    )
+    return marks
+
+
+def unrolledEvents(name: str = CHECKPOINT_NAME, mark: int | None = None):
+    """Raw events not yet in the rollup - what the metrics must top up from.
+    Pass ``mark`` when the high-water mark has already been read."""
+    if mark is None:
+        mark = highWaterMark(name)
+    return LinkEvent.objects.filter(id__gt=mark)
+
+
+def _mergeBatch(startAfter: int, endAt: int) -> int:
+    """Fold events (startAfter, endAt] into LinkEventDaily. Returns the count."""
+    grouped = list(
+        LinkEvent.objects.filter(id__gt=startAfter, id__lte=endAt)
+        .annotate(day=utcDay())
+        .values(*KEY_FIELDS)
+        .annotate(total=Count("id"))
+        .order_by()
+    )
+    if not grouped:
+        return 0
+
+    days = {row["day"] for row in grouped}
+    existing = {
+        (row.tree_id, row.item_id, row.qr_id, row.day, row.source): row
+        for row in LinkEventDaily.objects.filter(day__in=days)
+    }
+    toCreate = []
+    toUpdate = []
+    for row in grouped:
+        key = tuple(row[field] for field in KEY_FIELDS)
+        if key in existing:
+            daily = existing[key]
+            daily.count += row["total"]
+            toUpdate.append(daily)
+        else:
+            toCreate.append(LinkEventDaily(
+                tree_id=row["tree"], item_id=row["item"], qr_id=row["qr"],
+                day=row["day"], source=row["source"], count=row["total"],
+            ))
+    LinkEventDaily.objects.bulk_update(toUpdate, ["count"])
+    LinkEventDaily.objects.bulk_create(toCreate)
+    return sum(row["total"] for row in grouped)
+
+
+def _mergeSketchBatch(startAfter: int, endAt: int) -> int:
+    """Fold the visitor hashes of events (startAfter, endAt] into the day's
+    tree and QR sketches and their lifetime sketches. Returns how many hashes
+    were added."""
+    batch: dict[tuple, HyperLogLog] = {}
+    added = 0
+    events = (
+        LinkEvent.objects.filter(id__gt=startAfter, id__lte=endAt)
+        .exclude(visitorHash="")
+        .annotate(day=utcDay())
+        .values_list("tree", "qr", "day", "visitorHash")
+    )
+    for treeId, qrId, day, visitorHash in events.iterator(chunk_size=5000):
+        if treeId is not None:
+            batch.setdefault((treeId, None, day), HyperLogLog()).add(visitorHash)
+        if qrId is not None:
+            batch.setdefault((None, qrId, day), HyperLogLog()).add(visitorHash)
+        added += 1
+    if not batch:
+        return 0
+
+    existing = {
+        (row.tree_id, row.qr_id, row.day): row
+        for row in VisitorSketch.objects.filter(day__in={key[2] for key in batch})
+    }
+    toCreate = []
+    toUpdate = []
+    for (treeId, qrId, day), sketch in batch.items():
+        row = existing.get((treeId, qrId, day))
+        if row is not None:
+            sketch.mergeBytes(row.registers)
+            row.registers = sketch.toBytes()
+            toUpdate.append(row)
+        else:
+            toCreate.append(VisitorSketch(
+                tree_id=treeId, qr_id=qrId, day=day, registers=sketch.toBytes(),
+            ))
+    VisitorSketch.objects.bulk_update(toUpdate, ["registers"])
+    VisitorSketch.objects.bulk_create(toCreate)
+    _mergeLifetimeSketches(batch)
+    return added
+
+
+def _mergeLifetimeSketches(batch: dict[tuple, HyperLogLog]) -> None:
+    """Fold a batch's (tree, qr, day) sketches into each tree's and QR code's
+    lifetime sketch."""
+    lifetime: dict[tuple, HyperLogLog] = {}
+    for (treeId, qrId, _day), sketch in batch.items():
+        lifetime.setdefault((treeId, qrId), HyperLogLog()).merge(sketch)
+    treeIds = {treeId for treeId, _ in lifetime if treeId is not None}
+    qrIds = {qrId for _, qrId in lifetime if qrId is not None}
+    existing = {
+        (row.tree_id, row.qr_id): row
+        for row in LifetimeVisitorSketch.objects.filter(Q(tree_id__in=treeIds) | Q(qr_id__in=qrIds))
+    }
+    toCreate = []
+    toUpdate = []
+    for (treeId, qrId), sketch in lifetime.items():
+        row = existing.get((treeId, qrId))
+        if row is not None:
+            sketch.mergeBytes(row.registers)
+            row.registers = sketch.toBytes()
+            toUpdate.append(row)
+        else:
+            toCreate.append(LifetimeVisitorSketch(tree_id=treeId, qr_id=qrId, registers=sketch.toBytes()))
+    LifetimeVisitorSketch.objects.bulk_update(toUpdate, ["registers"])
+    LifetimeVisitorSketch.objects.bulk_create(toCreate)
+
+
+def _mergeDimensionBatch(startAfter: int, endAt: int) -> int:
+    """Fold events (startAfter, endAt] into the per-tree, per-day browser and
+    referrer counts. Returns how many events were counted.
+
+    A tree-day's first ``dimensionTopN()`` values get rows of their own (the
+    batch's busiest claim free slots first); any further value is added to
+    the tree-day's ``OTHER`` row. Capping as rows arrive, rather than re-ranking
+    history, keeps each batch a pure append - the same as the counts.
+    """
+    events = LinkEvent.objects.filter(id__gt=startAfter, id__lte=endAt, tree__isnull=False)
+    grouped: dict[tuple, int] = {}
+    counted = 0
+    for dimension in (LinkEventDimensionDaily.Dimension.UA_FAMILY,
+                      LinkEventDimensionDaily.Dimension.REFERRER_HOST):
+        rows = (
+            events.annotate(day=utcDay())
+            .values_list("tree", "day", dimension)
+            .annotate(total=Count("id"))
+            .order_by()
+        )
+        for treeId, day, value, total in rows:
+            grouped[(treeId, day, dimension, value)] = total
+            if dimension == LinkEventDimensionDaily.Dimension.UA_FAMILY:
+                counted += total
+    if not grouped:
+        return 0
+
+    existing: dict[tuple, LinkEventDimensionDaily] = {}
+    slotsUsed: dict[tuple, int] = {}
+    for row in LinkEventDimensionDaily.objects.filter(
+        day__in={key[1] for key in grouped}, tree_id__in={key[0] for key in grouped},
+    ):
+        existing[(row.tree_id, row.day, row.dimension, row.value)] = row
+        if row.value != LinkEventDimensionDaily.OTHER:
+            scope = (row.tree_id, row.day, row.dimension)
+            slotsUsed[scope] = slotsUsed.get(scope, 0) + 1
+
+    topN = dimensionTopN()
+    toCreate: dict[tuple, LinkEventDimensionDaily] = {}
+    toUpdate: dict[int, LinkEventDimensionDaily] = {}
+    for (treeId, day, dimension, value), total in sorted(grouped.items(), key=lambda kv: -kv[1]):
+        scope = (treeId, day, dimension)
+        key = (*scope, value)
+        if key not in existing and key not in toCreate:
+            if slotsUsed.get(scope, 0) < topN:
+                slotsUsed[scope] = slotsUsed.get(scope, 0) + 1
+            else:
+                key = (*scope, LinkEventDimensionDaily.OTHER)
+        row = existing.get(key)
+        if row is not None:
+            row.count += total
+            toUpdate[row.id] = row
+        elif key in toCreate:
+            toCreate[key].count += total
+        else:
+            toCreate[key] = LinkEventDimensionDaily(
+                tree_id=treeId, day=day, dimension=dimension, value=key[3], count=total,
+            )
+    LinkEventDimensionDaily.objects.bulk_update(toUpdate.values(), ["count"])
+    LinkEventDimensionDaily.objects.bulk_create(toCreate.values())
+    return counted
+
+
+def _advance(name: str, mergeBatch, latestId: int, batchSize: int) -> int:
+    """Run one pass forward from its checkpoint to ``latestId``, one id range
+    per transaction. Returns the sum of ``mergeBatch``'s results."""
+    merged = 0
+    while True:
+        with transaction.atomic():
+            checkpoint, _ = RollupCheckpoint.objects.get_or_create(name=name)
+            if checkpoint.lastEventId >= latestId:
+                break
+            endAt = min(checkpoint.lastEventId + batchSize, latestId)
+            merged += mergeBatch(checkpoint.lastEventId, endAt)
+            checkpoint.lastEventId = endAt
+            checkpoint.save()
+    return merged
+
+
+def rollupNewEvents(batchSize: int = DEFAULT_BATCH_SIZE) -> int:
+    """Fold every event past the high-water mark into the rollup (and the
+    visitor sketches and dimension counts past theirs). Returns how many
+    events were rolled up."""
+    latestId = LinkEvent.objects.aggregate(latest=Max("id"))["latest"] or 0
+    rolled = _advance(CHECKPOINT_NAME, _mergeBatch, latestId, batchSize)
+    sketched = _advance(SKETCH_CHECKPOINT_NAME, _mergeSketchBatch, latestId, batchSize)
+    _advance(DIMENSION_CHECKPOINT_NAME, _mergeDimensionBatch, latestId, batchSize)
+    if rolled:
+        logger.info("Rolled up %s LinkEvent(s) through id %s", rolled, latestId)
+    if sketched:
+        logger.info("Sketched %s visitor hash(es) through id %s", sketched, latestId)
+    return rolled
+
+
+class RebuildRefused(Exception):
+    """Raised by ``rebuild`` when raw events have been pruned: backfilling
+    from what is left would silently erase the pruned history."""
+
+
+def rebuild(batchSize: int = DEFAULT_BATCH_SIZE) -> int:
+    """Discard the rollup, sketches and dimension counts and backfill them
+    from every raw event."""
+    prunedThrough = highWaterMark(PRUNE_CHECKPOINT_NAME)
+    if prunedThrough:
+        raise RebuildRefused(
+            f"Raw events through id {prunedThrough} have been pruned; the rollup "
+            "is the only record of them and can't be rebuilt from raw events."
+        )
+    with transaction.atomic():
+        LinkEventDaily.objects.all().delete()
+        VisitorSketch.objects.all().delete()
+        LifetimeVisitorSketch.objects.all().delete()
+        LinkEventDimensionDaily.objects.all().delete()
+        RollupCheckpoint.objects.filter(
+            name__in=(CHECKPOINT_NAME, SKETCH_CHECKPOINT_NAME, DIMENSION_CHECKPOINT_NAME)
+        ).delete()
+    return rollupNewEvents(batchSize=batchSize)
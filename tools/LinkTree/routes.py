@@ -0,0 +1,126 @@
+"""In-process redirect resolution table for ``go`` and ``qr_redirect``.
+
+Resolving a click used to cost a ``select_related`` item lookup, and a scan a
+QRCode lookup plus ``resolveTarget()``'s lazy tree/item loads - several queries
+on the hottest path in the app, against the same SQLite file the event write
+needs. Instead each process keeps a table of every item and QR code's resolved
+``Route``, loaded in bulk (two queries) and reused until the shared *routes
+version* in the cache changes. ``signals.py`` bumps that version on any
+LinkTree / LinkTreeItem / QRCode save or delete, so every web worker reloads on
+its next redirect. A warm lookup is one cache read and no queries; only the
+event write touches the database.
+
+The destinations themselves still come from ``LinkTreeItem.destinationUrl()``
+and ``QRCode.resolveTarget()`` - the table caches their answers, it does not
+re-implement the target taxonomy.
+"""
+
+import dataclasses
+import threading
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+from ..models import LinkTree, LinkTreeItem, QRCode
+
+_VERSION_KEY = "linktree:routes-version"
+
+
+@dataclasses.dataclass(frozen=True)
+class Route:
+    """Everything a redirect needs: where to go, what to attribute it to, and
+    whether it may be served (and to whom)."""
+
+    destination: str | None
+    treeId: int | None
+    itemId: int | None
+    qrId: int | None
+    visibility: int
+    isActive: bool
+
+    def isMembersOnly(self) -> bool:
+        # Same contract as LinkTree.isMembersOnly so the members gate takes either.
+        return self.visibility == LinkTree.Visibility.MEMBERS
+
+
+@dataclasses.dataclass
+class RouteTable:
+    version: str
+    items: dict[int, Route]
+    qrCodes: dict[str, Route]
+
+
+_table: RouteTable | None = None
+_loadLock = threading.Lock()
+
+
+def _currentVersion() -> str:
+    version = cache.get(_VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex[:12]
+        if not cache.add(_VERSION_KEY, version, timeout=None):
+            version = cache.get(_VERSION_KEY) or version
+    return version
+
+
+def _bump() -> None:
+    cache.set(_VERSION_KEY, uuid.uuid4().hex[:12], timeout=None)
+
+
+def invalidate() -> None:
+    """Make every process reload its table on its next redirect.
+
+    Bumped now and again on commit, for the same reason as
+    ``pageCache.bumpTreeVersion``: a reload between the two could have read
+    the pre-commit rows.
+    """
+    _bump()
+    transaction.on_commit(_bump)
+
+
+def _load(version: str) -> RouteTable:
+    items = {}
+    for item in LinkTreeItem.objects.select_related("tree"):
+        items[item.id] = Route(
+            destination=item.destinationUrl(),
+            treeId=item.tree_id,
+            itemId=item.id,
+            qrId=None,
+            visibility=item.tree.visibility,
+            isActive=item.isActive and item.tree.isActive,
+        )
+
+    qrCodes = {}
+    for qr in QRCode.objects.select_related("tree", "item", "item__tree"):
+        destination, tree, item = qr.resolveTarget()
+        qrCodes[qr.code] = Route(
+            destination=destination,
+            treeId=tree.id if tree is not None else None,
+            itemId=item.id if item is not None else None,
+            qrId=qr.id,
+            # A raw-URL target has no tree and is public by design.
+            visibility=tree.visibility if tree is not None else LinkTree.Visibility.PUBLIC,
+            isActive=qr.isActive,
+        )
+    return RouteTable(version=version, items=items, qrCodes=qrCodes)
+
+
+def currentTable() -> RouteTable:
+    global _table
+    version = _currentVersion()
+    table = _table
+    if table is not None and table.version == version:
+        return table
+    with _loadLock:
+        if _table is None or _table.version != version:
+            _table = _load(version)
+        return _table
+
+
+def forItem(itemId: int) -> Route | None:
+    return currentTable().items.get(itemId)
+
+
+def forQrCode(code: str) -> Route | None:
+    return currentTable().qrCodes.get(code)
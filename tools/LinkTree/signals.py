@@ -0,0 +1,58 @@
+"""Cache invalidation for the Link Tree models: the public page cache
+(``pageCache.py``) and the redirect route table (``routes.py``).
+
+Connected in ``ToolsConfig.ready``. Every write path that goes through a
+model's ``save()`` / ``delete()`` - the admin, the management UI, and
+``sync_link_tree_wiki``'s resolved-url writes - lands here. Queryset
+``update()`` / ``bulk_update()`` bypass signals, so callers that use them must
+invalidate explicitly (see ``manage_link_tree_item_reorder``).
+"""
+
+import datetime
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from ..models import LinkTree, LinkTreeItem, QRCode
+from . import pageCache, routes
+
+
+def _treeSlug(treeId) -> str | None:
+    return LinkTree.objects.filter(pk=treeId).values_list("slug", flat=True).first()
+
+
+@receiver(pre_save, sender=LinkTree)
+def _rememberPreviousSlug(sender, instance, **kwargs):
+    # A renamed slug must drop the pages cached under the old one too, and
+    # post_save only sees the new value.
+    instance._previousSlug = _treeSlug(instance.pk) if instance.pk else None
+
+
+@receiver(post_save, sender=LinkTree)
+@receiver(post_delete, sender=LinkTree)
+def _invalidateTree(sender, instance, **kwargs):
+    pageCache.bumpTreeVersion(instance.slug, getattr(instance, "_previousSlug", None))
+    routes.invalidate()
+
+
+@receiver(post_save, sender=LinkTreeItem)
+@receiver(post_delete, sender=LinkTreeItem)
+def _invalidateItemTree(sender, instance, **kwargs):
+    pageCache.bumpTreeVersion(_treeSlug(instance.tree_id))
+    routes.invalidate()
+
+
+@receiver(post_delete, sender=LinkTreeItem)
+def _touchTreeOnItemDelete(sender, instance, **kwargs):
+    # A removed item leaves no dateModified behind, so the page's
+    # Last-Modified must come from the tree. update() skips the tree's own
+    # save signals (the handler above already invalidated).
+    LinkTree.objects.filter(pk=instance.tree_id).update(
+        dateModified=datetime.datetime.now(datetime.UTC)
+    )
+
+
+@receiver(post_save, sender=QRCode)
+@receiver(post_delete, sender=QRCode)
+def _invalidateQrCode(sender, instance, **kwargs):
+    routes.invalidate()
@@ -0,0 +1,151 @@
+"""Synthetic Link Tree traffic, for benchmarking the metrics and the redirects.
+
+Seeds throwaway trees (slugs starting ``synthetic-``), each with manual items
+and item-targeting QR codes, and an event log spread evenly over the last
+``days`` - ids ascend with time as in a real log, so the rollup and retention
+see realistic input. Traffic is skewed the way a real chapter's is: a few
+trees and links take most of the clicks, about a third of events are QR
+scans, and visitors repeat within a day.
+
+Events go through ``eventBuffer.writeEvents`` in large batches, so the
+lifetime counters stay consistent with the log. ``clearSynthetic`` removes
+everything seeded here - events, rollup rows and sketches included - and
+leaves real data alone. Never run this against production data you care
+about: it is millions of rows.
+"""
+
+import datetime
+import hashlib
+import itertools
+import random
+
+from django.db import transaction
+
+from ..models import (
+    LinkEvent, LinkEventDaily, LinkEventDimensionDaily, LinkTree, LinkTreeItem, QRCode, VisitorSketch,
+)
+from . import eventBuffer
+
+SLUG_PREFIX = "synthetic-"
+QR_SHARE = 0.3
+DEFAULT_BATCH_SIZE = 5000
+
+UA_FAMILIES = (
+    "mobile-safari", "mobile-chrome", "desktop-chrome", "desktop-firefox",
+    "desktop-safari", "mobile-other", "bot", "",
+)
+REFERRER_HOSTS = ("", "", "instagram.com", "t.co", "austindsa.org", "l.facebook.com")
+
+
+def _skewed(count: int) -> list[float]:
+    """Cumulative Zipf-like weights: the first of ``count`` choices is the
+    most popular, the tail long."""
+    return list(itertools.accumulate(1 / (rank + 1) for rank in range(count)))
+
+
+@transaction.atomic
+def seedTargets(trees: int, itemsPerTree: int, qrPerTree: int) -> list[LinkTree]:
+    """Create (or reuse) ``trees`` synthetic trees with their items and QR
+    codes. Idempotent, so a load test can re-run against the same targets."""
+    seeded = []
+    for n in range(trees):
+        slug = f"{SLUG_PREFIX}{n}"
+        tree, _ = LinkTree.objects.get_or_create(slug=slug, defaults={"title": f"Synthetic {n}"})
+        for order in range(itemsPerTree):
+            LinkTreeItem.objects.get_or_create(
+                tree=tree, order=order,
+                defaults={
+                    "kind": LinkTreeItem.Kind.MANUAL,
+                    "label": f"Link {order}",
+                    "url": f"https://example.org/{slug}/{order}",
+                },
+            )
+        items = list(tree.items.order_by("order"))
+        for index in range(min(qrPerTree, len(items))):
+            QRCode.objects.get_or_create(
+                code=f"{slug}-qr-{index}",
+                defaults={
+                    "label": f"Synthetic flyer {index}",
+                    "campaign": f"synthetic-{index % 2}",
+                    "item": items[index],
+                },
+            )
+        seeded.append(tree)
+    return seeded
+
+
+def seedEvents(
+    trees: list[LinkTree],
+    events: int,
+    days: int = 400,
+    seed: int = 0,
+    visitorsPerTree: int = 5000,
+    batchSize: int = DEFAULT_BATCH_SIZE,
+    progress=None,
+) -> int:
+    """Write ``events`` synthetic events across ``trees`` (from ``seedTargets``),
+    oldest first. ``progress(written)`` is called after each batch. Returns the
+    number written."""
+    rng = random.Random(seed)
+    targets = []
+    for tree in trees:
+        items = list(tree.items.order_by("order"))
+        codes = {code.item_id: code for code in QRCode.objects.filter(item__tree=tree)}
+        if items:
+            targets.append((tree, items, _skewed(len(items)), codes))
+    if not targets:
+        return 0
+    treeWeights = _skewed(len(targets))
+
+    end = datetime.datetime.now(datetime.UTC)
+    step = datetime.timedelta(days=days) / max(events, 1)
+    start = end - datetime.timedelta(days=days)
+
+    written = 0
+    while written < events:
+        rows = []
+        for i in range(written, min(written + batchSize, events)):
+            occurredAt = start + step * i
+            tree, items, itemWeights, codes = rng.choices(targets, cum_weights=treeWeights)[0]
+            item = rng.choices(items, cum_weights=itemWeights)[0]
+            code = codes.get(item.id)
+            isQr = code is not None and rng.random() < QR_SHARE
+            # Repeat visitors within a day; the hash rotates daily as in tracking.py.
+            visitor = int(rng.paretovariate(1.2)) % visitorsPerTree
+            visitorHash = hashlib.blake2b(
+                f"{tree.id}:{visitor}:{occurredAt:%Y-%m-%d}".encode(), digest_size=8,
+            ).hexdigest()
+            rows.append(dict(
+                tree_id=tree.id,
+                item_id=item.id,
+                qr_id=code.id if isQr else None,
+                source=LinkEvent.Source.QR if isQr else LinkEvent.Source.WEB,
+                occurredAt=occurredAt,
+                destinationUrl=item.url,
+                visitorHash=visitorHash,
+                uaFamily=rng.choice(UA_FAMILIES),
+                referrerHost="" if isQr else rng.choice(REFERRER_HOSTS),
+            ))
+        eventBuffer.writeEvents(rows)
+        written += len(rows)
+        if progress is not None:
+            progress(written)
+    return written
+
+
+@transaction.atomic
+def clearSynthetic() -> int:
+    """Delete every synthetic tree and all data hanging off it. Returns the
+    number of events deleted."""
+    trees = LinkTree.objects.filter(slug__startswith=SLUG_PREFIX)
+    codes = QRCode.objects.filter(code__startswith=SLUG_PREFIX)
+    # Events, rollup rows and sketches only SET_NULL on delete - remove them
+    # explicitly rather than leave them orphaned in the totals.
+    deleted = LinkEvent.objects.filter(tree__in=trees).delete()[0]
+    LinkEventDaily.objects.filter(tree__in=trees).delete()
+    LinkEventDimensionDaily.objects.filter(tree__in=trees).delete()
+    VisitorSketch.objects.filter(tree__in=trees).delete()
+    VisitorSketch.objects.filter(qr__in=codes).delete()
+    codes.delete()
+    trees.delete()
+    return deleted
@@ -10,7 +10,9 @@ The pure helpers (``visitorHash``, ``uaFamily``, ``referrerHost``,
 ``clientIpFromMeta``) are framework-light and unit-testable without a request.
 ``recordEvent`` performs the Django write and is deliberately exception-safe —
 mirroring the "a dropped email must never fail a publish" ethos elsewhere in the
-codebase, a tracking failure must never break a redirect.
+codebase, a tracking failure must never break a redirect. With
+``settings.LINK_EVENT_RECORDING = "buffered"`` it hands the row to the
+write-behind buffer in ``eventBuffer.py`` instead of writing inline.
 """
 
 import datetime
@@ -77,15 +79,20 @@ def referrerHost(referrer: str) -> str:
         return ""
 
 
-def recordEvent(request, *, source, tree=None, item=None, qr=None, destinationUrl: str = "") -> None:
-    """Write a LinkEvent for this request. Never raises.
+def recordEvent(request, *, source, treeId=None, itemId=None, qrId=None, destinationUrl: str = "") -> None:
+    """Write (or, in buffered mode, queue) a LinkEvent for this request. Never raises.
+
+    Takes ids rather than model instances so a redirect resolved from the route
+    table never has to load the rows it attributes the event to.
 
     Imported lazily so this module stays importable without Django configured
     (keeps the pure helpers unit-testable in isolation).
     """
     try:
         from django.conf import settings
-        from ..models import LinkEvent
+        from django.utils import timezone
+
+        from . import eventBuffer
 
         meta = request.META
         ip = clientIpFromMeta(meta)
@@ -93,16 +100,23 @@ def recordEvent(request, *, source, tree=None, item=None, qr=None, destinationUr
         # A dedicated salt so the chapter can rotate Django's SECRET_KEY without
         # silently resetting visitor-uniqueness continuity. Defaults to SECRET_KEY.
         salt = getattr(settings, "LINK_TRACKING_SALT", "") or settings.SECRET_KEY
-        LinkEvent.objects.create(
-            tree=tree,
-            item=item,
-            qr=qr,
+        row = dict(
+            tree_id=treeId,
+            item_id=itemId,
+            qr_id=qrId,
             source=source,
+            # Stamped now, not at write time, so a buffered event keeps the
+            # moment of the click.
+            occurredAt=timezone.now(),
             destinationUrl=destinationUrl or "",
             visitorHash=visitorHash(ip, ua, salt),
             uaFamily=uaFamily(ua),
             referrerHost=referrerHost(meta.get("HTTP_REFERER", "")),
         )
+        if eventBuffer.isBuffered():
+            eventBuffer.getBuffer().add(row)
+        else:
+            eventBuffer.writeEvents([row])
     except Exception:
         # Tracking is best-effort; a logging failure must never break a redirect.
         logger.exception("Failed to record LinkEvent (source=%s)", source)
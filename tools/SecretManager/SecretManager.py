@@ -20,7 +20,16 @@ def getZoomConfig() -> ZoomConfig:
 
 
 def getANAutomatorConfig() -> ANAutomatorConfig:
-    return ANAutomatorConfig(email=ANUserName(), password=ANPassword())
+    """Action Network login, plus the group API key (``None`` when not
+    configured), which backend publishes with it (``AN_PUBLISH_BACKEND``) and
+    where the API is (``AN_API_BASE_URL``)."""
+    return ANAutomatorConfig(
+        email=ANUserName(),
+        password=ANPassword(),
+        apiKey=ANApiKey(),
+        backend=settings.AN_PUBLISH_BACKEND,
+        apiBaseUrl=settings.AN_API_BASE_URL,
+    )
 
 
 def getGCalConfig() -> GoogleCalendarConfig:
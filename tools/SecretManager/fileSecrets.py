@@ -10,6 +10,9 @@ class Keys:
     ZOOM_CLIENT_SECRET = "ZoomClientSecret"
     AN_USERNAME = "AnUsername"
     AN_PASSWORD = "AnPassword"
+    # Action Network group API key. OPTIONAL (see OPTIONAL_KEYS): when absent,
+    # events are published by driving the Action Network editor in Chrome.
+    AN_API_KEY = "AnApiKey"
     # Not needed right now, assume the service key is in this directory
     # GOOGLE_SERVICE_KEY_PATH = "GoogleServiceKeyPath"
     GOOGLE_CAL_ID = "GoogleCalId"
@@ -25,6 +28,7 @@ class Keys:
 # Keys that are not required at import. The accessors below return None when an
 # optional key is missing; callers must handle the unconfigured case.
 OPTIONAL_KEYS = frozenset({
+    Keys.AN_API_KEY,
     Keys.OUTLINE_BASE_URL,
     Keys.OUTLINE_READ_API_TOKEN,
 })
@@ -68,6 +72,11 @@ def ANPassword():
     return secretObject[Keys.AN_PASSWORD]
 
 
+def ANApiKey():
+    # Optional — None when not configured (see OPTIONAL_KEYS).
+    return secretObject.get(Keys.AN_API_KEY)
+
+
 def GoogleServiceKeyPath():
     return os.path.join(os.path.dirname(os.path.abspath(__file__)), "serviceKey.json")
 
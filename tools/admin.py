@@ -3,8 +3,11 @@ from django.contrib.auth.admin import UserAdmin as DjangoUserAdmin, GroupAdmin a
 from django.contrib.auth.models import Group
 from django.contrib import admin
 from django.contrib.admin.widgets import FilteredSelectMultiple
+from django.core.paginator import Paginator
 from django.urls import reverse
-from django.utils.html import format_html
+from django.utils.functional import cached_property
+from django.utils.html import format_html, format_html_join
+from .EventAutomation import StageTimings
 from .models import *
 
 # --- Users & Groups ---------------------------------------------------------
@@ -77,13 +80,54 @@ class PublishJobAdmin(admin.ModelAdmin):
     decide manually whether to re-submit (precedent: the manual judgment in
     cancel_stuck_delegated_event). Never edit a row - the worker owns them."""
 
-    list_display = ("id", "kindLabel", "statusLabel", "creator", "createdAt", "finishedAt")
+    list_display = ("id", "kindLabel", "statusLabel", "creator", "createdAt", "finishedAt", "slowestStage")
     list_filter = ("status", "kind", "createdAt")
     readonly_fields = (
         "kind", "status", "payload", "conflicts", "errorMessage",
         "creator", "owner", "postedEvent", "delegatedEvent",
-        "createdAt", "startedAt", "finishedAt",
+        "createdAt", "startedAt", "finishedAt", "stageTimingsTable",
     )
+    # The change list opens with per-stage percentiles over this many of the
+    # most recent jobs that recorded timings
+    TIMING_SUMMARY_JOBS = 200
+
+    @admin.display(description="Slowest stage")
+    def slowestStage(self, obj):
+        if not obj.stageTimings:
+            return "-"
+        span = max(obj.stageTimings, key=lambda span: span["durationMs"])
+        return f"{span['stage']} ({span['durationMs'] / 1000:.1f}s)"
+
+    @admin.display(description="Stage timings")
+    def stageTimingsTable(self, obj):
+        if not obj.stageTimings:
+            return "-"
+        rows = format_html_join(
+            "",
+            "<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>",
+            (
+                (span["stage"], f"+{span['startMs']} ms", f"{span['durationMs']} ms", "ok" if span["ok"] else "failed")
+                for span in obj.stageTimings
+            ),
+        )
+        return format_html(
+            "<table><thead><tr><th>Stage</th><th>Started</th><th>Took</th><th>Outcome</th></tr></thead>"
+            "<tbody>{}</tbody></table>",
+            rows,
+        )
+
+    def changelist_view(self, request, extra_context=None):
+        recent = (
+            PublishJob.objects.exclude(stageTimings=[])
+            .order_by("-createdAt")
+            .values_list("stageTimings", flat=True)[: self.TIMING_SUMMARY_JOBS]
+        )
+        extra_context = {
+            **(extra_context or {}),
+            "stageSummary": StageTimings.summarize(list(recent)),
+            "stageSummaryJobs": self.TIMING_SUMMARY_JOBS,
+        }
+        return super().changelist_view(request, extra_context=extra_context)
 
     @admin.display(description="Kind")
     def kindLabel(self, obj):
@@ -201,11 +245,36 @@ class QRCodeAdmin(admin.ModelAdmin):
         )
 
 
+class LinkEventPaginator(Paginator):
+    """The admin paginator counts the whole queryset for every page - on an
+    unfiltered event log, a full scan of its largest table. This one counts at
+    most ``EXACT_COUNT_MAX + 1`` rows: exact below the cap, ``capped`` above it,
+    where the change list pages through the first ``EXACT_COUNT_MAX`` events
+    and says "more than". Every page it offers exists; filter by day or tree
+    to reach older events."""
+
+    EXACT_COUNT_MAX = 10_000
+
+    capped = False
+
+    @cached_property
+    def count(self):
+        count = self.object_list[:self.EXACT_COUNT_MAX + 1].count()
+        if count > self.EXACT_COUNT_MAX:
+            self.capped = True
+            return self.EXACT_COUNT_MAX
+        return count
+
+
 @admin.register(LinkEvent)
 class LinkEventAdmin(admin.ModelAdmin):
-    """Read-only spot-check view; real analysis lives in the metrics dashboard."""
+    """Read-only spot-check view; real analysis lives in the metrics dashboard,
+    and external tools page the raw log from its JSON event feed."""
     list_display = ("occurredAt", "get_source_display", "tree", "item", "qr", "uaFamily", "referrerHost")
     list_filter = ("source", "tree", "occurredAt")
+    paginator = LinkEventPaginator
+    # Don't count the unfiltered log a second time just for "N of M".
+    show_full_result_count = False
     readonly_fields = (
         "tree", "item", "qr", "source", "occurredAt",
         "destinationUrl", "visitorHash", "uaFamily", "referrerHost",
@@ -216,3 +285,45 @@ class LinkEventAdmin(admin.ModelAdmin):
 
     def has_change_permission(self, request, obj=None):
         return False
+
+
+@admin.register(LinkEventDaily)
+class LinkEventDailyAdmin(admin.ModelAdmin):
+    """Read-only view of the rollup the metrics read; rebuilt by
+    `manage.py rollup_link_events --rebuild`, never edited by hand."""
+    list_display = ("day", "get_source_display", "tree", "item", "qr", "count")
+    list_filter = ("source", "tree", "day")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(LinkEventDimensionDaily)
+class LinkEventDimensionDailyAdmin(admin.ModelAdmin):
+    """Read-only browser / referrer rollup behind the metrics breakdowns;
+    rebuilt with the counts by `manage.py rollup_link_events --rebuild`."""
+    list_display = ("day", "tree", "get_dimension_display", "value", "count")
+    list_filter = ("dimension", "tree", "day")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(LinkCounter)
+class LinkCounterAdmin(admin.ModelAdmin):
+    """Read-only lifetime totals behind the overview; rebuilt by
+    `manage.py reconcile_link_counters`, never edited by hand."""
+    list_display = ("__str__", "webCount", "qrCount", "lastEventAt")
+    list_select_related = ("tree", "item", "qr")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
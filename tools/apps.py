@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ToolsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "tools"
+
+    def ready(self):
+        # Registers the Link Tree cache-invalidation receivers.
+        from .LinkTree import signals  # noqa: F401
@@ -10,30 +10,39 @@ anyone can open, plus the tracked redirect endpoints a click/scan lands on:
 The rest are permission-gated (maintainers / metrics viewers):
 
     qr_image      GET /qr/<code>/image     generate the QR graphic (svg|png)   [manageLinkTree]
+    manage_qr_code_export GET /manage-qr-codes/export.zip  bulk QR ZIP        [manageLinkTree]
     link_metrics  GET /link-metrics[/<slug>]  analytics dashboard             [viewLinkMetrics]
-    link_metrics_csv GET /link-metrics/<slug>.csv  event export               [viewLinkMetrics]
+    link_metrics_csv GET /link-metrics/<slug>.csv  daily totals / raw events  [viewLinkMetrics]
+    link_metrics_live GET /link-metrics/<slug>/live  live counts (SSE)        [viewLinkMetrics]
 
 Redirect targets are always admin-controlled (a stored tree/item/QR target),
 never taken from a query parameter, so there is no open-redirect surface.
 """
 
 import csv
-import io
+import datetime
 import logging
-
-import segno
+import math
+import time
 
 from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib.auth.views import redirect_to_login
+from django.core.handlers.asgi import ASGIRequest
 from django.db import models, transaction
-from django.http import Http404, HttpResponse, HttpResponseRedirect
-from django.shortcuts import get_object_or_404, redirect, render
+from django.http import (
+    Http404, HttpResponse, HttpResponseBadRequest, HttpResponseRedirect, JsonResponse,
+    StreamingHttpResponse,
+)
+from django.shortcuts import aget_object_or_404, get_object_or_404, redirect, render
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 
 from . import permissions
 from .forms import LinkTreeItemForm, LinkTreeSettingsForm, QRCodeForm
-from .LinkTree import metrics, tracking
-from .models import LinkEvent, LinkTree, LinkTreeItem, QRCode
+from .LinkTree import liveCounters, metrics, pageCache, qrExport, qrImages, routes, tracking
+from .models import LinkEvent, LinkEventDimensionDaily, LinkTree, LinkTreeItem, QRCode
 
 logger = logging.getLogger(__name__)
 
@@ -43,13 +52,45 @@ logger = logging.getLogger(__name__)
 
 def _gateMembersTree(request, tree):
     """Return a login redirect if the tree is members-only and the user isn't
-    authenticated; otherwise None. Public trees are always allowed."""
+    authenticated; otherwise None. Public trees are always allowed.
+
+    ``tree`` is a LinkTree or a routes.Route - anything with isMembersOnly()."""
     if tree.isMembersOnly() and not request.user.is_authenticated:
         return redirect_to_login(request.get_full_path())
     return None
 
 
+def _conditionalOr(request, validators, buildResponse):
+    """A 304 if the client's copy is current, else ``buildResponse()``;
+    either way stamped with the page's ETag and Last-Modified."""
+    response = get_conditional_response(
+        request, etag=validators.etag, last_modified=validators.lastModified,
+    )
+    if response is None:
+        response = buildResponse()
+    response["ETag"] = validators.etag
+    response["Last-Modified"] = http_date(validators.lastModified)
+    return response
+
+
 def public_tree(request, slug):
+    # PUBLIC trees are served from the rendered-page cache (LinkTree/pageCache.py)
+    # when possible: one cache lookup instead of the ORM + a template render,
+    # and a revisit with a matching validator is a 304 straight from it.
+    # The version is read before the tree so a stored page is never staler
+    # than the version it is filed under.
+    version = pageCache.treeVersion(slug)
+    cacheKey = pageCache.pageKey(request, slug, version)
+    cached = pageCache.get(cacheKey)
+    if cached is not None:
+        response = _conditionalOr(
+            request, cached["validators"],
+            lambda: HttpResponse(cached["content"], content_type=cached["contentType"]),
+        )
+        remaining = math.floor(cached["expiresAt"] - time.time())
+        patch_cache_control(response, public=True, max_age=max(0, min(pageCache.browserMaxAge(), remaining)))
+        return response
+
     tree = get_object_or_404(
         LinkTree.objects.prefetch_related("items"), slug=slug, isActive=True
     )
@@ -61,60 +102,94 @@ def public_tree(request, slug):
     # that hasn't resolved yet (or a manual link with no url) is skipped rather
     # than rendered as a dead button.
     items = [item for item in tree.activeItems() if item.shouldDisplay()]
-    return render(request, "linktree/tree.html", {"tree": tree, "items": items})
+    allItems = tree.items.all()
+    validators = pageCache.validators(request, tree, items, allItems)
+    rendered = {}
+
+    def renderPage():
+        # Rendered without context processors: the page needs nothing from the
+        # session, and not touching it keeps "Vary: Cookie" off public pages
+        # so shared caches (nginx) can hold them.
+        rendered["response"] = HttpResponse(render_to_string(
+            pageCache.TEMPLATE_NAME,
+            {"tree": tree, "items": items, "request": request, "pageUrl": pageCache.pageUrl(request)},
+        ))
+        return rendered["response"]
+
+    response = _conditionalOr(request, validators, renderPage)
+    if tree.isMembersOnly():
+        # Per-session: browsers may keep it but must revalidate; proxies never.
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    ttl = pageCache.pageTtl(allItems)
+    patch_cache_control(response, public=True, max_age=min(pageCache.browserMaxAge(), ttl))
+    if "response" in rendered:
+        pageCache.store(
+            cacheKey,
+            {
+                "content": response.content,
+                "contentType": response["Content-Type"],
+                "validators": validators,
+                "expiresAt": time.time() + ttl,
+            },
+            ttl,
+        )
+    return response
 
 
 def go(request, item_id):
-    """Log a web click and redirect to the item's destination."""
-    item = get_object_or_404(
-        LinkTreeItem.objects.select_related("tree"), pk=item_id, isActive=True
-    )
-    if not item.tree.isActive:
-        raise Http404("link tree is inactive")
-    gate = _gateMembersTree(request, item.tree)
+    """Log a web click and redirect to the item's destination.
+
+    Resolved from the in-process route table (LinkTree/routes.py): no queries
+    unless the table is stale, so only the event write touches the database.
+    """
+    route = routes.forItem(item_id)
+    if route is None or not route.isActive:
+        raise Http404("link (or its link tree) is inactive")
+    gate = _gateMembersTree(request, route)
     if gate is not None:
         return gate
 
-    destination = item.destinationUrl()
-    if not destination:
+    if not route.destination:
         raise Http404("link has no destination yet")
 
     tracking.recordEvent(
         request,
         source=LinkEvent.Source.WEB,
-        tree=item.tree,
-        item=item,
-        destinationUrl=destination,
+        treeId=route.treeId,
+        itemId=route.itemId,
+        destinationUrl=route.destination,
     )
-    return HttpResponseRedirect(destination)
+    return HttpResponseRedirect(route.destination)
 
 
 def qr_redirect(request, code):
     """Log a QR scan and redirect to the code's current target (repointable)."""
-    qr = get_object_or_404(QRCode, code=code, isActive=True)
-    destination, tree, item = qr.resolveTarget()
-    if not destination:
+    route = routes.forQrCode(code)
+    if route is None or not route.isActive:
+        raise Http404("QR code not found")
+    if not route.destination:
         raise Http404("QR code has no target yet")
 
     # Honor the members-only wall the same way go()/public_tree() do: a QR whose
     # target resolves into a MEMBERS tree must not 302 an anonymous scanner
-    # straight to the destination. resolveTarget() gives us the owning tree for
-    # both tree- and item-targets; a rawUrl target has no tree and is public by
-    # design.
-    if tree is not None:
-        gate = _gateMembersTree(request, tree)
-        if gate is not None:
-            return gate
+    # straight to the destination. The route carries the owning tree's
+    # visibility for both tree- and item-targets; a rawUrl target has no tree
+    # and is public by design.
+    gate = _gateMembersTree(request, route)
+    if gate is not None:
+        return gate
 
     tracking.recordEvent(
         request,
         source=LinkEvent.Source.QR,
-        tree=tree,
-        item=item,
-        qr=qr,
-        destinationUrl=destination,
+        treeId=route.treeId,
+        itemId=route.itemId,
+        qrId=route.qrId,
+        destinationUrl=route.destination,
     )
-    return HttpResponseRedirect(destination)
+    return HttpResponseRedirect(route.destination)
 
 
 # MARK: QR image generation (maintainers only)
@@ -126,27 +201,26 @@ def qr_image(request, code):
 
     Encoding the scan URL (not the destination) is what makes a printed code
     repointable and every scan trackable. ?fmt=png|svg (default svg);
-    ?download=1 sends it as an attachment for printing.
+    ?download=1 sends it as an attachment for printing. ?scale=, ?border= and
+    ?error=l|m|q|h pick other variants, each cached separately.
+
+    Renders come from the content-addressed cache in LinkTree/qrImages.py, and
+    the strong ETag is that cache key, so a repeat fetch is a 304 without any
+    rendering.
     """
     qr = get_object_or_404(QRCode, code=code)
-    scanUrl = request.build_absolute_uri(qr.scanUrl())
+    spec = qrImages.fromParams(request.build_absolute_uri(qr.scanUrl()), request.GET)
 
-    fmt = (request.GET.get("fmt") or "svg").lower()
-    if fmt not in ("svg", "png"):
-        fmt = "svg"
-
-    image = segno.make(scanUrl, error="m")
-    buffer = io.BytesIO()
-    if fmt == "png":
-        image.save(buffer, kind="png", scale=10, border=2)
-        contentType = "image/png"
+    notModified = get_conditional_response(request, etag=spec.etag)
+    if notModified is not None:
+        response = notModified
     else:
-        image.save(buffer, kind="svg", scale=10, border=2)
-        contentType = "image/svg+xml"
-
-    response = HttpResponse(buffer.getvalue(), content_type=contentType)
-    disposition = "attachment" if request.GET.get("download") else "inline"
-    response["Content-Disposition"] = f'{disposition}; filename="qr-{qr.code}.{fmt}"'
+        response = HttpResponse(qrImages.cachedRender(spec), content_type=spec.contentType)
+        disposition = "attachment" if request.GET.get("download") else "inline"
+        response["Content-Disposition"] = f'{disposition}; filename="qr-{qr.code}.{spec.fmt}"'
+    response["ETag"] = spec.etag
+    # Gated behind manageLinkTree, so only the browser may keep a copy.
+    patch_cache_control(response, private=True, max_age=86400)
     return response
 
 
@@ -162,25 +236,268 @@ def link_metrics(request, slug=None):
         return render(request, "tools/link_metrics.html", {"overview": metrics.overviewRows()})
 
     tree = get_object_or_404(LinkTree, slug=slug)
+    try:
+        startDay, endDay, granularity = _seriesParams(request)
+        series = metrics.eventSeries(tree, startDay, endDay, granularity)
+    except ValueError as e:
+        return HttpResponseBadRequest(f"Bad range: {e}. start/end are YYYY-MM-DD.")
     context = metrics.treeSummary(tree)
     context["tree"] = tree
-    context["series"] = metrics.dailySeries(LinkEvent.objects.filter(tree=tree))
-    context["windowDays"] = metrics.METRICS_WINDOW_DAYS
+    context["series"] = series
+    context["seriesStart"] = startDay
+    context["seriesEnd"] = endDay
+    context["granularity"] = granularity
+    context["granularities"] = metrics.GRANULARITIES
+    breakdowns = metrics.dimensionBreakdowns(tree, startDay, endDay)
+    context["breakdownSections"] = [
+        (title, breakdowns[dimension]) for dimension, title in LinkEventDimensionDaily.DIMENSION_CHOICES
+    ]
+    context["exportItems"] = tree.items.order_by("order")
+    context["exportCampaigns"] = sorted(
+        {row["qr__campaign"] for row in context["qrRows"] if row["qr__campaign"]}
+    )
     return render(request, "tools/link_metrics.html", context)
 
 
+@permission_required(permissions.VIEW_LINK_METRICS)
+def link_metrics_json(request, slug):
+    """The dashboard's numbers as JSON, for external dashboards: lifetime
+    totals, the series (same ?start= / ?end= / ?granularity= as the page), the
+    browser / referrer breakdowns over the same range, top links and per-QR
+    rows. Raw events are paged from link_metrics_events_json.
+    """
+    tree = get_object_or_404(LinkTree, slug=slug)
+    try:
+        startDay, endDay, granularity = _seriesParams(request)
+        series = metrics.eventSeries(tree, startDay, endDay, granularity)
+    except ValueError as e:
+        return JsonResponse({"error": f"Bad range: {e}. start/end are YYYY-MM-DD."}, status=400)
+    summary = metrics.treeSummary(tree)
+    breakdowns = metrics.dimensionBreakdowns(tree, startDay, endDay)
+    return JsonResponse({
+        "tree": {"slug": tree.slug, "title": tree.title},
+        "totals": {
+            "web": summary["webTotal"],
+            "qr": summary["qrTotal"],
+            "total": summary["grandTotal"],
+            "uniqueVisitors": summary["uniqueVisitors"],
+        },
+        "series": {
+            "start": startDay.isoformat(),
+            "end": endDay.isoformat(),
+            "granularity": granularity,
+            "buckets": [
+                {"start": row["start"].isoformat(), "web": row["web"], "qr": row["qr"],
+                 "total": row["total"]}
+                for row in series
+            ],
+        },
+        "breakdowns": {
+            dimension: [{"value": row["value"], "total": row["total"]} for row in rows]
+            for dimension, rows in breakdowns.items()
+        },
+        "topItems": [
+            {"itemId": row["item__id"], "label": row["label"], "total": row["total"]}
+            for row in summary["topItems"]
+        ],
+        "qrCodes": [
+            {"code": row["qr__code"], "label": row["qr__label"], "campaign": row["qr__campaign"],
+             "scans": row["scans"], "uniqueVisitors": row["uniqueVisitors"]}
+            for row in summary["qrRows"]
+        ],
+        "eventsUrl": reverse("link-metrics-events-json", kwargs={"slug": tree.slug}),
+    })
+
+
+@permission_required(permissions.VIEW_LINK_METRICS)
+def link_metrics_events_json(request, slug):
+    """Keyset-paged raw events for a tree, oldest first (metrics.eventFeed).
+
+    ?cursor= continues after the last page (pass back the response's "next"
+    - it is returned even when the page is empty, so a poller just repeats the
+    call); without one the feed starts at ?start= (YYYY-MM-DD, UTC) or the
+    beginning. ?limit= caps the page (default 500, at most 5000). Events newer
+    than LINK_EVENT_FEED_SETTLE_SECONDS are held back until they have settled.
+    """
+    tree = get_object_or_404(LinkTree, slug=slug)
+    labels = {LinkEvent.Source.WEB: "web", LinkEvent.Source.QR: "qr"}
+    try:
+        startDay = _parseDay(request.GET.get("start"))
+        limit = int(request.GET.get("limit") or metrics.FEED_PAGE_SIZE)
+        page = metrics.eventFeed(
+            tree, after=request.GET.get("cursor") or None, startDay=startDay, limit=limit,
+        )
+    except ValueError:
+        return JsonResponse(
+            {"error": "cursor must come from a previous page, start be YYYY-MM-DD, limit a number."},
+            status=400,
+        )
+    return JsonResponse({
+        "events": [
+            {
+                "id": eventId,
+                "occurredAt": occurredAt.astimezone(datetime.UTC).isoformat(),
+                "source": labels.get(source, source),
+                "itemId": itemId,
+                "itemLabel": itemLabel,
+                "qrCode": qrCode,
+                "qrCampaign": qrCampaign,
+                "uaFamily": uaFamily,
+                "referrerHost": referrerHost,
+            }
+            for eventId, occurredAt, source, itemId, itemLabel, qrCode, qrCampaign, uaFamily,
+            referrerHost in page["events"]
+        ],
+        "next": page["next"],
+        "hasMore": page["hasMore"],
+    })
+
+
+@permission_required(permissions.VIEW_LINK_METRICS)
+async def link_metrics_live(request, slug):
+    """Live click/scan counts for the dashboard, as server-sent events
+    (LinkTree/liveCounters.py): a snapshot, then a delta whenever the tree's
+    or its QR codes' counters move.
+
+    Only an ASGI server can hold the stream open without tying up a worker, so
+    under WSGI (gunicorn) this answers with the snapshot alone; EventSource
+    treats the end of the response as a dropped connection and asks again
+    after the ``retry:`` delay, which degrades to polling.
+    """
+    tree = await aget_object_or_404(LinkTree, slug=slug)
+    if isinstance(request, ASGIRequest):
+        response = StreamingHttpResponse(
+            liveCounters.stream(tree.id), content_type="text/event-stream",
+        )
+    else:
+        snapshot = await liveCounters.currentSnapshot(tree.id)
+        response = HttpResponse(
+            f"retry: {liveCounters.RETRY_MILLISECONDS}\n"
+            + liveCounters.formatEvent("snapshot", snapshot),
+            content_type="text/event-stream",
+        )
+    patch_cache_control(response, no_cache=True)
+    response["X-Accel-Buffering"] = "no"  # nginx: pass events through as they come
+    return response
+
+
+class _Echo:
+    """csv.writer target that hands each formatted row straight back, so rows
+    can be yielded to a StreamingHttpResponse instead of buffered."""
+
+    def write(self, value):
+        return value
+
+
+_EXPORT_ROWS_PER_CHUNK = 500
+_EXPORT_FETCH_SIZE = 2000
+
+
+def _streamCsv(header, rows):
+    """Yield CSV text for ``header`` + ``rows`` a few hundred rows at a time."""
+    writer = csv.writer(_Echo())
+    chunk = [writer.writerow(header)]
+    for row in rows:
+        chunk.append(writer.writerow(row))
+        if len(chunk) >= _EXPORT_ROWS_PER_CHUNK:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+def _parseDay(raw):
+    """A ?start= / ?end= value (YYYY-MM-DD) as a date; None if absent.
+    Raises ValueError on anything else."""
+    if not raw:
+        return None
+    return datetime.date.fromisoformat(raw)
+
+
+def _seriesParams(request):
+    """(startDay, endDay, granularity) from ?start= / ?end= / ?granularity=,
+    defaulting to the last METRICS_WINDOW_DAYS by day. Raises ValueError."""
+    endDay = _parseDay(request.GET.get("end")) or metrics.defaultSeriesRange()[1]
+    startDay = _parseDay(request.GET.get("start")) or (
+        endDay - datetime.timedelta(days=metrics.METRICS_WINDOW_DAYS)
+    )
+    return startDay, endDay, request.GET.get("granularity") or "day"
+
+
 @permission_required(permissions.VIEW_LINK_METRICS)
 def link_metrics_csv(request, slug):
-    """Per-day, per-source aggregate export for a tree (privacy-safe - no PII)."""
+    """CSV export for a tree (privacy-safe - no PII).
+
+    Default: per-day, per-source aggregate totals over all time - or, given any
+    of ?start= / ?end= / ?granularity= (as on the dashboard), per hour / day /
+    week / month bucket over that range. ?mode=dimensions gives per-day counts
+    by browser family and referrer host from their rollup (optionally
+    narrowed by ?start= / ?end=). ?mode=events streams the raw
+    events instead (one row per click/scan, see metrics.EVENT_EXPORT_FIELDS),
+    narrowed by ?start= / ?end= (inclusive UTC days, YYYY-MM-DD), ?campaign=
+    (QR campaign tag) and ?item=<id>. The events are read with a server-side
+    iterator and written as they are read, so memory stays flat however many
+    years of traffic the tree has.
+    """
     tree = get_object_or_404(LinkTree, slug=slug)
+    labels = {LinkEvent.Source.WEB: "web", LinkEvent.Source.QR: "qr"}
+
+    if request.GET.get("mode") == "events":
+        try:
+            startDay = _parseDay(request.GET.get("start"))
+            endDay = _parseDay(request.GET.get("end"))
+            itemId = int(request.GET["item"]) if request.GET.get("item") else None
+        except ValueError:
+            return HttpResponseBadRequest("start/end must be YYYY-MM-DD and item an id.")
+        events = metrics.eventRows(
+            tree, startDay=startDay, endDay=endDay,
+            campaign=request.GET.get("campaign") or None, itemId=itemId,
+        )
+        rows = (
+            (occurredAt.astimezone(datetime.UTC).isoformat(), labels.get(source, source), *rest)
+            for occurredAt, source, *rest in events.iterator(chunk_size=_EXPORT_FETCH_SIZE)
+        )
+        response = StreamingHttpResponse(
+            _streamCsv(
+                ["occurred_at_utc", "source", "item_id", "item_label", "qr_code",
+                 "qr_campaign", "ua_family", "referrer_host"],
+                rows,
+            ),
+            content_type="text/csv",
+        )
+        response["Content-Disposition"] = f'attachment; filename="link-events-{tree.slug}.csv"'
+        return response
+
+    if request.GET.get("mode") == "dimensions":
+        try:
+            startDay = _parseDay(request.GET.get("start"))
+            endDay = _parseDay(request.GET.get("end"))
+        except ValueError:
+            return HttpResponseBadRequest("start/end must be YYYY-MM-DD.")
+        response = HttpResponse(content_type="text/csv")
+        response["Content-Disposition"] = f'attachment; filename="link-dimensions-{tree.slug}.csv"'
+        writer = csv.writer(response)
+        writer.writerow(["date", "dimension", "value", "events"])
+        writer.writerows(metrics.dimensionDailyRows(tree, startDay=startDay, endDay=endDay))
+        return response
 
     response = HttpResponse(content_type="text/csv")
     response["Content-Disposition"] = f'attachment; filename="link-metrics-{tree.slug}.csv"'
     writer = csv.writer(response)
     writer.writerow(["date", "source", "events"])
-    labels = {LinkEvent.Source.WEB: "web", LinkEvent.Source.QR: "qr"}
-    for row in metrics.dailyEventTotals(LinkEvent.objects.filter(tree=tree)):
-        writer.writerow([row["day"], labels.get(row["source"], row["source"]), row["total"]])
+    if not any(request.GET.get(param) for param in ("start", "end", "granularity")):
+        for row in metrics.dailyEventTotals(tree):
+            writer.writerow([row["day"], labels.get(row["source"], row["source"]), row["total"]])
+        return response
+
+    try:
+        series = metrics.eventSeries(tree, *_seriesParams(request))
+    except ValueError as e:
+        return HttpResponseBadRequest(f"Bad range: {e}. start/end are YYYY-MM-DD.")
+    for row in series:
+        for source in ("web", "qr"):
+            if row[source]:
+                writer.writerow([row["start"].isoformat(), source, row[source]])
     return response
 
 
@@ -208,8 +525,9 @@ def manage_link_tree_list(request):
             "tree": tree,
             "itemCount": tree.items.count(),
             "qrCount": tree.qrCodes.count(),
+            "opens": metrics.counterOf(tree).total,
         }
-        for tree in LinkTree.objects.order_by("title")
+        for tree in LinkTree.objects.select_related("counter").order_by("title")
     ]
     return render(request, "tools/manage-link-trees/list.html", {
         "treeRows": treeRows,
@@ -393,9 +711,14 @@ def manage_link_tree_item_reorder(request, treeId):
         newOrderByItemId = {itemId: index for index, itemId in enumerate(orderedIds)}
         for item in treeItems:
             item.order = newOrderByItemId[item.id]
-        # bulk_update only touches "order"; LinkTreeItem has no auto_now or save
-        # signal, so this is lossless.
+        # bulk_update only writes "order" - it skips auto_now and the save
+        # signals - so touch the tree (moving the page's Last-Modified) and
+        # drop the cached public page by hand.
         LinkTreeItem.objects.bulk_update(treeItems, ["order"])
+        LinkTree.objects.filter(pk=treeId).update(dateModified=datetime.datetime.now(datetime.UTC))
+        pageCache.bumpTreeVersion(
+            LinkTree.objects.filter(pk=treeId).values_list("slug", flat=True).first()
+        )
 
     return redirect("manage-link-tree-edit", treeId=treeId)
 
@@ -404,10 +727,52 @@ def manage_link_tree_item_reorder(request, treeId):
 @permission_required(permissions.MANAGE_LINK_TREE)
 def manage_qr_code_list(request):
     qrRows = [
-        {"qr": qr, "scanUrl": qr.scanUrl(), "targetUrl": qr.targetUrl()}
-        for qr in QRCode.objects.select_related("tree", "item").order_by("label")
+        {
+            "qr": qr,
+            "scanUrl": qr.scanUrl(),
+            "targetUrl": qr.targetUrl(),
+            "scans": metrics.counterOf(qr).qrCount,
+        }
+        for qr in QRCode.objects.select_related("tree", "item", "counter").order_by("label")
     ]
-    return render(request, "tools/manage-link-trees/qr-list.html", {"qrRows": qrRows})
+    campaigns = (
+        QRCode.objects.exclude(campaign="").order_by("campaign")
+        .values_list("campaign", flat=True).distinct()
+    )
+    return render(request, "tools/manage-link-trees/qr-list.html", {
+        "qrRows": qrRows,
+        "campaigns": campaigns,
+        "trees": LinkTree.objects.order_by("title"),
+    })
+
+
+@login_required
+@permission_required(permissions.MANAGE_LINK_TREE)
+def manage_qr_code_export(request):
+    """Every matching code's SVG + PNG (and a manifest) as one streamed ZIP.
+
+    ?campaign=<tag>, ?tree=<slug> and ?active=1|0 narrow the selection; with
+    none of them it exports every code. Rendering and archiving happen in
+    LinkTree/qrExport.py while the response streams.
+    """
+    tree = None
+    if request.GET.get("tree"):
+        tree = get_object_or_404(LinkTree, slug=request.GET["tree"])
+    active = {"1": True, "0": False}.get(request.GET.get("active", ""))
+    codes = qrExport.selectCodes(
+        campaign=request.GET.get("campaign") or None, tree=tree, active=active,
+    )
+
+    logger.info(
+        "ManageLinkTree: %s exported QR codes (%s)",
+        request.user.get_username(), request.GET.urlencode() or "all",
+    )
+    response = StreamingHttpResponse(
+        qrExport.streamZip(codes, baseUrl=request.build_absolute_uri("/")),
+        content_type="application/zip",
+    )
+    response["Content-Disposition"] = 'attachment; filename="qr-codes.zip"'
+    return response
 
 
 @login_required
@@ -0,0 +1,142 @@
+"""Benchmark the Link Tree metrics against synthetic traffic.
+
+Seeds synthetic trees, items, QR codes and N events (``seed_link_traffic``),
+rolls them up, then times each metrics function the dashboard and export use
+against the busiest synthetic tree - wall time and query count per call - so a
+change to the aggregation can be measured before and after on the same data.
+eventSeries is timed uncached (its bucketing queries), since a cache hit
+measures nothing.
+
+It writes millions of rows: point it at a scratch database, e.g.
+
+    DATABASE_URL=sqlite:////tmp/bench.sqlite3 python manage.py migrate
+    DATABASE_URL=sqlite:////tmp/bench.sqlite3 python manage.py benchmark_link_metrics \\
+        --events 2000000 [--trees 20 --items 12 --qr-codes 4 --days 400]
+        [--repeat 5] [--no-rollup] [--reuse] [--clear]
+
+--reuse skips seeding and times whatever synthetic data is already there;
+--no-rollup leaves the new events in the unrolled tail (the worst case);
+--clear deletes the synthetic data afterwards. Refuses to run with DEBUG off
+(i.e. in production) unless --force is given.
+"""
+
+import datetime
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext
+
+from tools.LinkTree import metrics, rollups, synthetic
+from tools.models import LinkTree
+
+
+class Command(BaseCommand):
+    help = "Seed synthetic LinkEvents and report the latency of each metrics function."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--events", type=int, default=1_000_000, help="Events to seed.")
+        parser.add_argument("--trees", type=int, default=20, help="Synthetic trees.")
+        parser.add_argument("--items", type=int, default=12, help="Items per tree.")
+        parser.add_argument("--qr-codes", type=int, default=4, help="QR codes per tree.")
+        parser.add_argument("--days", type=int, default=400, help="Days the events span.")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per function.")
+        parser.add_argument(
+            "--reuse", action="store_true", help="Don't seed; time the existing synthetic data.",
+        )
+        parser.add_argument(
+            "--no-rollup", action="store_true", help="Leave seeded events unrolled.",
+        )
+        parser.add_argument(
+            "--clear", action="store_true", help="Delete the synthetic data when done.",
+        )
+        parser.add_argument(
+            "--force", action="store_true", help="Run even with DEBUG off.",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options["force"]:
+            raise CommandError(
+                "DEBUG is off - this may be a production database. Use a scratch "
+                "database, or pass --force."
+            )
+
+        if not options["reuse"]:
+            self._seed(options)
+        if not options["no_rollup"]:
+            started = time.perf_counter()
+            rollups.rollupNewEvents()
+            self.stdout.write(f"Rollup: {time.perf_counter() - started:.2f}s")
+
+        tree = (
+            LinkTree.objects.filter(slug__startswith=synthetic.SLUG_PREFIX)
+            .order_by("slug").first()
+        )
+        if tree is None:
+            raise CommandError("No synthetic data - run without --reuse to seed some.")
+
+        windowStart, today = metrics.defaultSeriesRange()
+        yearStart = today - datetime.timedelta(days=365)
+        cases = (
+            ("overviewRows", lambda: metrics.overviewRows()),
+            ("treeSummary", lambda: metrics.treeSummary(tree)),
+            (
+                "eventSeries (window, day)",
+                lambda: metrics._bucketTotals(tree, windowStart, today, "day"),
+            ),
+            (
+                "eventSeries (year, week)",
+                lambda: metrics._bucketTotals(tree, yearStart, today, "week"),
+            ),
+            (
+                "eventSeries (day, hour)",
+                lambda: metrics._bucketTotals(tree, today, today, "hour"),
+            ),
+            ("dailyEventTotals", lambda: metrics.dailyEventTotals(tree)),
+            (
+                "dimensionBreakdowns (year)",
+                lambda: metrics.dimensionBreakdowns(tree, yearStart, today),
+            ),
+            ("uniqueVisitors (window)", lambda: metrics.uniqueVisitors(tree, sinceDay=windowStart)),
+            (
+                "eventRows (window)",
+                lambda: sum(1 for _ in metrics.eventRows(tree, startDay=windowStart).iterator(2000)),
+            ),
+        )
+        self.stdout.write(
+            f"{'function':<28}{'queries':>8}{'min ms':>10}{'median ms':>11}{'max ms':>10}"
+        )
+        for name, call in cases:
+            queries, timings = self._time(call, options["repeat"])
+            self.stdout.write(
+                f"{name:<28}{queries:>8}{min(timings):>10.1f}"
+                f"{statistics.median(timings):>11.1f}{max(timings):>10.1f}"
+            )
+
+        if options["clear"]:
+            deleted = synthetic.clearSynthetic()
+            self.stdout.write(f"Cleared {deleted} synthetic event(s).")
+
+    def _seed(self, options):
+        call_command(
+            "seed_link_traffic", trees=options["trees"], items=options["items"],
+            qr_codes=options["qr_codes"], events=options["events"], days=options["days"],
+            seed=options["seed"], reset=True, force=True, stdout=self.stdout,
+        )
+
+    def _time(self, call, repeat: int) -> tuple[int, list[float]]:
+        """(queries per call, [ms per run]); one untimed warm-up run first."""
+        # Seeding overflows DEBUG's bounded query log, which would skew the count.
+        reset_queries()
+        with CaptureQueriesContext(connection) as captured:
+            call()
+        timings = []
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            call()
+            timings.append((time.perf_counter() - started) * 1000)
+        return len(captured), timings
@@ -0,0 +1,152 @@
+"""Load-test the public Link Tree endpoints of a running instance.
+
+Replays a weighted mix of tree page views, link clicks and QR scans at a
+fixed request rate (open loop - see tools/LinkTree/loadTest.py) and reports,
+per kind, p50/p95/p99 latency and the error rate. Run it on the server's host
+against the server's database and it also reports how many of the clicks and
+scans were actually recorded as LinkEvents, and with --lock-probe SQLite
+write-lock waits. The probe takes the write lock itself every 50ms, so it
+adds to the contention it measures: compare latencies with and without it.
+
+Targets are the active trees, manual items and QR codes under --tree-prefix,
+by default the ones ``seed_link_traffic`` creates:
+
+    python manage.py seed_link_traffic --events 200000
+    python manage.py load_test_link_tree --base-url http://127.0.0.1:8000 \\
+        --rate 100 --duration 60 [--mix view=6,click=3,scan=1] [--concurrency 64] \\
+        [--lock-probe]
+
+Point it at a staging copy, never production: every click and scan it sends
+is recorded.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+
+from tools.LinkTree import loadTest, synthetic
+from tools.models import LinkEvent
+from tools.utils import percentile
+
+
+def _sqlitePath() -> str | None:
+    database = settings.DATABASES["default"]
+    name = str(database["NAME"])
+    if "sqlite" not in database["ENGINE"] or name.startswith(":memory:") or "mode=memory" in name:
+        return None
+    return name
+
+
+class Command(BaseCommand):
+    help = "Replay page views, clicks and scans against a running instance and report latency."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--base-url", default="http://127.0.0.1:8000", help="The instance to load.",
+        )
+        parser.add_argument("--rate", type=float, default=50.0, help="Requests per second.")
+        parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run.")
+        parser.add_argument(
+            "--mix", default="view=6,click=3,scan=1", help="Relative weights per request kind.",
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=32, help="Most requests in flight at once.",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+        parser.add_argument(
+            "--tree-prefix", default=synthetic.SLUG_PREFIX,
+            help="Only target trees whose slug starts with this.",
+        )
+        parser.add_argument(
+            "--settle", type=float, default=3.0,
+            help="Seconds to wait for buffered events before counting them.",
+        )
+        parser.add_argument(
+            "--lock-probe", action="store_true",
+            help="Also measure SQLite write-lock waits. The probe takes the write lock "
+                 "itself every 50ms, so it competes with the writes it measures.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            mix = loadTest.parseMix(options["mix"])
+        except ValueError as e:
+            raise CommandError(str(e))
+        if options["rate"] <= 0 or options["duration"] <= 0:
+            raise CommandError("--rate and --duration must be positive.")
+        targets = loadTest.Targets.fromDatabase(options["tree_prefix"])
+        if not any(getattr(targets, kind) for kind in loadTest.KINDS if mix[kind]):
+            raise CommandError(
+                f"No targets under '{options['tree_prefix']}' - run seed_link_traffic first."
+            )
+
+        probe = None
+        if options["lock_probe"]:
+            dbPath = _sqlitePath()
+            if dbPath is None:
+                raise CommandError("--lock-probe needs the instance's SQLite database file.")
+            probe = loadTest.LockProbe(dbPath)
+        lastEventId = LinkEvent.objects.aggregate(last=Max("id"))["last"] or 0
+
+        self.stdout.write(
+            f"Sending {options['rate']:g} req/s for {options['duration']:g}s to "
+            f"{options['base_url']} ({options['mix']})..."
+        )
+        report = loadTest.run(
+            targets,
+            loadTest.HttpSender(options["base_url"]),
+            rate=options["rate"],
+            duration=options["duration"],
+            mix=mix,
+            concurrency=options["concurrency"],
+            seed=options["seed"],
+            probe=probe,
+        )
+        self._writeReport(report)
+
+        time.sleep(options["settle"])
+        recorded = LinkEvent.objects.filter(id__gt=lastEventId).count()
+        self.stdout.write(
+            f"Events recorded: {recorded} of {report.redirects()} redirected click(s)/scan(s)"
+            + ("" if recorded or not report.redirects()
+               else " - is the instance using this database?")
+        )
+
+    def _writeReport(self, report):
+        sent = report.sent()
+        self.stdout.write(
+            f"Sent {sent} request(s) in {report.duration:.1f}s "
+            f"({sent / report.duration if report.duration else 0:.1f}/s achieved)"
+        )
+        self.stdout.write(
+            f"{'kind':<7}{'sent':>7}{'errors':>8}{'err %':>7}"
+            f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}  statuses"
+        )
+        for kind in loadTest.KINDS:
+            count = report.sent(kind)
+            if not count:
+                continue
+            latencies = report.latencies[kind]
+            failed = report.failed(kind)
+            statuses = " ".join(
+                f"{status}x{n}" for status, n in sorted(report.statuses[kind].items())
+            )
+            self.stdout.write(
+                f"{kind:<7}{count:>7}{failed:>8}{100 * failed / count:>7.1f}"
+                f"{percentile(latencies, 50):>9.1f}"
+                f"{percentile(latencies, 95):>9.1f}"
+                f"{percentile(latencies, 99):>9.1f}"
+                f"{max(latencies, default=0):>9.1f}  {statuses}"
+            )
+        if report.lockWaits is not None:
+            waits = report.lockWaits
+            self.stdout.write(
+                f"SQLite write-lock wait over {len(waits)} probe(s): "
+                f"p50 {percentile(waits, 50):.1f}ms, "
+                f"p95 {percentile(waits, 95):.1f}ms, "
+                f"p99 {percentile(waits, 99):.1f}ms, "
+                f"max {max(waits, default=0):.1f}ms, "
+                f"{report.lockTimeouts} timed out"
+            )
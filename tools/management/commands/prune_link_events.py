@@ -0,0 +1,81 @@
+"""Prune raw Link Tree events past the retention age (see LinkTree/retention.py).
+
+Events older than LINK_EVENT_RETENTION_DAYS (default 400) are rolled up,
+archived as gzipped per-day CSV parts under LINK_EVENT_ARCHIVE_DIR (when set),
+and deleted in batches under a resumable checkpoint; then freed pages are
+handed back to the filesystem. The dashboard totals are unchanged by a prune -
+they come from the rollup. Huey runs it weekly (tools/tasks.py
+pruneLinkEvents).
+
+--vacuum does a one-off full VACUUM that also switches the SQLite file into
+incremental auto-vacuum, so later runs reclaim space without a full rewrite.
+It locks the database while it runs - pick a quiet time.
+
+Run from the repo root:
+    python manage.py prune_link_events [--days N] [--archive-dir PATH | --no-archive]
+        [--batch-size N] [--vacuum] [--quiet]
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tools.LinkTree import retention
+
+
+class Command(BaseCommand):
+    help = "Archive and delete raw Link Tree events older than the retention age."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help="Keep this many days of raw events (default LINK_EVENT_RETENTION_DAYS).",
+        )
+        archive = parser.add_mutually_exclusive_group()
+        archive.add_argument(
+            "--archive-dir",
+            default=None,
+            help="Write pruned events here first (default LINK_EVENT_ARCHIVE_DIR).",
+        )
+        archive.add_argument(
+            "--no-archive",
+            action="store_true",
+            help="Delete without archiving (the rollup still keeps the counts).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=retention.DEFAULT_BATCH_SIZE,
+            help="Events archived and deleted per transaction (default %(default)s).",
+        )
+        parser.add_argument(
+            "--vacuum",
+            action="store_true",
+            help="Full VACUUM afterwards (and enable incremental auto-vacuum).",
+        )
+        parser.add_argument(
+            "--quiet",
+            action="store_true",
+            help="Only print when something was pruned.",
+        )
+
+    def handle(self, *args, **options):
+        days = options["days"] if options["days"] is not None else retention.retentionDays()
+        if days < 1:
+            raise CommandError("Retention must be at least one day.")
+        archiveTo = "" if options["no_archive"] else (options["archive_dir"] or retention.archiveDir())
+
+        result = retention.pruneEvents(
+            retention.cutoffFor(days), archiveTo=archiveTo, batchSize=options["batch_size"],
+        )
+        freedPages = retention.reclaimSpace(full=options["vacuum"])
+
+        if result["deleted"] or not options["quiet"]:
+            archived = (
+                f"archived to {archiveTo} ({result['archiveParts']} part(s))"
+                if archiveTo else "not archived"
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f"Pruned {result['deleted']} event(s) older than {days} day(s), {archived}; "
+                f"freed {freedPages} page(s)."
+            ))
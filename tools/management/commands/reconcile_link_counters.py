@@ -0,0 +1,22 @@
+"""Rebuild the Link Tree lifetime counters (LinkCounter) from the rollup.
+
+The counters are bumped as events are recorded (tools/LinkTree/counters.py);
+this recomputes all of them from the daily rollup plus the unrolled tail - the
+same numbers the metrics pages show - and replaces what is stored. Run it once
+after deploying the counters, or whenever they look off.
+
+Run from the repo root:
+    python manage.py reconcile_link_counters
+"""
+
+from django.core.management.base import BaseCommand
+
+from tools.LinkTree import counters
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-tree / item / QR code lifetime click and scan counters."
+
+    def handle(self, *args, **options):
+        written = counters.reconcile()
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {written} counter(s)."))
@@ -0,0 +1,35 @@
+"""Re-list the Zoom accounts (and their meeting capacity) into the shared cache.
+
+Publishes and conflict checks read the account directory from the Django
+cache (tools/EventAutomation/ZoomAPI.py) instead of listing every user and
+their settings each time. Huey runs this hourly (tools/tasks.py
+refreshZoomDirectory) so the cache never goes cold; run it by hand after
+adding or deactivating a Zoom user to pick the change up at once.
+
+Run from the repo root:
+    python manage.py refresh_zoom_directory [--quiet]
+"""
+
+from django.core.management.base import BaseCommand
+
+from tools.EventAutomation import ZoomAPI
+from tools.SecretManager import SecretManager
+
+
+class Command(BaseCommand):
+    help = "Fetch the Zoom account directory and share it with every process."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--quiet", action="store_true", help="Don't list the accounts.")
+
+    def handle(self, *args, **options):
+        accounts = ZoomAPI.ZoomAPI(SecretManager.getZoomConfig()).refreshDirectory()
+        if options["quiet"]:
+            return
+        for account in accounts:
+            capacity = account.features.meetingCapacity if account.features else "?"
+            self.stdout.write(f"  {account.email} (capacity {capacity})")
+        self.stdout.write(self.style.SUCCESS(
+            f"Cached {len(accounts)} Zoom account(s) for "
+            f"{ZoomAPI.directoryCacheSeconds() // 60} minute(s)."
+        ))
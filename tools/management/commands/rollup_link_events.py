@@ -0,0 +1,55 @@
+"""Fold new Link Tree events into the daily rollup (LinkEventDaily).
+
+Incremental by default: resumes from the rollup's high-water mark and only
+reads events recorded since the last run, so it is cheap to run often. Huey
+runs it every ten minutes (tools/tasks.py rollupLinkEvents); the metrics stay
+exact between runs because they top up from the unrolled tail.
+
+--rebuild discards the rollup and backfills it from every raw event - use it
+once after deploying the rollup, or if the table is ever suspect. It refuses
+once prune_link_events has deleted raw events (they'd vanish from the counts).
+
+Run from the repo root:
+    python manage.py rollup_link_events [--rebuild] [--batch-size N] [--quiet]
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tools.LinkTree import rollups
+
+
+class Command(BaseCommand):
+    help = "Roll new Link Tree click/scan events up into per-day counts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Discard the rollup and backfill it from all raw events.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=rollups.DEFAULT_BATCH_SIZE,
+            help="Events folded per transaction (default %(default)s).",
+        )
+        parser.add_argument(
+            "--quiet",
+            action="store_true",
+            help="Only print when something was rolled up.",
+        )
+
+    def handle(self, *args, **options):
+        if options["rebuild"]:
+            try:
+                rolled = rollups.rebuild(batchSize=options["batch_size"])
+            except rollups.RebuildRefused as e:
+                raise CommandError(str(e))
+        else:
+            rolled = rollups.rollupNewEvents(batchSize=options["batch_size"])
+
+        if rolled or not options["quiet"]:
+            self.stdout.write(self.style.SUCCESS(
+                f"Rolled up {rolled} event(s); high-water mark is now event "
+                f"{rollups.highWaterMark()}."
+            ))
@@ -0,0 +1,74 @@
+"""Seed synthetic Link Tree traffic for load tests and benchmarks.
+
+Creates synthetic trees (slugs ``synthetic-<n>``) with manual items and
+item-targeting QR codes, then writes a history of skewed, realistic events
+across them (tools/LinkTree/synthetic.py). Targets are idempotent - re-running
+reuses them and adds more events - so ``load_test_link_tree`` can be pointed
+at the same trees run after run. --reset clears the synthetic data first;
+--clear only clears it. Real trees and their events are never touched.
+
+It can write millions of rows: use a scratch or staging database. Refuses to
+run with DEBUG off (i.e. in production) unless --force is given.
+
+Run from the repo root:
+    python manage.py seed_link_traffic [--trees 20 --items 12 --qr-codes 4]
+        [--events 1000000 --days 400 --seed 0] [--reset | --clear] [--force]
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from tools.LinkTree import synthetic
+
+
+class Command(BaseCommand):
+    help = "Create synthetic trees, items and QR codes and a history of synthetic LinkEvents."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--trees", type=int, default=20, help="Synthetic trees.")
+        parser.add_argument("--items", type=int, default=12, help="Items per tree.")
+        parser.add_argument("--qr-codes", type=int, default=4, help="QR codes per tree.")
+        parser.add_argument("--events", type=int, default=1_000_000, help="Events to write.")
+        parser.add_argument("--days", type=int, default=400, help="Days the events span, ending now.")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+        reset = parser.add_mutually_exclusive_group()
+        reset.add_argument(
+            "--reset", action="store_true", help="Delete existing synthetic data first.",
+        )
+        reset.add_argument(
+            "--clear", action="store_true", help="Only delete the synthetic data.",
+        )
+        parser.add_argument("--force", action="store_true", help="Run even with DEBUG off.")
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options["force"]:
+            raise CommandError(
+                "DEBUG is off - this may be a production database. Use a scratch "
+                "database, or pass --force."
+            )
+
+        if options["reset"] or options["clear"]:
+            deleted = synthetic.clearSynthetic()
+            self.stdout.write(f"Cleared {deleted} synthetic event(s).")
+            if options["clear"]:
+                return
+
+        trees = synthetic.seedTargets(options["trees"], options["items"], options["qr_codes"])
+        events = options["events"]
+        step = max(events // 10, synthetic.DEFAULT_BATCH_SIZE)
+
+        def progress(written):
+            if written % step < synthetic.DEFAULT_BATCH_SIZE or written == events:
+                self.stdout.write(f"  {written} event(s) written")
+
+        started = time.perf_counter()
+        written = synthetic.seedEvents(
+            trees, events, days=options["days"], seed=options["seed"], progress=progress,
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {written} event(s) over {len(trees)} tree(s) in {elapsed:.1f}s "
+            f"({written / elapsed if elapsed else 0:,.0f}/s)."
+        ))
@@ -11,6 +11,10 @@ Runs under the dedicated Outline service-account token
 link to the document's *published share URL* (get-or-create, auto-published) so
 readers never need a wiki login, falling back to the direct URL if sharing fails.
 
+Each resolved item is written with save(), so the Link Tree save signals
+drop the tree's cached public page (tools/LinkTree/pageCache.py) and the new
+link shows on the next view.
+
 Scheduled daily by Huey (tools/tasks.py syncLinkTreeWiki, run by the
 `worker` service); a daily run is plenty — agendas don't change minute to
 minute. This command remains the imperative core for manual runs and
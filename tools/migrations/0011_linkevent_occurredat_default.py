@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-17 07:29
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tools', '0010_publishjob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='linkevent',
+            name='occurredAt',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+    ]
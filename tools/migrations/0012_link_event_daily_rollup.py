@@ -0,0 +1,39 @@
+# Generated by Django 5.1.7 on 2026-10-17 07:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tools', '0011_linkevent_occurredat_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('lastEventId', models.BigIntegerField(default=0)),
+                ('updatedAt', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LinkEventDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('source', models.IntegerField(choices=[(0, 'Web click'), (1, 'QR scan')])),
+                ('count', models.PositiveBigIntegerField(default=0)),
+                ('item', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='dailyCounts', to='tools.linktreeitem')),
+                ('qr', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='dailyCounts', to='tools.qrcode')),
+                ('tree', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='dailyCounts', to='tools.linktree')),
+            ],
+            options={
+                'verbose_name': 'Link Event Daily Count',
+                'indexes': [models.Index(fields=['tree', 'day'], name='tools_linke_tree_id_43eefc_idx'), models.Index(fields=['day'], name='tools_linke_day_456934_idx')],
+            },
+        ),
+    ]
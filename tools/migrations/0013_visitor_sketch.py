@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-17 07:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tools', '0012_link_event_daily_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VisitorSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('registers', models.BinaryField()),
+                ('qr', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='visitorSketches', to='tools.qrcode')),
+                ('tree', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='visitorSketches', to='tools.linktree')),
+            ],
+            options={
+                'verbose_name': 'Visitor Sketch',
+                'indexes': [models.Index(fields=['tree', 'day'], name='tools_visit_tree_id_3ddd58_idx'), models.Index(fields=['qr', 'day'], name='tools_visit_qr_id_a9d87c_idx')],
+            },
+        ),
+    ]
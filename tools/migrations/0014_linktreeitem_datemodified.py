@@ -0,0 +1,20 @@
+# Generated by Django 5.1.7 on 2026-10-17 09:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tools', '0013_visitor_sketch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='linktreeitem',
+            name='dateModified',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
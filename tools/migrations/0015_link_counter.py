@@ -0,0 +1,29 @@
+# Generated by Django 5.1.7 on 2026-10-17 07:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tools', '0014_linktreeitem_datemodified'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LinkCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('webCount', models.PositiveBigIntegerField(default=0)),
+                ('qrCount', models.PositiveBigIntegerField(default=0)),
+                ('lastEventAt', models.DateTimeField(blank=True, null=True)),
+                ('item', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='counter', to='tools.linktreeitem')),
+                ('qr', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='counter', to='tools.qrcode')),
+                ('tree', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='counter', to='tools.linktree')),
+            ],
+            options={
+                'verbose_name': 'Link Counter',
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.7 on 2026-10-17 08:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tools', '0015_link_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LinkEventDimensionDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('dimension', models.CharField(choices=[('uaFamily', 'Browser'), ('referrerHost', 'Referrer')], max_length=20)),
+                ('value', models.CharField(blank=True, max_length=255)),
+                ('count', models.PositiveBigIntegerField(default=0)),
+                ('tree', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='dimensionCounts', to='tools.linktree')),
+            ],
+            options={
+                'verbose_name': 'Link Event Dimension Daily Count',
+                'indexes': [models.Index(fields=['tree', 'dimension', 'day'], name='tools_linke_tree_id_9dfe4e_idx'), models.Index(fields=['day'], name='tools_linke_day_3ac311_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-17 08:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tools', '0016_link_event_dimension_daily'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publishjob',
+            name='stageTimings',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
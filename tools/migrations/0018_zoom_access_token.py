@@ -0,0 +1,26 @@
+# Generated by Django 5.1.7 on 2026-10-17 08:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tools', '0017_publish_job_stage_timings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZoomAccessToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('token', models.TextField()),
+                ('tokenType', models.CharField(max_length=50)),
+                ('scope', models.TextField(blank=True)),
+                ('apiUrl', models.CharField(blank=True, max_length=255)),
+                ('expireTime', models.DateTimeField()),
+                ('updatedAt', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.7 on 2026-10-17 09:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from tools.LinkTree.hll import HyperLogLog
+
+
+def foldDailySketches(apps, schema_editor):
+    # The daily sketches cover every event the sketch rollup has seen, pruned
+    # ones included, so they - not the raw log - seed the lifetime sketches
+    VisitorSketch = apps.get_model("tools", "VisitorSketch")
+    LifetimeVisitorSketch = apps.get_model("tools", "LifetimeVisitorSketch")
+    merged = {}
+    rows = VisitorSketch.objects.values_list("tree_id", "qr_id", "registers")
+    for treeId, qrId, registers in rows.iterator(chunk_size=2000):
+        if qrId is not None:
+            key = (None, qrId)
+        elif treeId is not None:
+            key = (treeId, None)
+        else:
+            continue
+        merged.setdefault(key, HyperLogLog()).mergeBytes(registers)
+    LifetimeVisitorSketch.objects.bulk_create(
+        LifetimeVisitorSketch(tree_id=treeId, qr_id=qrId, registers=sketch.toBytes())
+        for (treeId, qrId), sketch in merged.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tools', '0018_zoom_access_token'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LifetimeVisitorSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('registers', models.BinaryField()),
+                ('qr', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='lifetimeVisitors', to='tools.qrcode')),
+                ('tree', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='lifetimeVisitors', to='tools.linktree')),
+            ],
+            options={
+                'verbose_name': 'Lifetime Visitor Sketch',
+            },
+        ),
+        migrations.RunPython(foldDailySketches, migrations.RunPython.noop),
+    ]
@@ -314,6 +314,9 @@ class PublishJob(models.Model):
     createdAt = models.DateTimeField(auto_now_add=True)
     startedAt = models.DateTimeField(null=True, blank=True, default=None)
     finishedAt = models.DateTimeField(null=True, blank=True, default=None)
+    # Where the run's time went: one span per stage, written by the task
+    # (see EventAutomation/StageTimings.py)
+    stageTimings = models.JSONField(default=list, blank=True)
 
     def getStatusAsString(self) -> str:
         if self.status == PublishJob.Status.PENDING:
@@ -376,6 +379,23 @@ class PublishJob(models.Model):
         return {}
 
 
+# The current Zoom account-credentials token for one Zoom app, shared by every
+# process that talks to Zoom (web workers and the Huey consumer) so they don't
+# each mint their own. ZoomAPI only rewrites it while holding its refresh lock.
+class ZoomAccessToken(models.Model):
+    # "<accountId>:<clientId>"
+    key = models.CharField(max_length=255, unique=True)
+    token = models.TextField()
+    tokenType = models.CharField(max_length=50)
+    scope = models.TextField(blank=True)
+    apiUrl = models.CharField(max_length=255, blank=True)
+    expireTime = models.DateTimeField()
+    updatedAt = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"Zoom token for {self.key.split(':', 1)[0]} until {self.expireTime}"
+
+
 # A member's request to join an event owner (committee), be added to a group,
 # or be granted one of the custom tools.* permissions. Mirrors the
 # DelegatedEvents request/approve pattern: the row is the request/audit record,
@@ -702,6 +722,7 @@ class LinkTreeItem(models.Model):
         null=True, blank=True,
         help_text="When the wiki link was last resolved by the sync command.",
     )
+    dateModified = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = "Link Tree Item"
@@ -855,7 +876,10 @@ class LinkEvent(models.Model):
     )
 
     source = models.IntegerField(choices=SOURCE_CHOICES)
-    occurredAt = models.DateTimeField(auto_now_add=True, db_index=True)
+    # A default rather than auto_now_add: the write-behind recorder stamps the
+    # click time itself and bulk_create would otherwise overwrite it with the
+    # (later) flush time.
+    occurredAt = models.DateTimeField(default=djangoTimezone.now, db_index=True)
 
     destinationUrl = models.TextField(blank=True)
     visitorHash = models.CharField(max_length=16, blank=True)
@@ -872,3 +896,183 @@ class LinkEvent(models.Model):
 
     def __str__(self) -> str:
         return f"{self.get_source_display()} @ {self.occurredAt:%Y-%m-%d %H:%M}"
+
+
+class LinkEventDaily(models.Model):
+    """Per-day event counts rolled up from LinkEvent (see LinkTree/rollups.py).
+
+    One row per (tree, item, qr, day, source) with the number of events. Rows
+    are only ever added to by the rollup job, which works forward from a
+    RollupCheckpoint high-water mark on LinkEvent.id, so the metrics can read
+    these plus the few raw events past the mark instead of scanning the whole
+    event log. ``day`` is the UTC date of occurredAt.
+    """
+
+    tree = models.ForeignKey(
+        LinkTree, on_delete=models.SET_NULL, blank=True, null=True, related_name="dailyCounts",
+    )
+    item = models.ForeignKey(
+        LinkTreeItem, on_delete=models.SET_NULL, blank=True, null=True, related_name="dailyCounts",
+    )
+    qr = models.ForeignKey(
+        QRCode, on_delete=models.SET_NULL, blank=True, null=True, related_name="dailyCounts",
+    )
+    day = models.DateField()
+    source = models.IntegerField(choices=LinkEvent.SOURCE_CHOICES)
+    count = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Link Event Daily Count"
+        indexes = [
+            models.Index(fields=["tree", "day"]),
+            models.Index(fields=["day"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.get_source_display()} x{self.count} on {self.day:%Y-%m-%d}"
+
+
+class LinkEventDimensionDaily(models.Model):
+    """Per-day event counts for one tree by browser family or referrer host,
+    rolled up from LinkEvent (see LinkTree/rollups.py).
+
+    One row per (tree, day, dimension, value). Each tree-day keeps at most
+    ``LINK_DIMENSION_TOP_N`` distinct values per dimension; the rest are counted
+    together under ``OTHER``, so referrer spam can't grow the table without
+    bound. An empty ``value`` is an event with no referrer / unknown browser.
+    """
+
+    class Dimension:
+        UA_FAMILY = "uaFamily"
+        REFERRER_HOST = "referrerHost"
+
+    DIMENSION_CHOICES = (
+        (Dimension.UA_FAMILY, "Browser"),
+        (Dimension.REFERRER_HOST, "Referrer"),
+    )
+    # Not a valid browser family or host name, so it can't collide with one.
+    OTHER = "(other)"
+
+    tree = models.ForeignKey(
+        LinkTree, on_delete=models.SET_NULL, blank=True, null=True, related_name="dimensionCounts",
+    )
+    day = models.DateField()
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES)
+    value = models.CharField(max_length=255, blank=True)
+    count = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Link Event Dimension Daily Count"
+        indexes = [
+            models.Index(fields=["tree", "dimension", "day"]),
+            models.Index(fields=["day"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.get_dimension_display()} {self.value or '-'} x{self.count} on {self.day:%Y-%m-%d}"
+
+
+class LinkCounter(models.Model):
+    """Lifetime click/scan totals for one tree, item, or QR code.
+
+    Exactly one of tree / item / qr is set. Bumped with F() updates in the same
+    transaction that records the events (LinkTree/counters.py), so the
+    overview and list pages read one row per target instead of aggregating
+    the event log; ``reconcile_link_counters`` rebuilds them from the rollup.
+    """
+
+    tree = models.OneToOneField(
+        LinkTree, on_delete=models.CASCADE, blank=True, null=True, related_name="counter",
+    )
+    item = models.OneToOneField(
+        LinkTreeItem, on_delete=models.CASCADE, blank=True, null=True, related_name="counter",
+    )
+    qr = models.OneToOneField(
+        QRCode, on_delete=models.CASCADE, blank=True, null=True, related_name="counter",
+    )
+    webCount = models.PositiveBigIntegerField(default=0)
+    qrCount = models.PositiveBigIntegerField(default=0)
+    lastEventAt = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Link Counter"
+
+    def __str__(self) -> str:
+        target = self.tree or self.item or self.qr
+        return f"{target}: {self.webCount} web / {self.qrCount} qr"
+
+    @property
+    def total(self) -> int:
+        return self.webCount + self.qrCount
+
+
+class VisitorSketch(models.Model):
+    """A day's distinct visitors as a HyperLogLog sketch (see LinkTree/hll.py).
+
+    Two scopes share the table: a *tree* sketch (``tree`` set, ``qr`` null)
+    covers every event on the tree that day, and a *QR* sketch (``qr`` set,
+    ``tree`` null) every scan of that code. Maintained by the rollup job from
+    ``LinkEvent.visitorHash``; the metrics merge a window's sketches to count
+    unique visitors without a distinct-scan of raw events. The hash rotates
+    daily, so a multi-day count is the sum of daily uniques, approximately.
+    """
+
+    tree = models.ForeignKey(
+        LinkTree, on_delete=models.SET_NULL, blank=True, null=True, related_name="visitorSketches",
+    )
+    qr = models.ForeignKey(
+        QRCode, on_delete=models.SET_NULL, blank=True, null=True, related_name="visitorSketches",
+    )
+    day = models.DateField()
+    registers = models.BinaryField()
+
+    class Meta:
+        verbose_name = "Visitor Sketch"
+        indexes = [
+            models.Index(fields=["tree", "day"]),
+            models.Index(fields=["qr", "day"]),
+        ]
+
+    def __str__(self) -> str:
+        scope = f"qr {self.qr_id}" if self.qr_id else f"tree {self.tree_id}"
+        return f"Visitors for {scope} on {self.day:%Y-%m-%d}"
+
+
+class LifetimeVisitorSketch(models.Model):
+    """Every visitor a tree or QR code has had, as one HyperLogLog sketch.
+
+    Exactly one of tree / qr is set, as for ``VisitorSketch``. The sketch
+    rollup folds each batch into it alongside the day's sketches, so an
+    all-time count reads one row instead of merging every daily sketch - the
+    same estimate, since a merge of sketches is the sketch of their union.
+    """
+
+    tree = models.OneToOneField(
+        LinkTree, on_delete=models.CASCADE, blank=True, null=True, related_name="lifetimeVisitors",
+    )
+    qr = models.OneToOneField(
+        QRCode, on_delete=models.CASCADE, blank=True, null=True, related_name="lifetimeVisitors",
+    )
+    registers = models.BinaryField()
+
+    class Meta:
+        verbose_name = "Lifetime Visitor Sketch"
+
+    def __str__(self) -> str:
+        scope = f"qr {self.qr_id}" if self.qr_id else f"tree {self.tree_id}"
+        return f"Lifetime visitors for {scope}"
+
+
+class RollupCheckpoint(models.Model):
+    """How far a background pass over LinkEvent has got, by event id.
+
+    Keyed by ``name`` so each pass (the daily rollup, and anything else that
+    walks the event log forward) keeps its own resumable high-water mark.
+    """
+
+    name = models.CharField(max_length=50, unique=True)
+    lastEventId = models.BigIntegerField(default=0)
+    updatedAt = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.name} @ {self.lastEventId}"
@@ -160,8 +160,12 @@ ROUTE_NAME_TO_DOMAIN_SLUG = {
     "manage-link-tree-item-edit": "link-trees",
     "manage-qr-code-new": "link-trees",
     "manage-qr-code-edit": "link-trees",
+    "manage-qr-code-export": "link-trees",  # non-HTML response - mapped for completeness
     "link-metrics-tree": "link-trees",
     "link-metrics-csv": "link-trees",   # non-HTML response - mapped for completeness
+    "link-metrics-json": "link-trees",  # non-HTML response - mapped for completeness
+    "link-metrics-events-json": "link-trees",  # non-HTML response - mapped for completeness
+    "link-metrics-live": "link-trees",  # non-HTML response - mapped for completeness
     "qr-image": "link-trees",           # non-HTML response - mapped for completeness
     # Access: tools
     "my-access": "access",
@@ -24,6 +24,7 @@ import settings
 
 from .EmailApi import EmailApi
 from .EventAutomation import EventAutomationDriver
+from .EventAutomation.StageTimings import Stages, StageTimings
 from .SecretManager import SecretManager
 from .models import DelegatedEvents, PostedEvents, PublishJob, User
 from .timezones import DateTimeWithAcceptedTimeZone
@@ -54,6 +55,33 @@ def syncLinkTreeWiki():
             )
 
 
+# Often enough that the metrics' unrolled tail stays a few minutes of traffic;
+# each run only reads the events recorded since the last one.
+@db_periodic_task(crontab(minute="*/10"))
+def rollupLinkEvents():
+    """Fold new LinkEvents into the LinkEventDaily rollup (see
+    tools/LinkTree/rollups.py); the management command is the imperative core."""
+    call_command("rollup_link_events", quiet=True)
+
+
+# Sunday 09:30 UTC (3/4am Central), the quietest hour of the week: the
+# deletes and the incremental vacuum hold SQLite's write lock in short bursts.
+@db_periodic_task(crontab(day_of_week="0", hour="9", minute="30"))
+def pruneLinkEvents():
+    """Archive and delete raw LinkEvents past LINK_EVENT_RETENTION_DAYS (see
+    tools/LinkTree/retention.py); the management command is the imperative core."""
+    call_command("prune_link_events", quiet=True)
+
+
+# Hourly, well inside ZOOM_DIRECTORY_CACHE_SECONDS, so a publish never has to
+# list the Zoom accounts itself.
+@db_periodic_task(crontab(minute="20"))
+def refreshZoomDirectory():
+    """Re-list the Zoom accounts into the shared cache (see
+    tools/EventAutomation/ZoomAPI.py); the management command is the imperative core."""
+    call_command("refresh_zoom_directory", quiet=True)
+
+
 # --- Event publishing (PublishJob) ------------------------------------------
 #
 # The two real-publish flows in eventViews.py (new_event and the
@@ -104,13 +132,14 @@ def _serializeConflicts(conflicts : list[EventAutomationDriver.Conflict]) -> lis
     return serialized
 
 
-def _finishDirectPublish(job: PublishJob, eventInfo, result) -> None:
+def _finishDirectPublish(job: PublishJob, eventInfo, result, timings: StageTimings) -> None:
     """Persist a successful DIRECT publish: the PostedEvents row and the
     confirmation email, mirroring what new_event used to do inline."""
     # Convert event start and end dates to utc
     utcStart = eventInfo.start.utc()
     utcEnd = eventInfo.end.utc()
     utcNow = datetime.datetime.now(datetime.UTC)
+    timings.start(Stages.PERSIST)
     e = PostedEvents.objects.create(title = eventInfo.title,
                                     start = utcStart,
                                     end = utcEnd,
@@ -136,8 +165,10 @@ def _finishDirectPublish(job: PublishJob, eventInfo, result) -> None:
                                     owner = job.owner,
                                     reason = "Created by approved authorizer")
     job.postedEvent = e
+    timings.stop(Stages.PERSIST)
 
     # Send email
+    timings.start(Stages.EMAIL)
     # TODO: SMTP email is broken
     try:
         messageText = f""" Your event {eventInfo.title} was published successfully. Here are the links.
@@ -155,9 +186,10 @@ def _finishDirectPublish(job: PublishJob, eventInfo, result) -> None:
             "PublishEventJob: Failed to send confrimation email due to exception"
         )
         logger.exception(err)
+    timings.stop(Stages.EMAIL)
 
 
-def _finishDelegatedPublish(job: PublishJob, eventInfo, result) -> None:
+def _finishDelegatedPublish(job: PublishJob, eventInfo, result, timings: StageTimings) -> None:
     """Persist a successful DELEGATED publish: flip the DelegatedEvents row to
     APPROVED BEFORE creating the PostedEvents row (today's ordering - keep it),
     then email the approver and the requester."""
@@ -165,6 +197,7 @@ def _finishDelegatedPublish(job: PublishJob, eventInfo, result) -> None:
     approver = User.objects.get(id=job.payload["approverId"])
     reason = job.payload["reason"]
     utcNow = datetime.datetime.now(datetime.UTC)
+    timings.start(Stages.PERSIST)
     event.status = DelegatedEvents.Status.APPROVED
     event.approver = approver
     event.dateReviewed = utcNow
@@ -195,8 +228,10 @@ def _finishDelegatedPublish(job: PublishJob, eventInfo, result) -> None:
                                     owner = event.owner,
                                     reason = reason)
     job.postedEvent = e
+    timings.stop(Stages.PERSIST)
 
     # Send email
+    timings.start(Stages.EMAIL)
     try:
         messageText = f""" Your event {eventInfo.title} was approved by {approver.getUserNameString()} published successfully. Here are the links.
         Zoom Link ({result.zoomAccount}): {result.zoomLink}
@@ -218,6 +253,7 @@ def _finishDelegatedPublish(job: PublishJob, eventInfo, result) -> None:
             "PublishEventJob: Failed to send confrimation email due to exception"
         )
         logger.exception(err)
+    timings.stop(Stages.EMAIL)
 
 
 # retries=0 is load-bearing: Action Network has no delete API, so a retry
@@ -236,6 +272,7 @@ def publishEventJob(jobId):
     job.status = PublishJob.Status.RUNNING
     job.startedAt = datetime.datetime.now(datetime.UTC)
     job.save()
+    timings = StageTimings()
     try:
         payload = job.payload
         # Refuse a schema we don't understand - failing loudly here beats
@@ -277,14 +314,15 @@ def publishEventJob(jobId):
                     gCalConfig=SecretManager.getGCalConfig(),
                     ignoreResolveableConflicts=payload["ignoreResolveableConflicts"],
                 ),
+                timings=timings,
             )
 
         if result.type == EventAutomationDriver.Result.ResultType.PUBLISHED:
             logger.info("PublishEventJob: Event published successfully with result %s", str(result))
             if job.kind == PublishJob.Kind.DELEGATED:
-                _finishDelegatedPublish(job, eventInfo, result)
+                _finishDelegatedPublish(job, eventInfo, result, timings)
             else:
-                _finishDirectPublish(job, eventInfo, result)
+                _finishDirectPublish(job, eventInfo, result, timings)
             job.status = PublishJob.Status.PUBLISHED
         elif result.type == EventAutomationDriver.Result.ResultType.UNRESOLVEABLE_CONFLICT:
             logger.info("PublishEventJob: Publish failed with unresolveable conflicts %s", str(result))
@@ -302,5 +340,6 @@ def publishEventJob(jobId):
         logger.exception("PublishEventJob: Unexpected exception publishing job %s", jobId)
         job.status = PublishJob.Status.FAILED
         job.errorMessage = traceback.format_exc()
+    job.stageTimings = timings.asList()
     job.finishedAt = datetime.datetime.now(datetime.UTC)
     job.save()
@@ -1,7 +1,7 @@
 from django.contrib.auth.models import Group
 from django.test import TestCase
 
-from tools.models import User
+from tools.models import PublishJob, User
 
 from tools.tests.support import UserFactory, fastHashing
 
@@ -61,3 +61,27 @@ class AdminGroupAssignmentTests(TestCase):
         self.assertEqual(resp.status_code, 403)
         resp = self.client.get("/admin/tools/accessrequests/")
         self.assertEqual(resp.status_code, 200)
+
+
+class PublishJobAdminTimingTests(TestCase):
+    def setUp(self):
+        self.admin = UserFactory.make("staffadmin", is_staff=True, is_superuser=True)
+        self.client.force_login(self.admin)
+        self.job = PublishJob.objects.create(
+            kind=PublishJob.Kind.DIRECT, payload={}, status=PublishJob.Status.PUBLISHED,
+            stageTimings=[
+                {"stage": "zoom_token", "startMs": 0, "durationMs": 250, "ok": True},
+                {"stage": "an_fill", "startMs": 300, "durationMs": 12000, "ok": False},
+            ],
+        )
+        PublishJob.objects.create(kind=PublishJob.Kind.DIRECT, payload={})
+
+    def test_change_list_shows_stage_percentiles(self):
+        resp = self.client.get("/admin/tools/publishjob/")
+        self.assertContains(resp, "Stage timings (ms)")
+        self.assertEqual([row["stage"] for row in resp.context["stageSummary"]], ["zoom_token", "an_fill"])
+        self.assertContains(resp, "an_fill (12.0s)")
+
+    def test_change_page_shows_the_job_spans(self):
+        resp = self.client.get(f"/admin/tools/publishjob/{self.job.id}/change/")
+        self.assertContains(resp, "<td>an_fill</td><td>+300 ms</td><td>12000 ms</td><td>failed</td>", html=True)
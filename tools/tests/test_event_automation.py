@@ -0,0 +1,730 @@
+"""EventAutomationDriver's conflict check, against in-process fakes of the Zoom
+and Google Calendar clients - no external service is contacted.
+
+The fakes' lookups wait on a shared threading.Barrier sized to every lookup
+in the check, so a check that ran them one after another would break the
+barrier instead of passing.
+"""
+import concurrent.futures
+import datetime
+import http.server
+import io
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from unittest import mock
+
+import google.auth.transport.requests
+import google.oauth2.service_account
+import httplib2
+import requests
+import rsa
+import urllib3
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from tools.EventAutomation import (
+    ActionNetworkAPI, ActionNetworkAutomation, EventAutomationDriver, GoogleCalendarAPI, StageTimings, ZoomAPI,
+)
+from tools.models import ZoomAccessToken
+from tools.timezones import DateTimeWithAcceptedTimeZone
+
+START = DateTimeWithAcceptedTimeZone(wallTime=datetime.datetime(2030, 7, 1, 18, 0), zoneName="America/Chicago")
+END = DateTimeWithAcceptedTimeZone(wallTime=datetime.datetime(2030, 7, 1, 19, 0), zoneName="America/Chicago")
+
+
+def makeEventInfo(**overrides):
+    fields = dict(
+        title="Reading Group", eventType=2, start=START, end=END,
+        locationName="Library", streetAddress="835 W Rundberg Ln", city="Austin",
+        state="TX", zip="78758", description="Chapter reading group",
+    )
+    fields.update(overrides)
+    return EventAutomationDriver.EventInfo(**fields)
+
+
+def makeConfig(**overrides):
+    fields = dict(
+        zoomConfig=ZoomAPI.ZoomConfig(accountId="a", clientId="c", clientSecret="s"),
+        anConfig=None,
+        gCalConfig=GoogleCalendarAPI.GoogleCalendarConfig(
+            serviceKeyPath="/nonexistent", calendarId="cal", delegateAccount="d@example.com",
+        ),
+        onlyCheckConflicts=True,
+    )
+    fields.update(overrides)
+    return EventAutomationDriver.Config(**fields)
+
+
+def busyMeeting(account):
+    return ZoomAPI.ZoomMeeting(
+        id=1, startTime=START, duration=datetime.timedelta(hours=1), joinUrl="",
+        ownerUserId=account.id, topic=f"{account.email} meeting",
+    )
+
+
+class FakeZoom(ZoomAPI.ZoomAPI):
+    def __init__(self, barrier, busy=(), delaySec=0):
+        super().__init__(makeConfig().zoomConfig)
+        self._accessToken = ZoomAPI.AccessToken("t", "bearer", 3600, "", "")
+        self._barrier = barrier
+        self._busy = set(busy)
+        self._delaySec = delaySec
+        self.accounts = [ZoomAPI.ZoomUser(email=f"z{i}@example.com", id=str(i), status="active") for i in range(3)]
+
+    def _accounts(self):
+        return self.accounts
+
+    def _fetchMeetingsForAccountAndTime(self, account, fromDate, toDate):
+        self._barrier.wait()
+        time.sleep(self._delaySec)
+        return [busyMeeting(account)] if account.email in self._busy else []
+
+
+class FakeGoogleCalendar:
+    barrier = None
+    events = []
+
+    def __init__(self, config):
+        pass
+
+    def findConflicts(self, start, duration):
+        FakeGoogleCalendar.barrier.wait()
+        return FakeGoogleCalendar.events
+
+
+class ConflictCheckTests(TestCase):
+    def check(self, zoom, timings=None, **configOverrides):
+        with mock.patch.object(EventAutomationDriver.ZoomAPI, "ZoomAPI", return_value=zoom), \
+             mock.patch.object(EventAutomationDriver.GoogleCalendarAPI, "GoogleCalendarAPI", FakeGoogleCalendar):
+            return EventAutomationDriver.publishEvent(makeEventInfo(), makeConfig(**configOverrides), timings)
+
+    def setUp(self):
+        # Three Zoom accounts plus Google: all four lookups must be in flight at once.
+        self.barrier = threading.Barrier(4, timeout=5)
+        FakeGoogleCalendar.barrier = self.barrier
+        FakeGoogleCalendar.events = []
+
+    def test_zoom_accounts_and_google_are_checked_at_once(self):
+        result = self.check(FakeZoom(self.barrier))
+        self.assertEqual(result.type, EventAutomationDriver.Result.ResultType.NO_CONFLICTS, result.errorStr)
+
+    def test_conflict_stages_are_timed(self):
+        timings = StageTimings.StageTimings()
+        self.check(FakeZoom(self.barrier), timings)
+        self.assertEqual(
+            sorted(span["stage"] for span in timings.asList()),
+            ["gcal_conflicts", "zoom_accounts", "zoom_conflicts", "zoom_token"],
+        )
+
+    def test_zoom_availability_keeps_directory_order(self):
+        zoom = FakeZoom(threading.Barrier(3, timeout=5), busy={"z0@example.com"})
+        with concurrent.futures.ThreadPoolExecutor(3) as executor:
+            availability = zoom.getAccountsAndAvailablilityForTime(
+                START, datetime.timedelta(hours=1), executor=executor, timeoutSec=5,
+            )
+        self.assertEqual(
+            [(account.email, len(conflicts)) for account, conflicts in availability],
+            [("z0@example.com", 1), ("z1@example.com", 0), ("z2@example.com", 0)],
+        )
+
+    def test_free_zoom_account_leaves_only_google_conflicts(self):
+        FakeGoogleCalendar.events = [GoogleCalendarAPI.Event("Board", START, END, "", None)]
+        result = self.check(FakeZoom(self.barrier, busy={"z0@example.com"}))
+        self.assertEqual(result.type, EventAutomationDriver.Result.ResultType.CONFLICT)
+        self.assertEqual([c.title for c in result.conflicts], ["Board"])
+
+    def test_every_account_busy_is_unresolveable(self):
+        zoom = FakeZoom(self.barrier, busy={"z0@example.com", "z1@example.com", "z2@example.com"})
+        result = self.check(zoom)
+        self.assertEqual(result.type, EventAutomationDriver.Result.ResultType.UNRESOLVEABLE_CONFLICT)
+        self.assertEqual(
+            [c.zoomUser for c in result.conflicts],
+            ["z0@example.com", "z1@example.com", "z2@example.com"],
+        )
+
+    def test_zoom_token_fetch_overlaps_google(self):
+        # The token fetch and the Google lookup meet: neither may wait for the other to finish
+        FakeGoogleCalendar.barrier = threading.Barrier(2, timeout=5)
+        zoom = FakeZoom(threading.Barrier(1))
+        with mock.patch.object(zoom, "ensureAccessToken", side_effect=lambda: FakeGoogleCalendar.barrier.wait()):
+            result = self.check(zoom)
+        self.assertEqual(result.type, EventAutomationDriver.Result.ResultType.NO_CONFLICTS, result.errorStr)
+
+    def test_slow_token_fetch_times_out(self):
+        FakeGoogleCalendar.barrier = threading.Barrier(1)
+        zoom = FakeZoom(threading.Barrier(1))
+        with mock.patch.object(zoom, "ensureAccessToken", side_effect=lambda: time.sleep(2)):
+            started = time.monotonic()
+            result = self.check(zoom, conflictCheckTimeoutSec=0.5)
+        self.assertLess(time.monotonic() - started, 1.5)
+        self.assertIn("Conflict check took longer", "".join(result.errorStr))
+
+    def test_slow_lookup_times_out(self):
+        result = self.check(FakeZoom(self.barrier, delaySec=2), conflictCheckTimeoutSec=0.5)
+        self.assertEqual(result.type, EventAutomationDriver.Result.ResultType.UNEXPECTED)
+        self.assertIn("Conflict check took longer", "".join(result.errorStr))
+
+
+class CountingZoom(ZoomAPI.ZoomAPI):
+    """ZoomAPI whose directory listing is canned and counted."""
+
+    fetches = 0
+
+    def __init__(self):
+        super().__init__(makeConfig().zoomConfig)
+        self._accessToken = ZoomAPI.AccessToken("t", "bearer", 3600, "", "")
+
+    def _fetchAccounts(self):
+        CountingZoom.fetches += 1
+        return [ZoomAPI.ZoomUser(email="z0@example.com", id="0", status="active",
+                                 features=ZoomAPI.ZoomUser.Features(meetingCapacity=300))]
+
+
+class ZoomDirectoryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        CountingZoom.fetches = 0
+
+    def test_directory_is_listed_once_for_every_client(self):
+        first = CountingZoom()._accounts()
+        second = CountingZoom()._accounts()
+        self.assertEqual(CountingZoom.fetches, 1)
+        self.assertEqual(second, first)
+        self.assertEqual(second[0].features.meetingCapacity, 300)
+
+    def test_failed_meeting_lookup_drops_the_directory(self):
+        zoom = CountingZoom()
+        zoom._accounts()
+        with mock.patch.object(zoom, "_fetchMeetingsForAccountAndTime", side_effect=requests.HTTPError("404")):
+            with self.assertRaises(requests.HTTPError):
+                zoom.getAccountsAndAvailablilityForTime(START, datetime.timedelta(hours=1))
+        CountingZoom()._accounts()
+        self.assertEqual(CountingZoom.fetches, 2)
+
+    def test_refresh_command_rewrites_the_cache(self):
+        CountingZoom()._accounts()
+        out = io.StringIO()
+        with mock.patch.object(ZoomAPI, "ZoomAPI", lambda config: CountingZoom()), \
+             mock.patch("tools.management.commands.refresh_zoom_directory.SecretManager.getZoomConfig"):
+            call_command("refresh_zoom_directory", stdout=out)
+        self.assertEqual(CountingZoom.fetches, 2)
+        self.assertIn("z0@example.com (capacity 300)", out.getvalue())
+        self.assertIn("Cached 1 Zoom account(s)", out.getvalue())
+
+
+class TokenZoom(ZoomAPI.ZoomAPI):
+    """ZoomAPI whose token grant is counted and takes a moment."""
+
+    refreshes = 0
+    lock = threading.Lock()
+
+    def __init__(self, expiresInSec=3600):
+        super().__init__(makeConfig().zoomConfig)
+        self._expiresInSec = expiresInSec
+
+    def _refreshAccessToken(self):
+        with TokenZoom.lock:
+            TokenZoom.refreshes += 1
+            n = TokenZoom.refreshes
+        time.sleep(0.3)
+        self._accessToken = ZoomAPI.AccessToken(f"token-{n}", "bearer", self._expiresInSec, "", "")
+
+    @ZoomAPI.ZoomAPI._accessTokenRequired
+    def currentToken(self):
+        return self._accessToken.token
+
+
+class AccessTokenStoreTests(TestCase):
+    def setUp(self):
+        TokenZoom.refreshes = 0
+
+    def test_new_clients_reuse_the_stored_token(self):
+        self.assertEqual(TokenZoom().currentToken(), "token-1")
+        self.assertEqual(TokenZoom().currentToken(), "token-1")
+        self.assertEqual(TokenZoom.refreshes, 1)
+
+    def test_token_near_expiry_is_refreshed(self):
+        TokenZoom(expiresInSec=60).currentToken()
+        self.assertEqual(TokenZoom().currentToken(), "token-2")
+        self.assertEqual(TokenZoom.refreshes, 2)
+
+    def test_token_is_kept_out_of_the_cache(self):
+        with tempfile.TemporaryDirectory() as cacheDir, override_settings(
+            CACHE_DIR=cacheDir, CACHES=fileCache(cacheDir),
+        ):
+            TokenZoom().currentToken()
+            for root, _, files in os.walk(cacheDir):
+                for name in files:
+                    with open(os.path.join(root, name), "rb") as f:
+                        self.assertNotIn(b"token-1", f.read())
+        self.assertEqual(ZoomAccessToken.objects.get().token, "token-1")
+
+
+def fileCache(location):
+    return {"default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": location,
+    }}
+
+
+class ConcurrentAccessTokenTests(TransactionTestCase):
+    """Threads on their own DB connections, standing in for web workers and the
+    Huey consumer sharing CACHE_DIR."""
+
+    def setUp(self):
+        TokenZoom.refreshes = 0
+
+    def currentToken(self):
+        try:
+            return TokenZoom().currentToken()
+        finally:
+            connection.close()
+
+    def test_concurrent_refreshes_send_one_token_request(self):
+        with tempfile.TemporaryDirectory() as cacheDir, override_settings(
+            CACHE_DIR=cacheDir, CACHES=fileCache(cacheDir),
+        ):
+            with concurrent.futures.ThreadPoolExecutor(2) as executor:
+                tokens = list(executor.map(lambda _: self.currentToken(), range(2)))
+        self.assertEqual(TokenZoom.refreshes, 1)
+        self.assertEqual(tokens, ["token-1", "token-1"])
+
+
+class FlakyZoomHandler(http.server.BaseHTTPRequestHandler):
+    """Answers 503 to the first ``failures`` requests, then 200."""
+
+    failures = 0
+    hits = []
+
+    def answer(self):
+        FlakyZoomHandler.hits.append(self.command)
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        failed = len(FlakyZoomHandler.hits) <= FlakyZoomHandler.failures
+        body = b"{}" if failed else b'{"join_url": "https://zoom.example/j/1", "id": 1}'
+        self.send_response(503 if failed else 200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_DELETE = answer
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ZoomSessionTests(TestCase):
+    def setUp(self):
+        FlakyZoomHandler.hits = []
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FlakyZoomHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/v2/users/0/meetings"
+        with mock.patch.object(ZoomAPI, "RETRY_BACKOFF_FACTOR", 0):
+            self.session = ZoomAPI._buildSession()
+        patcher = mock.patch.object(ZoomAPI, "session", lambda: self.session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reads_retry_through_server_errors(self):
+        FlakyZoomHandler.failures = 2
+        self.assertEqual(ZoomAPI.session().get(self.url, timeout=ZoomAPI.REQUEST_TIMEOUT).status_code, 200)
+        self.assertEqual(FlakyZoomHandler.hits, ["GET", "GET", "GET"])
+
+    def test_create_meeting_is_never_resent(self):
+        FlakyZoomHandler.failures = 1
+        zoom = CountingZoom()
+        user = ZoomAPI.ZoomUser(email="z0@example.com", id="0", status="active")
+        start = DateTimeWithAcceptedTimeZone(wallTime=START.wallTime, zoneName="US/Central")
+        with mock.patch.object(ZoomAPI.Constants.Meetings, "MEETING_ENDPOINT", lambda userId: self.url):
+            with self.assertRaises(requests.HTTPError):
+                zoom.createMeeting("Reading Group", start, datetime.timedelta(hours=1), user)
+            self.assertEqual(FlakyZoomHandler.hits, ["POST"])
+            self.assertEqual(
+                zoom.createMeeting("Reading Group", start, datetime.timedelta(hours=1), user),
+                ("https://zoom.example/j/1", 1),
+            )
+
+    def test_long_retry_after_is_capped(self):
+        response = urllib3.response.HTTPResponse(status=429, headers={"Retry-After": "7200"})
+        retry = self.session.get_adapter(self.url).max_retries
+        self.assertEqual(retry.get_retry_after(response), ZoomAPI.RETRY_AFTER_MAX_SEC)
+
+
+class CalendarClientTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        _, privateKey = rsa.newkeys(512)
+        cls.keyFile = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+        json.dump({
+            "type": "service_account", "project_id": "p", "private_key_id": "k",
+            "private_key": privateKey.save_pkcs1().decode(),
+            "client_email": "svc@p.iam.gserviceaccount.com", "client_id": "1",
+            "token_uri": "https://oauth2.googleapis.com/token",
+        }, cls.keyFile)
+        cls.keyFile.close()
+        cls.addClassCleanup(os.remove, cls.keyFile.name)
+
+    def setUp(self):
+        self.addCleanup(GoogleCalendarAPI._clients.clear)
+        self.refreshes = []
+        patcher = mock.patch.object(
+            google.oauth2.service_account.Credentials, "refresh", autospec=True, side_effect=self.fakeRefresh,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.config = makeConfig().gCalConfig
+        self.config.serviceKeyPath = self.keyFile.name
+        self.expiresIn = datetime.timedelta(hours=1)
+
+    def fakeRefresh(self, credentials, request):
+        self.refreshes.append(credentials)
+        credentials.token = f"token-{len(self.refreshes)}"
+        credentials.expiry = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None) + self.expiresIn
+
+    def test_client_is_built_once_without_logging_in(self):
+        first = GoogleCalendarAPI.GoogleCalendarAPI(self.config)
+        second = GoogleCalendarAPI.GoogleCalendarAPI(self.config)
+        self.assertIs(first._client, second._client)
+        self.assertEqual(self.refreshes, [])
+
+    def request(self, used, barrier=None):
+        def execute(http):
+            used.append(http)
+            if barrier is not None:
+                barrier.wait(timeout=5)
+            return {}
+
+        return mock.Mock(execute=mock.Mock(side_effect=execute))
+
+    def test_credentials_refresh_only_near_expiry(self):
+        client = GoogleCalendarAPI.getClient(self.config)
+        client.execute(self.request([]))
+        client.execute(self.request([]))
+        self.assertEqual(len(self.refreshes), 1)
+        self.expiresIn = datetime.timedelta(minutes=1)
+        client.credentials.expiry = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        client.execute(self.request([]))
+        self.assertEqual(len(self.refreshes), 2)
+
+    def test_token_request_has_its_own_timeout(self):
+        client = GoogleCalendarAPI.getClient(self.config)
+        with mock.patch.object(google.auth.transport.requests.Request, "__call__") as send:
+            client._authRequest("https://oauth2.googleapis.com/token", method="POST")
+        self.assertEqual(send.call_args.kwargs["timeout"], GoogleCalendarAPI.Constants.HTTP_TIMEOUT_SEC)
+
+    def test_next_publish_reuses_the_http(self):
+        client = GoogleCalendarAPI.getClient(self.config)
+        used = []
+        # Each publish runs its calls on a pool of threads that is gone afterwards
+        for _ in range(2):
+            with concurrent.futures.ThreadPoolExecutor(1) as executor:
+                executor.submit(client.execute, self.request(used)).result()
+        self.assertIs(used[0], used[1])
+
+    def test_concurrent_requests_get_their_own_http(self):
+        client = GoogleCalendarAPI.getClient(self.config)
+        used = []
+        request = self.request(used, threading.Barrier(2))
+        with concurrent.futures.ThreadPoolExecutor(2) as executor:
+            list(executor.map(lambda _: client.execute(request), range(2)))
+        self.assertIsNot(used[0], used[1])
+        self.assertEqual(len(self.refreshes), 1)
+
+    def test_failed_request_does_not_return_its_http(self):
+        client = GoogleCalendarAPI.getClient(self.config)
+        used = []
+        failing = self.request(used)
+        failing.execute.side_effect = [httplib2.error.ServerNotFoundError("reset")]
+        with self.assertRaises(httplib2.error.ServerNotFoundError):
+            client.execute(failing)
+        used.append(failing.execute.call_args.kwargs["http"])
+        client.execute(self.request(used))
+        self.assertIsNot(used[0], used[1])
+
+
+class FakeDriver:
+    def __init__(self):
+        self.quit_calls = 0
+
+    def quit(self):
+        self.quit_calls += 1
+
+
+class FakeDashboard:
+    def __init__(self):
+        self.alive = True
+
+    def exists(self):
+        return self.alive
+
+
+class SessionPoolTests(TestCase):
+    def setUp(self):
+        self.drivers = []
+        self.logins = []
+        self.config = ActionNetworkAutomation.ANAutomatorConfig(email="an@example.com", password="pw")
+
+    def makePool(self, **kwargs):
+        def driverFactory():
+            self.drivers.append(FakeDriver())
+            return self.drivers[-1]
+
+        def openDashboard(driver, config, reload):
+            self.logins.append(driver)
+            return FakeDashboard()
+
+        return ActionNetworkAutomation.SessionPool(driverFactory, openDashboard, **kwargs)
+
+    def publish(self, pool):
+        with pool.session(self.config) as (driver, dashboard):
+            return driver, dashboard
+
+    def test_session_is_reused_from_the_dashboard(self):
+        pool = self.makePool()
+        first, _ = self.publish(pool)
+        logins = len(self.logins)
+        second, _ = self.publish(pool)
+        self.assertIs(first, second)
+        self.assertEqual(len(self.drivers), 1)
+        # Only the post-publish return to the dashboard; no login before the second publish
+        self.assertEqual(len(self.logins), logins + 1)
+
+    def test_return_to_the_dashboard_is_timed(self):
+        pool = self.makePool()
+        timings = StageTimings.StageTimings()
+        with pool.session(self.config, timings):
+            pass
+        self.assertEqual([span["stage"] for span in timings.asList()], ["an_checkin"])
+
+    def test_session_is_recycled_after_max_uses(self):
+        pool = self.makePool(maxUses=2)
+        self.publish(pool)
+        self.publish(pool)
+        self.publish(pool)
+        self.assertEqual(len(self.drivers), 2)
+        self.assertEqual(self.drivers[0].quit_calls, 1)
+
+    def test_failed_publish_discards_the_session(self):
+        pool = self.makePool()
+        with self.assertRaises(RuntimeError):
+            with pool.session(self.config):
+                raise RuntimeError("boom")
+        self.assertEqual(self.drivers[0].quit_calls, 1)
+        driver, _ = self.publish(pool)
+        self.assertIsNot(driver, self.drivers[0])
+
+    def test_stale_dashboard_is_reloaded(self):
+        pool = self.makePool()
+        self.publish(pool)
+        pool._idle[0].dashboard.alive = False
+        logins = len(self.logins)
+        driver, _ = self.publish(pool)
+        self.assertIs(driver, self.drivers[0])
+        self.assertEqual(len(self.logins), logins + 2)
+
+    def test_idle_session_expires(self):
+        pool = self.makePool(maxIdleSec=60)
+        self.publish(pool)
+        pool._idle[0].lastUsed -= 120
+        self.publish(pool)
+        self.assertEqual(len(self.drivers), 2)
+        self.assertEqual(self.drivers[0].quit_calls, 1)
+
+
+class StubActionNetworkHandler(http.server.BaseHTTPRequestHandler):
+    """Records each request and answers like Action Network's event create."""
+
+    status = 200
+    requests = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        StubActionNetworkHandler.requests.append((self.path, dict(self.headers), body))
+        reply = json.dumps({"browser_url": "https://actionnetwork.org/events/reading-group"}).encode()
+        self.send_response(StubActionNetworkHandler.status)
+        self.send_header("Content-Type", "application/hal+json")
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def makeANEventInfo(**overrides):
+    fields = dict(
+        title="Reading Group", startTime=START, endTime=END, locationName="Library",
+        address="835 W Rundberg Ln", city="Austin", zip="78758",
+        description="Chapter reading group\nBring <snacks>", insturctions="Zoom: https://zoom.example/j/1",
+        anEventType=ActionNetworkAutomation.ANTypes.HYBRID,
+    )
+    fields.update(overrides)
+    return ActionNetworkAutomation.EventInfo(**fields)
+
+
+LOCATION_BODY = {
+    "venue": "Library", "address_lines": ["835 W Rundberg Ln"], "locality": "Austin",
+    "region": "TX", "postal_code": "78758", "country": "US",
+}
+
+
+class ActionNetworkAPITests(TestCase):
+    def setUp(self):
+        StubActionNetworkHandler.status = 200
+        StubActionNetworkHandler.requests = []
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StubActionNetworkHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.config = ActionNetworkAutomation.ANAutomatorConfig(
+            email="an@example.com", password="pw", apiKey="key",
+            apiBaseUrl=f"http://127.0.0.1:{server.server_port}/api/v2/",
+        )
+
+    def test_event_is_created_with_one_post(self):
+        confirmInfo = ActionNetworkAPI.ActionNetworkAPI(self.config).createEvent(makeANEventInfo())
+        self.assertEqual(confirmInfo, ActionNetworkAutomation.EventConfirmationInfo(
+            manageLink="https://actionnetwork.org/events/reading-group/manage",
+            directLink="https://actionnetwork.org/events/reading-group",
+        ))
+        [(path, headers, body)] = StubActionNetworkHandler.requests
+        self.assertEqual(path, "/api/v2/events/")
+        self.assertEqual(headers["OSDI-API-Token"], "key")
+        self.assertEqual(body["start_date"], "2030-07-01T18:00:00-05:00")
+        self.assertEqual(body["end_date"], "2030-07-01T19:00:00-05:00")
+        self.assertEqual(body["description"], "Chapter reading group<br>Bring &lt;snacks&gt;")
+        self.assertEqual(body["location"]["address_lines"], ["835 W Rundberg Ln"])
+
+    def test_times_carry_the_event_zone_offset(self):
+        ActionNetworkAPI.ActionNetworkAPI(self.config).createEvent(makeANEventInfo(
+            startTime=DateTimeWithAcceptedTimeZone(datetime.datetime(2030, 12, 1, 18, 0), "US/Pacific"),
+            endTime=DateTimeWithAcceptedTimeZone(datetime.datetime(2030, 12, 1, 19, 0), "US/Pacific"),
+        ))
+        body = StubActionNetworkHandler.requests[0][2]
+        self.assertEqual(body["start_date"], "2030-12-01T18:00:00-08:00")
+        self.assertEqual(body["end_date"], "2030-12-01T19:00:00-08:00")
+
+    def assertBody(self, anEventType, expected):
+        body = ActionNetworkAPI.eventBody(makeANEventInfo(
+            anEventType=anEventType, zoomLink="https://zoom.example/j/1",
+        ))
+        common = {
+            "title": "Reading Group",
+            "start_date": "2030-07-01T18:00:00-05:00",
+            "end_date": "2030-07-01T19:00:00-05:00",
+            "description": "Chapter reading group<br>Bring &lt;snacks&gt;",
+            "instructions": "Zoom: https://zoom.example/j/1",
+            "origin_system": "Austin DSA Tools",
+            "action_network:sponsor": {"title": "Austin DSA"},
+        }
+        self.assertEqual(body, {**common, **expected})
+
+    def test_in_person_body(self):
+        self.assertBody(ActionNetworkAutomation.ANTypes.IN_PERSON, {
+            "location": LOCATION_BODY,
+            "action_network:virtual": False,
+        })
+
+    def test_virtual_body(self):
+        self.assertBody(ActionNetworkAutomation.ANTypes.VIRTUAL, {
+            "action_network:virtual": True,
+            "action_network:timezone": "America/Chicago",
+            "action_network:virtual_link": "https://zoom.example/j/1",
+        })
+
+    def test_hybrid_body(self):
+        self.assertBody(ActionNetworkAutomation.ANTypes.HYBRID, {
+            "location": LOCATION_BODY,
+            "action_network:virtual": True,
+            "action_network:timezone": "America/Chicago",
+            "action_network:virtual_link": "https://zoom.example/j/1",
+        })
+
+    def test_virtual_event_without_zoom_link_has_no_link(self):
+        body = ActionNetworkAPI.eventBody(makeANEventInfo(anEventType=ActionNetworkAutomation.ANTypes.VIRTUAL))
+        self.assertNotIn("action_network:virtual_link", body)
+
+    def test_failed_create_is_not_retried(self):
+        StubActionNetworkHandler.status = 503
+        with self.assertRaises(requests.HTTPError):
+            ActionNetworkAPI.ActionNetworkAPI(self.config).createEvent(makeANEventInfo())
+        self.assertEqual(len(StubActionNetworkHandler.requests), 1)
+
+    def test_backend_follows_config(self):
+        with mock.patch.object(ActionNetworkAutomation.ANAutomator, "createEvent") as scrape:
+            EventAutomationDriver._createANEvent(makeANEventInfo(), self.config)
+            scrape.assert_not_called()
+            self.config.backend = ActionNetworkAutomation.ANBackends.SELENIUM
+            EventAutomationDriver._createANEvent(makeANEventInfo(), self.config)
+            scrape.assert_called_once()
+        self.assertEqual(len(StubActionNetworkHandler.requests), 1)
+        self.assertFalse(ActionNetworkAutomation.ANAutomatorConfig(email="e", password="p").usesApi())
+
+    def unreachableConfig(self, backend):
+        # A port nothing listens on: the connection is refused before anything is sent
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        return ActionNetworkAutomation.ANAutomatorConfig(
+            email="an@example.com", password="pw", apiKey="key", backend=backend,
+            apiBaseUrl=f"http://127.0.0.1:{port}/api/v2/",
+        )
+
+    def test_unreachable_api_falls_back_to_the_browser(self):
+        config = self.unreachableConfig(ActionNetworkAutomation.ANBackends.AUTO)
+        with mock.patch.object(ActionNetworkAutomation.ANAutomator, "createEvent") as scrape, \
+             self.assertLogs("tools.EventAutomation.EventAutomationDriver", level="WARNING"):
+            EventAutomationDriver._createANEvent(makeANEventInfo(), config)
+        scrape.assert_called_once()
+
+    def test_unreachable_api_is_raised_when_the_api_is_required(self):
+        config = self.unreachableConfig(ActionNetworkAutomation.ANBackends.API)
+        with mock.patch.object(ActionNetworkAutomation.ANAutomator, "createEvent") as scrape:
+            with self.assertRaises(ActionNetworkAPI.NotSentError):
+                EventAutomationDriver._createANEvent(makeANEventInfo(), config)
+        scrape.assert_not_called()
+
+    def test_failure_after_sending_does_not_fall_back(self):
+        StubActionNetworkHandler.status = 503
+        with mock.patch.object(ActionNetworkAutomation.ANAutomator, "createEvent") as scrape:
+            with self.assertRaises(requests.HTTPError):
+                EventAutomationDriver._createANEvent(makeANEventInfo(), self.config)
+        scrape.assert_not_called()
+        self.assertEqual(len(StubActionNetworkHandler.requests), 1)
+
+
+class StageTimingsTests(TestCase):
+    def test_failed_stage_is_kept(self):
+        timings = StageTimings.StageTimings()
+        with timings.span("zoom_create"):
+            pass
+        with self.assertRaises(RuntimeError):
+            with timings.span("an_fill"):
+                raise RuntimeError("no date picker")
+        self.assertEqual([(s["stage"], s["ok"]) for s in timings.asList()], [("zoom_create", True), ("an_fill", False)])
+
+    def test_stage_left_open_is_kept_as_failed(self):
+        timings = StageTimings.StageTimings()
+        timings.start("persist")
+        timings.stop("persist")
+        timings.start("email")
+        self.assertEqual([(s["stage"], s["ok"]) for s in timings.asList()], [("persist", True), ("email", False)])
+
+    def test_summary_is_in_pipeline_order(self):
+        jobs = [
+            [{"stage": "an_fill", "startMs": 0, "durationMs": ms, "ok": True},
+             {"stage": "zoom_token", "startMs": 0, "durationMs": 100, "ok": True}]
+            for ms in range(1000, 11000, 1000)
+        ]
+        summary = StageTimings.summarize(jobs)
+        self.assertEqual([row["stage"] for row in summary], ["zoom_token", "an_fill"])
+        self.assertEqual(summary[1], {"stage": "an_fill", "count": 10, "p50": 5000, "p90": 9000, "p99": 10000, "max": 10000})
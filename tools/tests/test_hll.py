@@ -0,0 +1,38 @@
+from django.test import SimpleTestCase
+
+from tools.LinkTree.hll import REGISTERS, HyperLogLog
+
+
+class HyperLogLogTests(SimpleTestCase):
+    def _sketch(self, values):
+        sketch = HyperLogLog()
+        for value in values:
+            sketch.add(value)
+        return sketch
+
+    def test_small_sets_count_exactly_and_ignore_duplicates(self):
+        self.assertEqual(HyperLogLog().count(), 0)
+        self.assertEqual(self._sketch(["a", "b", "a", "c", "b"]).count(), 3)
+
+    def test_large_set_is_within_a_few_percent(self):
+        sketch = self._sketch(f"visitor-{i}" for i in range(50_000))
+        self.assertAlmostEqual(sketch.count(), 50_000, delta=50_000 * 0.05)
+
+    def test_merge_is_the_union(self):
+        left = self._sketch(f"v{i}" for i in range(0, 3000))
+        right = self._sketch(f"v{i}" for i in range(2000, 5000))
+        union = self._sketch(f"v{i}" for i in range(0, 5000))
+        left.merge(right)
+        self.assertEqual(left.registers, union.registers)
+
+    def test_sparse_and_dense_round_trip(self):
+        few = self._sketch(["x", "y", "z"])
+        many = self._sketch(f"v{i}" for i in range(20_000))
+        self.assertLess(len(few.toBytes()), 16)          # sparse: 3 bytes per register
+        self.assertEqual(len(many.toBytes()), REGISTERS + 1)  # dense
+        for sketch in (few, many):
+            self.assertEqual(HyperLogLog.fromBytes(sketch.toBytes()).registers, sketch.registers)
+
+    def test_rejects_garbage(self):
+        with self.assertRaises(ValueError):
+            HyperLogLog.fromBytes(b"?not a sketch")
@@ -0,0 +1,90 @@
+import io
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from tools.LinkTree import loadTest, synthetic
+from tools.models import LinkEvent, LinkTree
+from tools.utils import percentile
+
+
+class LoadDriverTests(TestCase):
+    def test_parse_mix(self):
+        self.assertEqual(loadTest.parseMix("view=6, scan=1"), {"view": 6, "click": 0, "scan": 1})
+        for bad in ("views=1", "view=x", "view=0"):
+            with self.assertRaises(ValueError):
+                loadTest.parseMix(bad)
+
+    def test_percentile_is_nearest_rank(self):
+        values = list(range(100, 0, -1))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile(values, 100), 100)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_run_sends_the_mix_at_the_rate(self):
+        targets = loadTest.Targets(view=["/t/a/"], click=["/go/1/"], scan=["/qr/x/"])
+        sent = []
+
+        def send(path):
+            sent.append(path)
+            if path == "/qr/x/":
+                raise ConnectionError
+            return 200 if path.startswith("/t/") else 302
+
+        report = loadTest.run(
+            targets, send, rate=400, duration=0.5, mix={"view": 1, "click": 1, "scan": 0},
+        )
+        self.assertEqual(len(sent), 200)
+        self.assertNotIn("/qr/x/", sent)
+        self.assertEqual(report.sent(), 200)
+        self.assertEqual(report.failed(), 0)
+        self.assertEqual(report.redirects(), report.sent("click"))
+        self.assertEqual(len(report.latencies["view"]), report.sent("view"))
+        self.assertIsNone(report.lockWaits)
+
+        report = loadTest.run(targets, send, rate=100, duration=0.1, mix={"scan": 1})
+        self.assertEqual((report.sent("scan"), report.failed("scan")), (10, 10))
+
+    def test_targets_come_from_the_synthetic_trees(self):
+        synthetic.seedTargets(trees=2, itemsPerTree=3, qrPerTree=1)
+        LinkTree.objects.create(slug="real", title="Real")
+        targets = loadTest.Targets.fromDatabase()
+        self.assertEqual(sorted(targets.view), ["/t/synthetic-0/", "/t/synthetic-1/"])
+        self.assertEqual(len(targets.click), 6)
+        self.assertEqual(sorted(targets.scan), ["/qr/synthetic-0-qr-0/", "/qr/synthetic-1-qr-0/"])
+
+
+class LoadCommandTests(TestCase):
+    def test_seed_command(self):
+        out = io.StringIO()
+        call_command("seed_link_traffic", trees=2, items=2, qr_codes=1, events=50,
+                     force=True, stdout=out)
+        self.assertIn("Seeded 50 event(s) over 2 tree(s)", out.getvalue())
+        call_command("seed_link_traffic", clear=True, force=True, stdout=out)
+        self.assertFalse(LinkEvent.objects.exists())
+        self.assertFalse(LinkTree.objects.exists())
+        with self.assertRaises(CommandError):  # DEBUG is off under test
+            call_command("seed_link_traffic", events=1, stdout=out)
+
+    def test_load_command_reports_each_kind(self):
+        synthetic.seedTargets(trees=1, itemsPerTree=2, qrPerTree=1)
+        out = io.StringIO()
+        with mock.patch.object(loadTest, "HttpSender", return_value=lambda path: 200):
+            call_command("load_test_link_tree", rate=200, duration=0.2, settle=0, stdout=out)
+        output = out.getvalue()
+        self.assertNotIn("write-lock wait", output)  # the probe is opt-in
+        self.assertIn("Sent 40 request(s)", output)
+        for kind in ("view", "click", "scan"):
+            self.assertIn(f"\n{kind} ", output)
+        self.assertIn("Events recorded: 0 of 0", output)
+
+    def test_lock_probe_needs_a_database_file(self):
+        synthetic.seedTargets(trees=1, itemsPerTree=1, qrPerTree=0)
+        with self.assertRaises(CommandError):
+            call_command("load_test_link_tree", duration=0.1, lock_probe=True, stdout=io.StringIO())
+
+    def test_load_command_needs_targets(self):
+        with self.assertRaises(CommandError):
+            call_command("load_test_link_tree", duration=0.1, stdout=io.StringIO())
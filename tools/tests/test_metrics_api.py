@@ -0,0 +1,254 @@
+import asyncio
+import datetime
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.admin.sites import site
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from tools.LinkTree import eventBuffer, liveCounters, metrics, synthetic
+from tools.admin import LinkEventPaginator
+from tools.models import LinkEvent, LinkTree, LinkTreeItem, QRCode
+
+from tools.tests.support import LoginClientMixin, UserFactory
+
+
+def _at(day: int, hour: int = 12) -> datetime.datetime:
+    return datetime.datetime(2025, 3, day, hour, tzinfo=datetime.UTC)
+
+
+class MetricsApiTests(LoginClientMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.loginAs(UserFactory.make("viewer", perms=("viewLinkMetrics",)))
+        self.tree = LinkTree.objects.create(slug="m", title="M")
+        self.item = LinkTreeItem.objects.create(
+            tree=self.tree, order=0, kind=LinkTreeItem.Kind.MANUAL, label="A", url="https://a.org"
+        )
+        qr = QRCode.objects.create(code="flyer", label="Flyer", campaign="canvass", item=self.item)
+        # Two events share a timestamp, so the feed must order (and page) by id too.
+        self.events = [
+            LinkEvent.objects.create(tree=self.tree, item=self.item, source=LinkEvent.Source.WEB,
+                                     occurredAt=_at(1), visitorHash="v1"),
+            LinkEvent.objects.create(tree=self.tree, item=self.item, source=LinkEvent.Source.WEB,
+                                     occurredAt=_at(1), visitorHash="v2"),
+            LinkEvent.objects.create(tree=self.tree, item=self.item, qr=qr,
+                                     source=LinkEvent.Source.QR, occurredAt=_at(2)),
+            LinkEvent.objects.create(tree=self.tree, source=LinkEvent.Source.WEB, occurredAt=_at(9)),
+        ]
+        self.feedUrl = reverse("link-metrics-events-json", kwargs={"slug": "m"})
+
+    def _feed(self, **params):
+        resp = self.client.get(self.feedUrl, params)
+        self.assertEqual(resp.status_code, 200)
+        return resp.json()
+
+    def test_summary_json(self):
+        resp = self.client.get(
+            reverse("link-metrics-json", kwargs={"slug": "m"}),
+            {"start": "2025-03-01", "end": "2025-03-31", "granularity": "week"},
+        )
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual(data["totals"], {"web": 3, "qr": 1, "total": 4, "uniqueVisitors": 2})
+        self.assertEqual(data["series"]["granularity"], "week")
+        self.assertEqual(
+            [(b["start"], b["total"]) for b in data["series"]["buckets"]],
+            [("2025-02-24", 3), ("2025-03-03", 1), ("2025-03-10", 0), ("2025-03-17", 0),
+             ("2025-03-24", 0), ("2025-03-31", 0)],
+        )
+        self.assertEqual(data["topItems"], [{"itemId": self.item.id, "label": "A", "total": 3}])
+        self.assertEqual(data["qrCodes"], [{"code": "flyer", "label": "Flyer", "campaign": "canvass",
+                                            "scans": 1, "uniqueVisitors": 0}])
+        self.assertEqual(data["eventsUrl"], self.feedUrl)
+
+    def test_summary_json_bad_range_is_400(self):
+        resp = self.client.get(reverse("link-metrics-json", kwargs={"slug": "m"}), {"granularity": "x"})
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("error", resp.json())
+
+    def test_feed_pages_by_cursor_without_repeats_or_gaps(self):
+        seen = []
+        page = self._feed(limit=2)
+        while True:
+            seen += [event["id"] for event in page["events"]]
+            if not page["hasMore"]:
+                break
+            page = self._feed(cursor=page["next"], limit=2)
+        self.assertEqual(seen, [event.id for event in self.events])
+        first = self._feed(limit=1)["events"][0]
+        self.assertEqual(first["occurredAt"], "2025-03-01T12:00:00+00:00")
+        self.assertEqual((first["source"], first["itemLabel"]), ("web", "A"))
+        self.assertNotIn("visitorHash", first)
+
+    def test_polling_an_exhausted_cursor_returns_only_new_events(self):
+        cursor = self._feed()["next"]
+        page = self._feed(cursor=cursor)
+        self.assertEqual((page["events"], page["next"], page["hasMore"]), ([], cursor, False))
+        # Later than everything seen, but recorded now: arrives on the next poll.
+        late = LinkEvent.objects.create(tree=self.tree, source=LinkEvent.Source.WEB, occurredAt=_at(10))
+        self.assertEqual([event["id"] for event in self._feed(cursor=cursor)["events"]], [late.id])
+
+    def test_feed_holds_back_unsettled_events(self):
+        LinkEvent.objects.create(tree=self.tree, source=LinkEvent.Source.WEB)  # just now
+        self.assertEqual(len(self._feed()["events"]), 4)
+        with override_settings(LINK_EVENT_FEED_SETTLE_SECONDS=0):
+            self.assertEqual(len(self._feed()["events"]), 5)
+
+    def test_feed_start_day_and_bad_params(self):
+        self.assertEqual(len(self._feed(start="2025-03-02")["events"]), 2)
+        for params in ({"cursor": "garbage"}, {"start": "March"}, {"limit": "many"}):
+            self.assertEqual(self.client.get(self.feedUrl, params).status_code, 400)
+
+    def test_feed_page_is_one_query(self):
+        with self.assertNumQueries(1):
+            metrics.eventFeed(self.tree, after=metrics.encodeCursor(_at(1), self.events[0].id))
+
+    def test_requires_view_metrics_permission(self):
+        self.loginAs(UserFactory.make("nobody"))
+        self.assertNotEqual(self.client.get(self.feedUrl).status_code, 200)
+
+
+class LinkEventAdminTests(TestCase):
+    def setUp(self):
+        self.tree = LinkTree.objects.create(slug="m", title="M")
+        for _ in range(3):
+            LinkEvent.objects.create(tree=self.tree, source=LinkEvent.Source.WEB)
+        LinkEvent.objects.order_by("id").first().delete()  # pruned prefix
+        self.admin = site._registry[LinkEvent]
+        self.request = RequestFactory().get("/")
+
+    def paginator(self, queryset=None):
+        if queryset is None:
+            queryset = LinkEvent.objects.all()
+        return self.admin.get_paginator(self.request, queryset.order_by("-id"), 100)
+
+    def addSyntheticHole(self):
+        """Synthetic events between real ones, then cleared: a hole mid-span."""
+        syntheticTree = LinkTree.objects.create(slug=f"{synthetic.SLUG_PREFIX}0", title="S")
+        for _ in range(5):
+            LinkEvent.objects.create(tree=syntheticTree, source=LinkEvent.Source.WEB)
+        LinkEvent.objects.create(tree=self.tree, source=LinkEvent.Source.WEB)
+        synthetic.clearSynthetic()
+
+    def test_count_is_capped_in_one_query(self):
+        with mock.patch.object(LinkEventPaginator, "EXACT_COUNT_MAX", 1):
+            paginator = self.paginator()
+            with self.assertNumQueries(1):
+                self.assertEqual(paginator.count, 1)
+            self.assertTrue(paginator.capped)
+        filtered = self.paginator(LinkEvent.objects.filter(source=LinkEvent.Source.QR))
+        self.assertEqual(filtered.count, 0)
+        self.assertFalse(filtered.capped)
+        self.assertFalse(self.admin.show_full_result_count)
+
+    def test_count_is_exact_after_clear_synthetic(self):
+        self.addSyntheticHole()
+        paginator = self.paginator()
+        self.assertEqual(paginator.count, 3)
+        self.assertFalse(paginator.capped)
+
+    def test_every_page_of_a_capped_count_exists(self):
+        self.addSyntheticHole()
+        self.client.force_login(UserFactory.superuser(is_staff=True))
+        url = reverse("admin:tools_linkevent_changelist")
+        with mock.patch.object(LinkEventPaginator, "EXACT_COUNT_MAX", 2), \
+             mock.patch.object(type(self.admin), "list_per_page", 1):
+            resp = self.client.get(url)
+            self.assertEqual(resp.context["cl"].result_count, 2)
+            self.assertContains(resp, "more than</span> 2 Link Events")
+            lastPage = self.client.get(url, {"p": 2})
+        self.assertEqual(lastPage.status_code, 200)
+        self.assertEqual(len(lastPage.context["cl"].result_list), 1)
+
+    def test_changelist_renders(self):
+        self.client.force_login(UserFactory.superuser(is_staff=True))
+        resp = self.client.get(reverse("admin:tools_linkevent_changelist"))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context["cl"].result_count, 2)
+        self.assertNotContains(resp, "more than</span>")
+
+
+@override_settings(LINK_LIVE_POLL_SECONDS=0.01)
+class LiveCountersTests(LoginClientMixin, TestCase):
+    def setUp(self):
+        self.viewer = self.loginAs(UserFactory.make("viewer", perms=("viewLinkMetrics",)))
+        self.tree = LinkTree.objects.create(slug="m", title="M")
+        self.item = LinkTreeItem.objects.create(
+            tree=self.tree, order=0, kind=LinkTreeItem.Kind.MANUAL, label="A", url="https://a.org"
+        )
+        self.qr = QRCode.objects.create(code="flyer", label="Flyer", item=self.item)
+        other = LinkTree.objects.create(slug="other", title="Other")
+        QRCode.objects.create(code="elsewhere", label="Elsewhere", tree=other)
+        self.liveUrl = reverse("link-metrics-live", kwargs={"slug": "m"})
+
+    def record(self, source, qr=None):
+        eventBuffer.writeEvents([dict(
+            tree_id=self.tree.id, item_id=self.item.id, qr_id=qr and qr.id, source=source, occurredAt=timezone.now(),
+        )])
+
+    def test_read_counters_is_one_query_per_poll(self):
+        self.record(LinkEvent.Source.WEB)
+        self.record(LinkEvent.Source.QR, qr=self.qr)
+        with self.assertNumQueries(1):
+            snapshot = liveCounters.readCounters([self.tree.id])[self.tree.id]
+        self.assertEqual(snapshot, {
+            "tree": {"web": 1, "qr": 1, "total": 2},
+            "qrCodes": {"flyer": {"web": 0, "qr": 1, "total": 1}},
+        })
+
+    async def test_hub_sends_deltas_then_a_snapshot_after_falling_behind(self):
+        hub = liveCounters.CounterHub()
+        watcher, snapshot = await hub.subscribe(self.tree.id)
+        self.assertEqual(snapshot["tree"]["total"], 0)
+        await sync_to_async(self.record)(LinkEvent.Source.QR, qr=self.qr)
+        hub.publish(await sync_to_async(liveCounters.readCounters)([self.tree.id]))
+        self.assertEqual(watcher.queue.get_nowait(), ("delta", {
+            "tree": {"web": 0, "qr": 1, "total": 1, "new": {"web": 0, "qr": 1}},
+            "qrCodes": {"flyer": {"web": 0, "qr": 1, "total": 1, "new": {"web": 0, "qr": 1}}},
+        }))
+
+        for _ in range(liveCounters.QUEUE_SIZE + 1):
+            await sync_to_async(self.record)(LinkEvent.Source.WEB)
+            hub.publish(await sync_to_async(liveCounters.readCounters)([self.tree.id]))
+        self.assertTrue(watcher.behind)
+        while not watcher.queue.empty():
+            watcher.queue.get_nowait()
+        hub.publish(await sync_to_async(liveCounters.readCounters)([self.tree.id]))
+        kind, data = watcher.queue.get_nowait()
+        self.assertEqual((kind, data["tree"]["web"]), ("snapshot", liveCounters.QUEUE_SIZE + 1))
+
+        hub.unsubscribe(self.tree.id, watcher)
+        await hub._task  # the poller stops once nobody is watching
+
+    async def test_asgi_streams_snapshot_then_deltas(self):
+        await self.async_client.aforce_login(self.viewer)
+        resp = await self.async_client.get(self.liveUrl)
+        self.assertEqual(resp["Content-Type"], "text/event-stream")
+        self.assertIn("no-cache", resp["Cache-Control"])
+        chunks = aiter(resp.streaming_content)
+        first = (await anext(chunks)).decode()
+        self.assertTrue(first.startswith("retry: "))
+        self.assertIn('event: snapshot\ndata: {"tree":{"web":0,"qr":0,"total":0},"qrCodes":{}}', first)
+        await sync_to_async(self.record)(LinkEvent.Source.WEB)
+        delta = (await asyncio.wait_for(anext(chunks), timeout=5)).decode()
+        self.assertEqual(
+            delta, 'event: delta\ndata: {"tree":{"web":1,"qr":0,"total":1,"new":{"web":1,"qr":0}}}\n\n',
+        )
+        await chunks.aclose()
+
+    def test_wsgi_answers_with_one_snapshot(self):
+        self.record(LinkEvent.Source.WEB)
+        resp = self.client.get(self.liveUrl)
+        self.assertEqual(resp.status_code, 200)
+        self.assertFalse(resp.streaming)
+        self.assertEqual(resp["X-Accel-Buffering"], "no")
+        self.assertEqual(resp.content.decode(), (
+            f"retry: {liveCounters.RETRY_MILLISECONDS}\n"
+            'event: snapshot\ndata: {"tree":{"web":1,"qr":0,"total":1},"qrCodes":{}}\n\n'
+        ))
+        self.loginAs(UserFactory.make("nobody"))
+        self.assertNotEqual(self.client.get(self.liveUrl).status_code, 200)
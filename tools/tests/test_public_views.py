@@ -1,7 +1,11 @@
-from django.test import TestCase
+import datetime
+
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
 from django.urls import reverse
 
-from tools.models import LinkEvent, LinkTree, LinkTreeItem, QRCode
+from tools.LinkTree import pageCache, routes
+from tools.models import LinkEvent, LinkTree, LinkTreeItem, QRCode, User
 
 
 # --- public views & tracking-through-the-site ------------------------------
@@ -9,6 +13,7 @@ from tools.models import LinkEvent, LinkTree, LinkTreeItem, QRCode
 
 class PublicViewTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.public = LinkTree.objects.create(
             slug="links", title="Austin DSA", visibility=LinkTree.Visibility.PUBLIC
         )
@@ -111,3 +116,176 @@ class PublicViewTests(TestCase):
         # The header text shows, but it is NOT a tracked /go/ link.
         self.assertContains(resp, "Resolutions")
         self.assertContains(resp, "lt-header")
+
+
+# --- rendered-page cache for public trees (LinkTree/pageCache.py) -----------
+
+
+class PublicTreePageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tree = LinkTree.objects.create(
+            slug="links", title="Austin DSA", visibility=LinkTree.Visibility.PUBLIC
+        )
+        self.item = LinkTreeItem.objects.create(
+            tree=self.tree, order=0, kind=LinkTreeItem.Kind.MANUAL,
+            label="Join", url="https://example.org/join",
+        )
+        self.url = reverse("link-tree", kwargs={"slug": "links"})
+
+    def test_repeat_view_is_served_without_queries(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.content, first.content)
+
+    def test_query_string_shares_the_cached_page(self):
+        first = self.client.get(self.url + "?x=1")
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url + "?x=2")
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertContains(second, f'content="http://testserver{self.url}"')
+
+    def test_item_edit_invalidates_the_cached_page(self):
+        self.client.get(self.url)
+        self.item.label = "Become a member"
+        self.item.save()
+        self.assertContains(self.client.get(self.url), "Become a member")
+
+    def test_slug_rename_drops_the_old_page(self):
+        self.client.get(self.url)
+        self.tree.slug = "renamed"
+        self.tree.save()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_members_tree_is_not_cached(self):
+        self.tree.visibility = LinkTree.Visibility.MEMBERS
+        self.tree.save()
+        self.client.get(self.url)
+        self.assertIsNone(pageCache.get(pageCache.pageKey(
+            RequestFactory().get(self.url), "links", pageCache.treeVersion("links")
+        )))
+
+    def test_ttl_is_capped_at_the_next_visibility_boundary(self):
+        now = datetime.datetime(2026, 6, 1, 17, 0, tzinfo=datetime.UTC)
+        self.item.visibleFrom = now + datetime.timedelta(seconds=90)
+        past = LinkTreeItem(visibleUntil=now - datetime.timedelta(hours=1))
+        self.assertEqual(pageCache.pageTtl([self.item, past], now=now), 90)
+        self.assertEqual(pageCache.pageTtl([past], now=now), pageCache.maxTtl())
+
+
+class PublicTreeConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tree = LinkTree.objects.create(
+            slug="links", title="Austin DSA", visibility=LinkTree.Visibility.PUBLIC
+        )
+        self.item = LinkTreeItem.objects.create(
+            tree=self.tree, order=0, kind=LinkTreeItem.Kind.MANUAL,
+            label="Join", url="https://example.org/join",
+        )
+        self.url = reverse("link-tree", kwargs={"slug": "links"})
+
+    def test_public_page_is_publicly_cacheable_and_cookie_independent(self):
+        resp = self.client.get(self.url)
+        self.assertIn("public", resp["Cache-Control"])
+        self.assertIn(f"max-age={pageCache.browserMaxAge()}", resp["Cache-Control"])
+        self.assertTrue(resp["ETag"])
+        self.assertTrue(resp["Last-Modified"])
+        self.assertNotIn("Cookie", resp.get("Vary", ""))
+
+    def test_revisit_is_304_cold_and_warm(self):
+        etag = self.client.get(self.url)["ETag"]
+        cache.clear()  # cold: validated from the rows, nothing rendered
+        with self.assertNumQueries(2):  # tree + prefetched items
+            cold = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cold.status_code, 304)
+        self.client.get(self.url)  # re-warm the page cache
+        with self.assertNumQueries(0):
+            warm = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(warm.status_code, 304)
+        self.assertEqual(warm["ETag"], etag)
+
+    def test_if_modified_since_is_honored(self):
+        lastModified = self.client.get(self.url)["Last-Modified"]
+        resp = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=lastModified)
+        self.assertEqual(resp.status_code, 304)
+
+    def test_item_edit_delete_and_window_change_the_validator(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.item.label = "Join us"
+        self.item.save()
+        edited = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(edited.status_code, 200)
+
+        other = LinkTreeItem.objects.create(
+            tree=self.tree, order=1, kind=LinkTreeItem.Kind.MANUAL, label="Gone", url="https://g.org",
+        )
+        withOther = self.client.get(self.url)
+        other.delete()
+        resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=withOther["ETag"],
+                               HTTP_IF_MODIFIED_SINCE=withOther["Last-Modified"])
+        self.assertEqual(resp.status_code, 200)
+
+        # A visibility window closing hides the item without any save.
+        current = self.client.get(self.url)["ETag"]
+        LinkTreeItem.objects.filter(pk=self.item.pk).update(
+            visibleUntil=datetime.datetime.now(datetime.UTC) - datetime.timedelta(seconds=1)
+        )
+        cache.clear()
+        self.assertNotEqual(self.client.get(self.url)["ETag"], current)
+
+    def test_members_tree_is_private(self):
+        self.tree.visibility = LinkTree.Visibility.MEMBERS
+        self.tree.save()
+        self.client.force_login(User.objects.create_user("member"))
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn("private", resp["Cache-Control"])
+        self.assertNotIn("public", resp["Cache-Control"])
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=resp["ETag"]).status_code, 304)
+
+
+# --- in-process redirect route table (LinkTree/routes.py) -------------------
+
+
+class RedirectRouteTableTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tree = LinkTree.objects.create(slug="links", title="Austin DSA")
+        self.item = LinkTreeItem.objects.create(
+            tree=self.tree, order=0, kind=LinkTreeItem.Kind.MANUAL,
+            label="Join", url="https://example.org/join",
+        )
+        QRCode.objects.create(code="flyer", label="Flyer", item=self.item)
+
+    def test_warm_redirects_only_write_the_event(self):
+        goUrl = reverse("link-go", kwargs={"item_id": self.item.pk})
+        qrUrl = reverse("qr-redirect", kwargs={"code": "flyer"})
+        self.client.get(goUrl)  # loads the table
+        self.client.get(qrUrl)  # and creates the qr counter
+        # No reads: the event INSERT plus one counter UPDATE per target (tree,
+        # item[, qr]), inside a savepoint (a transaction outside tests).
+        with self.assertNumQueries(5):
+            self.assertEqual(self.client.get(goUrl)["Location"], "https://example.org/join")
+        with self.assertNumQueries(6):
+            self.assertEqual(self.client.get(qrUrl)["Location"], "https://example.org/join")
+        self.assertEqual(
+            list(LinkEvent.objects.filter(source=LinkEvent.Source.QR).values_list("tree", "item")),
+            [(self.tree.pk, self.item.pk)] * 2,
+        )
+
+    def test_deactivating_the_tree_reloads_the_table(self):
+        url = reverse("link-go", kwargs={"item_id": self.item.pk})
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.tree.isActive = False
+        self.tree.save()
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_unknown_and_inactive_codes_are_404(self):
+        self.assertEqual(self.client.get(reverse("qr-redirect", kwargs={"code": "nope"})).status_code, 404)
+        QRCode.objects.filter(code="flyer").update(isActive=False)
+        routes.invalidate()  # update() skips the save signals
+        self.assertEqual(self.client.get(reverse("qr-redirect", kwargs={"code": "flyer"})).status_code, 404)
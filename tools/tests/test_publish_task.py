@@ -144,6 +144,14 @@ class PublishEventJobDirectTests(TestCase):
         self.assertFalse(config.ignoreResolveableConflicts)
         self.assertFalse(config.onlyCheckConflicts)
 
+    def test_stage_timings_are_stored_on_the_job(self):
+        job, _ = self.makeDirectJob()
+        publishEvent, _ = self.runJob(job, result=publishedResult())
+        # The driver records its own stages into the recorder it is handed
+        self.assertIsNotNone(publishEvent.call_args.kwargs["timings"])
+        self.assertEqual([span["stage"] for span in job.stageTimings], ["persist", "email"])
+        self.assertTrue(all(span["ok"] for span in job.stageTimings))
+
     def test_ignore_flag_passes_through_to_the_driver_config(self):
         job, _ = self.makeDirectJob(ignoreResolveableConflicts=True)
         publishEvent, _ = self.runJob(job, result=publishedResult())
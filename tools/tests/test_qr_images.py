@@ -0,0 +1,138 @@
+import csv
+import io
+import os
+import tempfile
+import zipfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from tools.LinkTree import qrImages
+from tools.models import LinkTree, LinkTreeItem, QRCode
+
+from tools.tests.support import LoginClientMixin, UserFactory, fastHashing
+
+
+# --- QR image view: render cache + conditional GET --------------------------
+
+
+@fastHashing
+class QrImageTests(LoginClientMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.loginAs(UserFactory.make("maintainer", perms=("manageLinkTree",)))
+        tree = LinkTree.objects.create(slug="links", title="Links")
+        QRCode.objects.create(code="flyer", label="Flyer", tree=tree)
+        self.url = reverse("qr-image", kwargs={"code": "flyer"})
+
+    def test_svg_and_png_render_with_strong_etags(self):
+        svg = self.client.get(self.url)
+        png = self.client.get(self.url + "?fmt=png&download=1")
+        self.assertEqual(svg["Content-Type"], "image/svg+xml")
+        self.assertEqual(png["Content-Type"], "image/png")
+        self.assertTrue(png.content.startswith(b"\x89PNG"))
+        self.assertIn("attachment", png["Content-Disposition"])
+        self.assertTrue(svg["ETag"].startswith('"'))  # strong, not W/
+        self.assertNotEqual(svg["ETag"], png["ETag"])
+        self.assertIn("private", svg["Cache-Control"])
+
+    def test_matching_if_none_match_is_304(self):
+        etag = self.client.get(self.url)["ETag"]
+        with mock.patch.object(qrImages, "render") as mockRender:
+            resp = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp.content, b"")
+        mockRender.assert_not_called()
+
+    def test_repeat_fetch_is_served_from_the_render_cache(self):
+        with mock.patch.object(qrImages, "render", wraps=qrImages.render) as mockRender:
+            first = self.client.get(self.url)
+            second = self.client.get(self.url)
+        self.assertEqual(mockRender.call_count, 1)
+        self.assertEqual(first.content, second.content)
+
+    def test_variants_are_cached_and_tagged_separately(self):
+        default = self.client.get(self.url)
+        bigger = self.client.get(self.url + "?scale=20&border=4&error=h")
+        self.assertNotEqual(default["ETag"], bigger["ETag"])
+        self.assertGreater(len(bigger.content), len(default.content))
+        # Out-of-range values fall back to the defaults (same variant, same tag).
+        clamped = self.client.get(self.url + "?scale=999&error=z")
+        self.assertEqual(clamped["ETag"], default["ETag"])
+
+
+# --- Bulk export: streamed ZIP (view + command) ------------------------------
+
+
+@fastHashing
+@override_settings(LINK_QR_EXPORT_WORKERS=1)
+class QrExportTests(LoginClientMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.maintainer = UserFactory.make("maintainer", perms=("manageLinkTree",))
+        self.tree = LinkTree.objects.create(slug="links", title="Links")
+        other = LinkTree.objects.create(slug="other", title="Other")
+        item = LinkTreeItem.objects.create(tree=self.tree, label="Join", url="https://example.org/join")
+        QRCode.objects.create(code="flyer", label="Flyer", campaign="canvass", tree=self.tree)
+        QRCode.objects.create(code="tent", label="Tent", campaign="canvass", item=item)
+        QRCode.objects.create(code="old", label="Old", campaign="canvass", tree=self.tree, isActive=False)
+        QRCode.objects.create(code="elsewhere", label="Elsewhere", campaign="tabling", tree=other)
+
+    def _export(self, query=""):
+        self.loginAs(self.maintainer)
+        resp = self.client.get(reverse("manage-qr-code-export") + query)
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.streaming)
+        self.assertEqual(resp["Content-Type"], "application/zip")
+        return zipfile.ZipFile(io.BytesIO(b"".join(resp.streaming_content)))
+
+    def test_requires_manage_permission(self):
+        self.loginAs(UserFactory.make("viewer"))
+        resp = self.client.get(reverse("manage-qr-code-export"))
+        self.assertNotEqual(resp.status_code, 200)
+
+    def test_zip_holds_svg_png_and_manifest_per_code(self):
+        archive = self._export("?campaign=canvass&active=1")
+        self.assertEqual(
+            sorted(archive.namelist()),
+            ["manifest.csv", "png/flyer.png", "png/tent.png", "svg/flyer.svg", "svg/tent.svg"],
+        )
+        self.assertTrue(archive.read("png/flyer.png").startswith(b"\x89PNG"))
+        # Same bytes as the single-image view renders for the default variant.
+        single = self.client.get(reverse("qr-image", kwargs={"code": "flyer"}))
+        self.assertEqual(archive.read("svg/flyer.svg"), single.content)
+
+        manifest = list(csv.DictReader(io.StringIO(archive.read("manifest.csv").decode())))
+        self.assertEqual([row["code"] for row in manifest], ["flyer", "tent"])
+        self.assertEqual(manifest[0]["scan_url"], "http://testserver/qr/flyer/")
+        self.assertEqual(manifest[1]["target_url"], "https://example.org/join")
+
+    def test_tree_filter_includes_codes_targeting_its_items(self):
+        archive = self._export("?tree=links")
+        codes = {name.split("/")[1].rsplit(".", 1)[0] for name in archive.namelist() if "/" in name}
+        self.assertEqual(codes, {"flyer", "tent", "old"})
+
+    def test_export_reuses_the_render_cache(self):
+        self._export("?campaign=tabling")
+        with mock.patch.object(qrImages, "render") as mockRender:
+            archive = self._export("?campaign=tabling")
+        mockRender.assert_not_called()
+        self.assertIn("png/elsewhere.png", archive.namelist())
+
+    def test_command_renders_across_a_process_pool(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "codes.zip")
+            out = io.StringIO()
+            call_command(
+                "export_qr_codes", path, "--campaign", "canvass", "--inactive",
+                "--workers", "2", "--base-url", "https://tools.example.org", stdout=out,
+            )
+            with zipfile.ZipFile(path) as archive:
+                self.assertEqual(
+                    sorted(archive.namelist()), ["manifest.csv", "png/old.png", "svg/old.svg"],
+                )
+                self.assertIn(b"https://tools.example.org/qr/old/", archive.read("manifest.csv"))
+        self.assertIn("Exported 1 QR code(s)", out.getvalue())
@@ -29,3 +29,17 @@ class SyncLinkTreeWikiTaskTests(SimpleTestCase):
         with mock.patch("tools.tasks.call_command", side_effect=SystemExit(0)):
             with self.assertNoLogs("tools.tasks", level="ERROR"):
                 tasks.syncLinkTreeWiki.call_local()
+
+
+class RollupLinkEventsTaskTests(SimpleTestCase):
+    def test_calls_command_quietly(self):
+        with mock.patch("tools.tasks.call_command") as mockCall:
+            tasks.rollupLinkEvents.call_local()
+        mockCall.assert_called_once_with("rollup_link_events", quiet=True)
+
+
+class PruneLinkEventsTaskTests(SimpleTestCase):
+    def test_calls_command_quietly(self):
+        with mock.patch("tools.tasks.call_command") as mockCall:
+            tasks.pruneLinkEvents.call_local()
+        mockCall.assert_called_once_with("prune_link_events", quiet=True)
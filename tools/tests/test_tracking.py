@@ -1,8 +1,12 @@
 import datetime
+from unittest import mock
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
 
-from tools.LinkTree import tracking
+from tools.LinkTree import eventBuffer, tracking
+from tools.models import LinkCounter, LinkEvent, LinkTree, LinkTreeItem
 
 
 # --- tracking (privacy-first helpers) --------------------------------------
@@ -42,3 +46,92 @@ class TrackingHelperTests(TestCase):
         meta = {"HTTP_X_FORWARDED_FOR": "198.51.100.7, 10.0.0.1", "REMOTE_ADDR": "10.0.0.1"}
         self.assertEqual(tracking.clientIpFromMeta(meta), "198.51.100.7")
         self.assertEqual(tracking.clientIpFromMeta({"REMOTE_ADDR": "10.0.0.1"}), "10.0.0.1")
+
+
+# --- write-behind recording (eventBuffer) -----------------------------------
+
+
+class EventBufferTests(TestCase):
+    def setUp(self):
+        self.tree = LinkTree.objects.create(slug="b", title="B")
+
+    def row(self, **overrides):
+        fields = dict(tree=self.tree, source=LinkEvent.Source.WEB, occurredAt=timezone.now())
+        fields.update(overrides)
+        return fields
+
+    def test_flush_writes_pending_events_in_batches(self):
+        # No flusher thread: the test drives flush() itself.
+        buffer = eventBuffer.EventBuffer(maxEvents=10, flushSize=2, flushSeconds=60)
+        for _ in range(5):
+            self.assertTrue(buffer.add(self.row()))
+        self.assertEqual(LinkEvent.objects.count(), 0)
+        self.assertEqual(buffer.flush(), 5)
+        self.assertEqual(LinkEvent.objects.count(), 5)
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(buffer.stats.flushed, 5)
+        self.assertEqual(buffer.stats.flushes, 3)
+
+    def test_full_buffer_drops_and_counts_overflow(self):
+        buffer = eventBuffer.EventBuffer(maxEvents=2, flushSize=10, flushSeconds=60)
+        self.assertTrue(buffer.add(self.row()))
+        self.assertTrue(buffer.add(self.row()))
+        with self.assertLogs("tools.LinkTree.eventBuffer", level="WARNING"):
+            self.assertFalse(buffer.add(self.row()))
+        self.assertEqual(buffer.stats.dropped, 1)
+        self.assertEqual(buffer.flush(), 2)
+
+    def test_flush_keeps_the_recorded_time(self):
+        clickedAt = timezone.now() - datetime.timedelta(minutes=5)
+        buffer = eventBuffer.EventBuffer(maxEvents=10, flushSize=10, flushSeconds=60)
+        buffer.add(self.row(occurredAt=clickedAt))
+        buffer.flush()
+        self.assertEqual(LinkEvent.objects.get().occurredAt, clickedAt)
+
+    def test_deleted_item_is_detached_like_set_null(self):
+        kept, deleted = (
+            LinkTreeItem.objects.create(
+                tree=self.tree, order=order, kind=LinkTreeItem.Kind.MANUAL,
+                label=label, url="https://example.org/" + label,
+            )
+            for order, label in enumerate(("kept", "deleted"))
+        )
+        buffer = eventBuffer.EventBuffer(maxEvents=10, flushSize=10, flushSeconds=60)
+        for item in (kept, deleted, kept):
+            buffer.add(dict(
+                tree_id=self.tree.pk, item_id=item.pk,
+                source=LinkEvent.Source.WEB, occurredAt=timezone.now(),
+            ))
+        deleted.delete()
+        self.assertEqual(buffer.flush(), 3)
+        self.assertEqual(LinkEvent.objects.filter(item=kept).count(), 2)
+        # Same as a click written before the delete: kept, with no item
+        self.assertEqual(LinkEvent.objects.filter(tree=self.tree, item__isnull=True).count(), 1)
+        self.assertEqual(buffer.stats.detached, 1)
+        self.assertEqual(buffer.stats.failed, 0)
+        self.assertEqual(LinkCounter.objects.get(tree=self.tree).webCount, 3)
+        self.assertEqual(LinkCounter.objects.get(item=kept).webCount, 2)
+
+    def test_failed_flush_is_counted_not_raised(self):
+        buffer = eventBuffer.EventBuffer(maxEvents=10, flushSize=10, flushSeconds=60)
+        buffer.add(self.row())
+        with mock.patch.object(eventBuffer, "writeEvents", side_effect=Exception("locked")):
+            with self.assertLogs("tools.LinkTree.eventBuffer", level="ERROR"):
+                self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(buffer.stats.failed, 1)
+        self.assertEqual(len(buffer), 0)
+
+    @override_settings(LINK_EVENT_RECORDING="buffered")
+    def test_buffered_redirect_queues_instead_of_writing(self):
+        item = LinkTreeItem.objects.create(
+            tree=self.tree, order=0, kind=LinkTreeItem.Kind.MANUAL,
+            label="Join", url="https://example.org/join",
+        )
+        buffer = eventBuffer.EventBuffer(maxEvents=10, flushSize=10, flushSeconds=60)
+        with mock.patch.object(eventBuffer, "getBuffer", return_value=buffer):
+            resp = self.client.get(reverse("link-go", kwargs={"item_id": item.pk}))
+        self.assertEqual(resp.status_code, 302)
+        self.assertEqual(LinkEvent.objects.count(), 0)
+        self.assertEqual(len(buffer), 1)
+        buffer.flush()
+        self.assertEqual(LinkEvent.objects.get().item, item)
@@ -52,6 +52,9 @@ urlpatterns = [
     path("link-metrics", linkTreeViews.link_metrics, name="link-metrics"),
     path("link-metrics/<slug:slug>", linkTreeViews.link_metrics, name="link-metrics-tree"),
     path("link-metrics/<slug:slug>.csv", linkTreeViews.link_metrics_csv, name="link-metrics-csv"),
+    path("link-metrics/<slug:slug>.json", linkTreeViews.link_metrics_json, name="link-metrics-json"),
+    path("link-metrics/<slug:slug>/events.json", linkTreeViews.link_metrics_events_json, name="link-metrics-events-json"),
+    path("link-metrics/<slug:slug>/live", linkTreeViews.link_metrics_live, name="link-metrics-live"),
     # --- Link Tree (gated: in-app management UI) ---
     path("manage-link-trees", linkTreeViews.manage_link_tree_list, name="manage-link-tree-list"),
     path("manage-link-trees/new", linkTreeViews.manage_link_tree_create, name="manage-link-tree-new"),
@@ -60,6 +63,7 @@ urlpatterns = [
     path("manage-link-trees/<int:treeId>/items/new", linkTreeViews.manage_link_tree_item_edit, name="manage-link-tree-item-new"),
     path("manage-link-trees/<int:treeId>/items/<int:itemId>", linkTreeViews.manage_link_tree_item_edit, name="manage-link-tree-item-edit"),
     path("manage-qr-codes", linkTreeViews.manage_qr_code_list, name="manage-qr-code-list"),
+    path("manage-qr-codes/export.zip", linkTreeViews.manage_qr_code_export, name="manage-qr-code-export"),
     path("manage-qr-codes/new", linkTreeViews.manage_qr_code_edit, name="manage-qr-code-new"),
     path("manage-qr-codes/<slug:code>", linkTreeViews.manage_qr_code_edit, name="manage-qr-code-edit"),
 
@@ -1,2 +1,11 @@
 
-DATE_TIME_FORMAT = "%Y-%m-%d %H:%M %Z"
\ No newline at end of file
+DATE_TIME_FORMAT = "%Y-%m-%d %H:%M %Z"
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of ``values`` (any order); 0 when empty."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]